@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+ANN Index Benchmark
+Measure recall@k against the exact flat index, query throughput and build
+time for the index backends supported by ProductSimilarityModel, on
+synthetic catalogs shaped like product embeddings (clustered, L2-normalized).
+The storage sweep also reports memory per product and the recall lost to
+quantization, with and without reranking. Reranking reads float16 vectors
+from a memory-mapped file, as a loaded snapshot does, so they count as disk
+rather than memory.
+
+Usage:
+    python benchmark_ann.py                          # 10k, 100k and 1M products
+    python benchmark_ann.py --sizes 10000,100000 --k 10 --output results.json
+    python benchmark_ann.py --sizes 100000 --storage-only
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from similarity_model import DEFAULT_RERANK_FACTOR, build_faiss_index, rerank, set_search_params
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+
+# (index type, build params, list of search-time params to sweep)
+CONFIGURATIONS = [
+    ('hnsw', {'M': 16, 'ef_construction': 200}, [{'ef_search': ef} for ef in (16, 32, 64, 128, 256)]),
+    ('hnsw', {'M': 32, 'ef_construction': 200}, [{'ef_search': ef} for ef in (16, 32, 64, 128, 256)]),
+    ('ivf', {}, [{'nprobe': nprobe} for nprobe in (1, 4, 8, 16, 32, 64)]),
+]
+
+# (index type, storage, build params, search params) for the memory/recall sweep
+STORAGE_CONFIGURATIONS = [
+    ('flat', 'float32', {}, {}),
+    ('flat', 'float16', {}, {}),
+    ('flat', 'int8', {}, {}),
+    ('flat', 'pq', {}, {}),
+    ('hnsw', 'float16', {'M': 32, 'ef_construction': 200}, {'ef_search': 128}),
+    ('hnsw', 'int8', {'M': 32, 'ef_construction': 200}, {'ef_search': 128}),
+    ('ivf', 'int8', {}, {'nprobe': 16}),
+    ('ivf', 'pq', {}, {'nprobe': 16}),
+]
+
+def synthetic_catalog(n: int, dimension: int, n_clusters: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors: products of a category sit near a shared centre"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dimension)).astype('float32')
+    vectors = np.empty((n, dimension), dtype='float32')
+    chunk = 100_000
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        assignment = rng.integers(0, n_clusters, size)
+        vectors[start:start + size] = centres[assignment] + 0.6 * rng.standard_normal((size, dimension)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def synthetic_queries(catalog: np.ndarray, n_queries: int, seed: int = 1) -> np.ndarray:
+    """Perturbed catalog items, like a product page or a close text query"""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(catalog), n_queries, replace=False)
+    queries = catalog[picks] + 0.3 * rng.standard_normal((n_queries, catalog.shape[1])).astype('float32') / np.sqrt(catalog.shape[1])
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    faiss.normalize_L2(queries)
+    return queries
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray, k: int) -> float:
+    """Fraction of the true top-k returned in the approximate top-k"""
+    hits = sum(len(set(f[:k]) & set(t[:k])) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+def timed_search(index, queries: np.ndarray, k: int):
+    started = time.perf_counter()
+    _, ids = index.search(queries, k)
+    elapsed = time.perf_counter() - started
+    return ids, len(queries) / elapsed
+
+def build(index_type: str, params: Dict, vectors: np.ndarray, ids: np.ndarray, storage: str = 'float32'):
+    started = time.perf_counter()
+    index = build_faiss_index(index_type, vectors.shape[1], params, training_vectors=vectors, storage=storage)
+    index.add_with_ids(vectors, ids)
+    return index, time.perf_counter() - started
+
+def benchmark_size(n: int, k: int, n_queries: int, dimension: int) -> List[Dict]:
+    print(f"\n=== {n:,} products ===")
+    vectors = synthetic_catalog(n, dimension, n_clusters=max(10, n // 1000))
+    ids = np.arange(n, dtype='int64')
+    queries = synthetic_queries(vectors, n_queries)
+    
+    flat, flat_build = build('flat', {}, vectors, ids)
+    truth, flat_qps = timed_search(flat, queries, k)
+    del flat
+    
+    results = [{
+        'catalog_size': n, 'index_type': 'flat', 'build_params': {}, 'search_params': {},
+        'build_seconds': round(flat_build, 3), 'qps': round(flat_qps, 1), f'recall@{k}': 1.0
+    }]
+    _print_row(results[-1], k)
+    
+    for index_type, build_params, sweep in CONFIGURATIONS:
+        index, build_seconds = build(index_type, build_params, vectors, ids)
+        for search_params in sweep:
+            set_search_params(index, **search_params)
+            found, qps = timed_search(index, queries, k)
+            results.append({
+                'catalog_size': n,
+                'index_type': index_type,
+                'build_params': build_params,
+                'search_params': search_params,
+                'build_seconds': round(build_seconds, 3),
+                'qps': round(qps, 1),
+                f'recall@{k}': round(recall_at_k(found, truth, k), 4)
+            })
+            _print_row(results[-1], k)
+        del index
+    
+    return results
+
+def benchmark_storage(n: int, k: int, n_queries: int, dimension: int) -> List[Dict]:
+    """Memory per product and recall loss of each storage mode, with and without reranking"""
+    print(f"\n=== {n:,} products: storage ===")
+    vectors = synthetic_catalog(n, dimension, n_clusters=max(10, n // 1000))
+    ids = np.arange(n, dtype='int64')
+    queries = synthetic_queries(vectors, n_queries)
+    # Snapshot vectors, memory-mapped next to a quantized index for reranking
+    rerank_file = tempfile.NamedTemporaryFile(suffix='.npy', delete=False)
+    rerank_file.close()
+    np.save(rerank_file.name, vectors.astype('float16'))
+    rerank_vectors = np.load(rerank_file.name, mmap_mode='r')
+    
+    flat, _ = build('flat', {}, vectors, ids)
+    _, truth = flat.search(queries, k)
+    del flat
+    
+    results = []
+    for index_type, storage, build_params, search_params in STORAGE_CONFIGURATIONS:
+        index, build_seconds = build(index_type, build_params, vectors, ids, storage)
+        set_search_params(index, **search_params)
+        index_bytes = len(faiss.serialize_index(index))
+        found, qps = timed_search(index, queries, k)
+        
+        factor = DEFAULT_RERANK_FACTOR[storage]
+        row = {
+            'catalog_size': n,
+            'index_type': index_type,
+            'storage': storage,
+            'build_params': build_params,
+            'search_params': search_params,
+            'build_seconds': round(build_seconds, 3),
+            'qps': round(qps, 1),
+            'bytes_per_product': round(index_bytes / n, 1),
+            f'recall@{k}': round(recall_at_k(found, truth, k), 4),
+            'rerank_factor': factor
+        }
+        if factor > 1:
+            started = time.perf_counter()
+            _, candidates = index.search(queries, k * factor)
+            _, reranked = rerank(queries, candidates, lambda c: rerank_vectors[c], k)
+            row['rerank_disk_bytes_per_product'] = rerank_vectors.shape[1] * rerank_vectors.itemsize
+            row['reranked_qps'] = round(len(queries) / (time.perf_counter() - started), 1)
+            row[f'reranked_recall@{k}'] = round(recall_at_k(reranked, truth, k), 4)
+        results.append(row)
+        _print_storage_row(row, k)
+        del index
+    
+    del rerank_vectors
+    os.remove(rerank_file.name)
+    return results
+
+def _print_storage_row(row: Dict, k: int):
+    label = f"{row['index_type']}/{row['storage']} {row['search_params'] or ''}"
+    line = (f"{label:<36} {row['bytes_per_product']:>8.1f} B/product  "
+            f"{row['qps']:>10,.0f} q/s  recall@{k} {row[f'recall@{k}']:.4f}")
+    if f'reranked_recall@{k}' in row:
+        line += (f"  reranked x{row['rerank_factor']} {row[f'reranked_recall@{k}']:.4f} ({row['reranked_qps']:,.0f} q/s, "
+                 f"+{row['rerank_disk_bytes_per_product']} B/product on disk)")
+    print(line)
+
+def _print_row(row: Dict, k: int):
+    params = {**row['build_params'], **row['search_params']}
+    label = f"{row['index_type']} {params}" if params else row['index_type']
+    print(f"{label:<60} build {row['build_seconds']:>8.2f}s  "
+          f"{row['qps']:>10,.0f} q/s  recall@{k} {row[f'recall@{k}']:.4f}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark ANN index backends for product similarity")
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated catalog sizes')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours per query')
+    parser.add_argument('--queries', type=int, default=1000, help='Number of queries per catalog')
+    parser.add_argument('--dimension', type=int, default=DIMENSION, help='Embedding dimension')
+    parser.add_argument('--threads', type=int, default=None, help='FAISS OpenMP threads')
+    parser.add_argument('--storage-only', action='store_true', help='Only run the storage (memory/recall) sweep')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args(argv)
+    
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+    
+    results = []
+    for n in [int(size) for size in args.sizes.split(',')]:
+        if not args.storage_only:
+            results.extend(benchmark_size(n, args.k, min(args.queries, n), args.dimension))
+        results.extend(benchmark_storage(n, args.k, min(args.queries, n), args.dimension))
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
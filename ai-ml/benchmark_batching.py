@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Micro-Batching Benchmark
+Fire single-query embedding and sentiment requests from many concurrent
+asyncio clients and compare one forward pass per request against the
+micro-batched async APIs (encode_query_async, analyze_sentiment_async):
+requests per second, p50/p95 latency and mean batch size.
+
+Usage:
+    python benchmark_batching.py
+    python benchmark_batching.py --requests 2000 --concurrency 1,8,32,128 --max-wait-ms 5 --output batching.json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmark_sentiment import synthetic_reviews
+from sentiment_model import SentimentAnalyzer
+from similarity_model import ProductSimilarityModel
+
+async def run_load(call: Callable[[int], Awaitable], requests: int, concurrency: int) -> Dict:
+    """Issue `requests` calls from `concurrency` concurrent clients; throughput and latency"""
+    latencies = []
+    counter = iter(range(requests))
+    
+    async def client():
+        for i in counter:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests_per_second': round(requests / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2)
+    }
+
+async def benchmark_target(name: str, single: Callable, batched: Callable[[str], Awaitable], batcher_stats: Callable,
+                           texts: List[str], concurrency_levels: List[int]) -> List[Dict]:
+    # Unbatched baseline: each request is its own forward pass on one model thread
+    executor = ThreadPoolExecutor(1)
+    loop = asyncio.get_running_loop()
+    results = []
+    for concurrency in concurrency_levels:
+        unbatched = await run_load(
+            lambda i: loop.run_in_executor(executor, single, texts[i]), len(texts), concurrency
+        )
+        before = dict(batcher_stats())
+        batched_result = await run_load(lambda i: batched(texts[i]), len(texts), concurrency)
+        after = batcher_stats()
+        batches = after['batches'] - before.get('batches', 0)
+        batched_result['mean_batch_size'] = round((after['items'] - before.get('items', 0)) / batches, 2) if batches else 0.0
+        
+        results.append({'target': name, 'concurrency': concurrency, 'unbatched': unbatched, 'batched': batched_result})
+        print(f"{name:>9} c={concurrency:>4}: {unbatched['requests_per_second']:>8.1f} -> "
+              f"{batched_result['requests_per_second']:>8.1f} req/s, p95 {unbatched['p95_ms']:.1f} -> "
+              f"{batched_result['p95_ms']:.1f} ms, batch {batched_result['mean_batch_size']}")
+    executor.shutdown()
+    return results
+
+async def benchmark(requests: int, concurrency_levels: List[int], max_batch_size: int, max_wait_ms: float,
+                    targets: List[str], embedding_model: str, sentiment_model: str) -> List[Dict]:
+    results = []
+    if 'embed' in targets:
+        model = ProductSimilarityModel(embedding_model, query_cache_size=0)
+        model.micro_batch_size, model.micro_batch_wait_ms = max_batch_size, max_wait_ms
+        # Unique texts: every request is a cache miss and needs the model
+        queries = [f"{review[:60]} #{i}" for i, review in enumerate(synthetic_reviews(requests, seed=1))]
+        model._encode_uncached(queries[:8])  # warm-up
+        results += await benchmark_target(
+            'embed',
+            lambda text: model._encode_queries([text]),
+            model.encode_query_async,
+            lambda: model._query_batcher.stats() if model._query_batcher else {'batches': 0, 'items': 0},
+            queries,
+            concurrency_levels
+        )
+    if 'sentiment' in targets:
+        analyzer = SentimentAnalyzer(sentiment_model)
+        analyzer.micro_batch_size, analyzer.micro_batch_wait_ms = max_batch_size, max_wait_ms
+        reviews = synthetic_reviews(requests, seed=2)
+        analyzer.analyze_batch(reviews[:8])  # warm-up
+        results += await benchmark_target(
+            'sentiment',
+            analyzer.analyze_sentiment,
+            analyzer.analyze_sentiment_async,
+            lambda: analyzer._micro_batcher.stats() if analyzer._micro_batcher else {'batches': 0, 'items': 0},
+            reviews,
+            concurrency_levels
+        )
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched embedding and sentiment under concurrency")
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per measurement')
+    parser.add_argument('--concurrency', default='1,8,32,128', help='Comma-separated concurrent client counts')
+    parser.add_argument('--max-batch-size', type=int, default=64, help='Largest micro-batch')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help='Longest wait for a micro-batch to fill')
+    parser.add_argument('--targets', default='embed,sentiment', help='embed, sentiment or both')
+    parser.add_argument('--embedding-model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--sentiment-model', default='cardiffnlp/twitter-roberta-base-sentiment-latest')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args(argv)
+    
+    results = asyncio.run(benchmark(
+        args.requests,
+        [int(level) for level in args.concurrency.split(',')],
+        args.max_batch_size,
+        args.max_wait_ms,
+        args.targets.split(','),
+        args.embedding_model,
+        args.sentiment_model
+    ))
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
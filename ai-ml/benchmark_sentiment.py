@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Sentiment Throughput Benchmark
+Measure reviews per second of SentimentAnalyzer.analyze_batch on CPU for
+several batch sizes, on synthetic reviews with a realistic length spread.
+With --backends, compare inference backends instead: single-review latency,
+batched throughput and label agreement with the full-precision reference,
+and recommend the fastest backend within the agreement threshold. With
+--tiered, measure the lexicon tier: share of reviews it handles and its
+agreement with the model on those reviews.
+
+Usage:
+    python benchmark_sentiment.py
+    python benchmark_sentiment.py --reviews 2000 --batch-sizes 1,8,32,64 --output sentiment.json
+    python benchmark_sentiment.py --backends pytorch,int8,onnx,onnx-int8 --min-agreement 0.98
+    python benchmark_sentiment.py --backends pytorch,int8 --database-url sqlite:///../backend/ai_search.db
+    python benchmark_sentiment.py --tiered --uncertainty-band 0.5
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from model_registry import registry
+from sentiment_model import SentimentAnalyzer, SENTIMENT_BACKENDS
+
+SENTENCES = [
+    "This product is amazing and I love the texture.",
+    "Terrible quality, it broke after two days.",
+    "It's okay, nothing special but does the job.",
+    "The packaging was damaged on delivery but the cream itself is great.",
+    "Would definitely recommend to anyone with dry skin.",
+    "Smells cheap and the color is nothing like the picture.",
+    "Good value for the price, shipping was fast.",
+    "I have been using it for a month and my skin feels much softer.",
+]
+
+def synthetic_reviews(n: int, seed: int = 0) -> List[str]:
+    """Reviews of 1 to 40 sentences (roughly 10 to 500 tokens), skewed short like real reviews"""
+    rng = np.random.default_rng(seed)
+    lengths = np.clip(rng.geometric(0.15, n), 1, 40)
+    return [' '.join(rng.choice(SENTENCES, length)) for length in lengths]
+
+def database_reviews(database_url: str, limit: int) -> List[str]:
+    """Review texts from the reviews table, so agreement is measured on real data"""
+    from sqlalchemy import create_engine, text
+    engine = create_engine(database_url)
+    query = text("SELECT review_text FROM reviews WHERE review_text IS NOT NULL AND review_text != '' LIMIT :limit")
+    try:
+        with engine.connect() as connection:
+            return [row.review_text for row in connection.execute(query, {'limit': limit})]
+    finally:
+        engine.dispose()
+
+def benchmark(analyzer: SentimentAnalyzer, reviews: List[str], batch_sizes: List[int]) -> List[Dict]:
+    analyzer.analyze_batch(reviews[:16], batch_size=8)  # warm-up
+    
+    results = []
+    for batch_size in batch_sizes:
+        started = time.perf_counter()
+        analyzer.analyze_batch(reviews, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        results.append({
+            'batch_size': batch_size,
+            'reviews': len(reviews),
+            'seconds': round(elapsed, 2),
+            'reviews_per_second': round(len(reviews) / elapsed, 1)
+        })
+        print(f"batch_size {batch_size:>3}: {results[-1]['reviews_per_second']:>8.1f} reviews/s ({elapsed:.1f}s)")
+    return results
+
+def latency(analyzer: SentimentAnalyzer, reviews: List[str], samples: int = 100) -> Dict:
+    """Single-review analyze_sentiment latency in milliseconds"""
+    timings = []
+    for review in reviews[:samples]:
+        started = time.perf_counter()
+        analyzer.analyze_sentiment(review)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'p50_ms': round(float(np.percentile(timings, 50)), 2),
+        'p95_ms': round(float(np.percentile(timings, 95)), 2)
+    }
+
+def agreement(reference: List[Dict], candidate: List[Dict]) -> Dict:
+    """Share of identical labels and mean normalized-score difference versus the reference"""
+    labels = np.mean([r['label'].lower() == c['label'].lower() for r, c in zip(reference, candidate)])
+    delta = np.mean([abs(r['normalized_score'] - c['normalized_score']) for r, c in zip(reference, candidate)])
+    return {'label_agreement': round(float(labels), 4), 'mean_score_delta': round(float(delta), 4)}
+
+def compare_backends(model_name: str, backends: List[str], reviews: List[str], batch_size: int,
+                     min_agreement: float, onnx_dir: Optional[str] = None) -> Dict:
+    """Benchmark each backend against the pytorch reference; recommend the fastest one that agrees enough"""
+    reference_results = None
+    results = []
+    for backend in ['pytorch'] + [b for b in backends if b != 'pytorch']:
+        analyzer = SentimentAnalyzer(model_name, batch_size=batch_size, backend=backend, onnx_dir=onnx_dir)
+        analyzer.load()
+        if analyzer.backend != backend:
+            print(f"Skipping {backend}: not available")
+            registry.unload(analyzer.registry_key)
+            continue
+        analyzer.analyze_batch(reviews[:16])  # warm-up
+        
+        started = time.perf_counter()
+        predictions = analyzer.analyze_batch(reviews)
+        elapsed = time.perf_counter() - started
+        if reference_results is None:
+            reference_results = predictions
+        
+        result = {
+            'backend': backend,
+            'reviews_per_second': round(len(reviews) / elapsed, 1),
+            **latency(analyzer, reviews),
+            **agreement(reference_results, predictions)
+        }
+        results.append(result)
+        print(f"{backend:>10}: {result['reviews_per_second']:>8.1f} reviews/s, "
+              f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+              f"agreement {result['label_agreement']:.2%} (score delta {result['mean_score_delta']:.3f})")
+        registry.unload(analyzer.registry_key)  # free it before loading the next backend
+    
+    eligible = [r for r in results if r['label_agreement'] >= min_agreement]
+    recommended = max(eligible, key=lambda r: r['reviews_per_second'])['backend'] if eligible else None
+    print(f"\nRecommended backend (agreement >= {min_agreement:.0%}): {recommended}")
+    return {'min_agreement': min_agreement, 'recommended': recommended, 'backends': results}
+
+def compare_tiered(model_name: str, reviews: List[str], batch_size: int, uncertainty_band: float) -> Dict:
+    """Throughput and agreement of the lexicon+model tiered mode against the model alone"""
+    reference = SentimentAnalyzer(model_name, batch_size=batch_size)
+    tiered = SentimentAnalyzer(model_name, batch_size=batch_size, tiered=True, uncertainty_band=uncertainty_band)
+    
+    timings = {}
+    predictions = {}
+    for name, analyzer in (('model', reference), ('tiered', tiered)):
+        analyzer.analyze_batch(reviews[:16])  # warm-up
+        started = time.perf_counter()
+        predictions[name] = analyzer.analyze_batch(reviews)
+        timings[name] = time.perf_counter() - started
+    
+    lexicon_positions = [i for i, result in enumerate(predictions['tiered']) if result.get('tier') == 'lexicon']
+    result = {
+        'uncertainty_band': uncertainty_band,
+        'model_reviews_per_second': round(len(reviews) / timings['model'], 1),
+        'tiered_reviews_per_second': round(len(reviews) / timings['tiered'], 1),
+        'lexicon_share': round(len(lexicon_positions) / len(reviews), 4),
+        'overall': agreement(predictions['model'], predictions['tiered']),
+        'lexicon_tier': agreement(
+            [predictions['model'][i] for i in lexicon_positions],
+            [predictions['tiered'][i] for i in lexicon_positions]
+        ) if lexicon_positions else None
+    }
+    print(f"model only: {result['model_reviews_per_second']:>8.1f} reviews/s")
+    print(f"    tiered: {result['tiered_reviews_per_second']:>8.1f} reviews/s, "
+          f"lexicon handled {result['lexicon_share']:.1%}")
+    print(f"agreement: overall {result['overall']['label_agreement']:.2%}"
+          + (f", lexicon tier {result['lexicon_tier']['label_agreement']:.2%}" if lexicon_positions else ""))
+    return result
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark batched sentiment inference")
+    parser.add_argument('--reviews', type=int, default=1000, help='Number of synthetic reviews')
+    parser.add_argument('--batch-sizes', default='1,8,32,64', help='Comma-separated batch sizes')
+    parser.add_argument('--model', default='cardiffnlp/twitter-roberta-base-sentiment-latest', help='Sentiment model')
+    parser.add_argument('--threads', type=int, default=None, help='torch CPU threads')
+    parser.add_argument('--backends', help=f'Comma-separated backends to compare ({", ".join(SENTIMENT_BACKENDS)})')
+    parser.add_argument('--min-agreement', type=float, default=0.98, help='Required label agreement with pytorch')
+    parser.add_argument('--batch-size', type=int, default=32, help='Batch size for the backend comparison')
+    parser.add_argument('--tiered', action='store_true', help='Measure the lexicon tier against the model')
+    parser.add_argument('--uncertainty-band', type=float, default=0.5, help='Lexicon scores below this go to the model')
+    parser.add_argument('--onnx-dir', help='Cache directory for exported ONNX graphs')
+    parser.add_argument('--database-url', help='Sample review texts from this database instead of synthetic ones')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args(argv)
+    
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    
+    reviews = database_reviews(args.database_url, args.reviews) if args.database_url else synthetic_reviews(args.reviews)
+    if args.tiered:
+        results = compare_tiered(args.model, reviews, args.batch_size, args.uncertainty_band)
+    elif args.backends:
+        results = compare_backends(
+            args.model, args.backends.split(','), reviews, args.batch_size, args.min_agreement, args.onnx_dir
+        )
+    else:
+        analyzer = SentimentAnalyzer(args.model)
+        results = benchmark(analyzer, reviews, [int(size) for size in args.batch_sizes.split(',')])
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
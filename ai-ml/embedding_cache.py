@@ -0,0 +1,153 @@
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+import hashlib
+import json
+import os
+import re
+
+class EmbeddingCache:
+    """Content-addressed on-disk cache of text embeddings
+    
+    Entries are keyed by sha1(model name, text), so unchanged products are
+    never re-encoded across training runs. Layout per model directory:
+    
+    - vectors.f32: raw float32 rows, memory-mapped for reads
+    - keys.bin: 20-byte sha1 digests, row i of keys.bin <-> row i of vectors.f32
+    - meta.json: model name and embedding dimension
+    
+    Appends write the vectors before the keys, so an interrupted write leaves
+    only unreferenced trailing vectors, which the writer truncates before its
+    first append. Readers map exactly the rows that have keys and never
+    modify the files. The cache assumes a single writer process; any number
+    of readers is fine.
+    """
+    
+    KEY_BYTES = 20
+    
+    def __init__(self, cache_dir: str, model_name: str, dimension: int):
+        self.model_name = model_name
+        self.dimension = dimension
+        self.directory = os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        os.makedirs(self.directory, exist_ok=True)
+        
+        self._vectors_path = os.path.join(self.directory, 'vectors.f32')
+        self._keys_path = os.path.join(self.directory, 'keys.bin')
+        self._meta_path = os.path.join(self.directory, 'meta.json')
+        
+        self._check_meta()
+        self._rows: Dict[bytes, int] = {}
+        self._vectors = None
+        self._repaired = False
+        self._load()
+    
+    def _check_meta(self):
+        meta = {'model_name': self.model_name, 'dimension': self.dimension, 'dtype': 'float32'}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                stored = json.load(f)
+            if stored.get('dimension') != self.dimension:
+                raise ValueError(
+                    f"Embedding cache at {self.directory} has dimension {stored.get('dimension')}, "
+                    f"expected {self.dimension}"
+                )
+        else:
+            with open(self._meta_path, 'w') as f:
+                json.dump(meta, f)
+    
+    def _load(self):
+        keys = b''
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, 'rb') as f:
+                keys = f.read()
+        count = len(keys) // self.KEY_BYTES
+        self._rows = {keys[i * self.KEY_BYTES:(i + 1) * self.KEY_BYTES]: i for i in range(count)}
+        self._count = count
+        self._map()
+    
+    def _repair(self):
+        """Drop trailing bytes of interrupted appends so rows and keys stay aligned
+        
+        Only the writer does this, right before its first append; the keys are
+        re-read first in case another process wrote since this cache was opened.
+        """
+        self._load()
+        for path, size in ((self._vectors_path, self._count * self.dimension * 4),
+                           (self._keys_path, self._count * self.KEY_BYTES)):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        self._repaired = True
+    
+    def _map(self):
+        if self._count:
+            self._vectors = np.memmap(self._vectors_path, dtype='float32', mode='r',
+                                      shape=(self._count, self.dimension))
+        else:
+            self._vectors = None
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def key(self, text: str) -> bytes:
+        """Content address of a text for this model"""
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode('utf-8')).digest()
+    
+    def lookup(self, texts: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """Return an embedding matrix for `texts` and the positions that missed"""
+        result = np.zeros((len(texts), self.dimension), dtype='float32')
+        missing = []
+        hit_positions = []
+        hit_rows = []
+        for position, text in enumerate(texts):
+            row = self._rows.get(self.key(text))
+            if row is None:
+                missing.append(position)
+            else:
+                hit_positions.append(position)
+                hit_rows.append(row)
+        if hit_rows:
+            result[hit_positions] = self._vectors[hit_rows]
+        return result, missing
+    
+    def store(self, texts: List[str], vectors: np.ndarray):
+        """Append embeddings for texts that are not cached yet"""
+        if not self._repaired:
+            self._repair()
+        new_keys = []
+        new_rows = []
+        for text, vector in zip(texts, vectors):
+            key = self.key(text)
+            if key in self._rows:
+                continue
+            self._rows[key] = self._count + len(new_keys)
+            new_keys.append(key)
+            new_rows.append(vector)
+        if not new_keys:
+            return
+        
+        with open(self._vectors_path, 'ab') as f:
+            f.write(np.ascontiguousarray(new_rows, dtype='float32').tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._keys_path, 'ab') as f:
+            f.write(b''.join(new_keys))
+        
+        self._count += len(new_keys)
+        self._map()
+    
+    def get_or_encode(self, texts: List[str], encode: Callable[[List[str]], np.ndarray],
+                      write: bool = True) -> np.ndarray:
+        """Embeddings for `texts`, encoding only cache misses
+        
+        With write=False misses are encoded but not stored (for one-off query texts).
+        """
+        result, missing = self.lookup(texts)
+        if missing:
+            # Encode each distinct missing text once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = np.asarray(encode(unique_texts), dtype='float32')
+            row_of = {text: row for row, text in enumerate(unique_texts)}
+            result[missing] = encoded[[row_of[texts[i]] for i in missing]]
+            if write:
+                self.store(unique_texts, encoded)
+        return result
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Streaming Embedding Pipeline
+Read products from the database in id-ordered chunks, encode them in batches
+and append the embeddings to disk as each chunk finishes. Peak memory is
+bounded by the chunk size, and an interrupted run resumes from its last
+checkpoint. Running again after a completed run starts a new pass over the
+current catalog, so edited products are re-encoded and deleted ones dropped;
+products whose text is unchanged reuse their vectors from the previous pass.
+
+Output directory layout:
+    vectors.f32      float32 rows, L2-normalized
+    ids.i64          int64 product id per row
+    metadata.jsonl   one JSON object per row (retrieval metadata + text hash)
+    checkpoint.json  last committed product id, row count and file offsets
+    *.prev           the previous completed pass, while a new pass is running
+
+Usage:
+    python embedding_pipeline.py sqlite:///../backend/ai_search.db models/embeddings --chunk-size 2000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+from similarity_model import ProductSimilarityModel, METADATA_FIELDS
+
+PRODUCT_COLUMNS = ('id', 'name', 'brand', 'category', 'subcategory', 'description', 'features', 'price', 'rating', 'in_stock')
+
+class EmbeddingPipeline:
+    def __init__(
+        self,
+        database_url: str,
+        output_dir: str,
+        model_name: str = 'all-MiniLM-L6-v2',
+        chunk_size: int = 2000,
+        batch_size: int = 64,
+        workers: int = 1,
+        embedding_cache_dir: Optional[str] = None,
+        similarity_model: Optional[ProductSimilarityModel] = None,
+        exclude_duplicates: bool = False
+    ):
+        self.engine = create_engine(database_url)
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.workers = workers
+        # Skip products merged into another product's duplicate cluster (product_signatures)
+        self.exclude_duplicates = exclude_duplicates
+        self.similarity = similarity_model or ProductSimilarityModel(
+            model_name, embedding_cache_dir=embedding_cache_dir
+        )
+        self.similarity.encode_batch_size = batch_size
+        self.dimension = self.similarity.model.get_sentence_embedding_dimension()
+        
+        self._vectors_path = os.path.join(output_dir, 'vectors.f32')
+        self._ids_path = os.path.join(output_dir, 'ids.i64')
+        self._metadata_path = os.path.join(output_dir, 'metadata.jsonl')
+        self._checkpoint_path = os.path.join(output_dir, 'checkpoint.json')
+        self._store_paths = (self._vectors_path, self._ids_path, self._metadata_path)
+    
+    def _read_checkpoint(self) -> Dict:
+        if os.path.exists(self._checkpoint_path):
+            with open(self._checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('model_name') != self.similarity.model_name:
+                raise ValueError(
+                    f"{self.output_dir} was built with {checkpoint.get('model_name')}; "
+                    "use a fresh output directory or run with resume disabled"
+                )
+            return checkpoint
+        return self._new_checkpoint()
+    
+    def _new_checkpoint(self) -> Dict:
+        return {
+            'model_name': self.similarity.model_name,
+            'dimension': self.dimension,
+            'last_id': 0,
+            'rows': 0,
+            'metadata_bytes': 0,
+            'started_at': datetime.utcnow().isoformat(),
+            'completed': False
+        }
+    
+    def _write_checkpoint(self, checkpoint: Dict):
+        tmp_path = self._checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._checkpoint_path)
+    
+    def _truncate_to(self, checkpoint: Dict):
+        """Discard anything written after the last checkpoint"""
+        sizes = {
+            self._vectors_path: checkpoint['rows'] * self.dimension * 4,
+            self._ids_path: checkpoint['rows'] * 8,
+            self._metadata_path: checkpoint['metadata_bytes']
+        }
+        for path, size in sizes.items():
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+            elif os.path.getsize(path) != size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+    
+    def _reset(self):
+        paths = self._store_paths + (self._checkpoint_path,) + tuple(path + '.prev' for path in self._store_paths)
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _start_new_pass(self) -> Dict:
+        """Keep a completed store as *.prev and return a checkpoint for a fresh pass"""
+        for path in self._store_paths:
+            if os.path.exists(path):
+                os.replace(path, path + '.prev')
+        checkpoint = self._new_checkpoint()
+        self._write_checkpoint(checkpoint)
+        return checkpoint
+    
+    def _previous_pass(self) -> Optional[Tuple[Dict[str, int], np.ndarray]]:
+        """Row of each text hash in the previous pass, and its vectors (memory-mapped)"""
+        vectors_path, _, metadata_path = (path + '.prev' for path in self._store_paths)
+        if not os.path.exists(metadata_path) or not os.path.getsize(vectors_path):
+            return None
+        with open(metadata_path, encoding='utf-8') as f:
+            rows = {json.loads(line)['text_hash']: row for row, line in enumerate(f)}
+        vectors = np.memmap(vectors_path, dtype='float32', mode='r').reshape(-1, self.dimension)
+        return rows, vectors
+    
+    def _drop_previous_pass(self):
+        for path in self._store_paths:
+            if os.path.exists(path + '.prev'):
+                os.remove(path + '.prev')
+    
+    def _embed(self, texts: List[str], text_hashes: List[str],
+               previous: Optional[Tuple[Dict[str, int], np.ndarray]]) -> Tuple[np.ndarray, int]:
+        """Embeddings for a chunk and how many were encoded; unchanged texts reuse previous vectors"""
+        if previous is None:
+            return self.similarity._encode(texts), len(texts)
+        rows, vectors = previous
+        embeddings = np.empty((len(texts), self.dimension), dtype='float32')
+        stale = []
+        for position, text_hash in enumerate(text_hashes):
+            if text_hash in rows:
+                embeddings[position] = vectors[rows[text_hash]]
+            else:
+                stale.append(position)
+        if stale:
+            embeddings[stale] = self.similarity._encode([texts[position] for position in stale])
+        return embeddings, len(stale)
+    
+    def iter_chunks(self, after_id: int) -> Iterator[List[Dict]]:
+        """Yield products in id order, one chunk at a time (keyset paging)"""
+        duplicates_clause = (
+            "AND NOT EXISTS (SELECT 1 FROM product_signatures s "
+            "WHERE s.product_id = products.id AND s.canonical_id != products.id) "
+        ) if self.exclude_duplicates else ""
+        query = text(
+            f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM products "
+            f"WHERE id > :after_id {duplicates_clause}ORDER BY id LIMIT :limit"
+        )
+        while True:
+            with self.engine.connect() as connection:
+                rows = connection.execute(query, {'after_id': after_id, 'limit': self.chunk_size}).mappings().all()
+            if not rows:
+                return
+            chunk = []
+            for row in rows:
+                product = dict(row)
+                if isinstance(product.get('features'), str):
+                    try:
+                        product['features'] = json.loads(product['features'])
+                    except ValueError:
+                        product['features'] = None
+                if product.get('in_stock') is not None:
+                    product['in_stock'] = bool(product['in_stock'])
+                chunk.append(product)
+            after_id = chunk[-1]['id']
+            yield chunk
+    
+    def _prefetched(self, after_id: int) -> Iterator[List[Dict]]:
+        """Fetch the next chunk from the database while the current one is encoding"""
+        chunks = queue.Queue(maxsize=1)
+        done = object()
+        
+        def produce():
+            try:
+                for chunk in self.iter_chunks(after_id):
+                    chunks.put(chunk)
+            except Exception as e:
+                chunks.put(e)
+            chunks.put(done)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            item = chunks.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    
+    def run(self, resume: bool = True) -> Dict:
+        """Encode every product not yet written in this pass; returns run statistics"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        if not resume:
+            self._reset()
+        
+        checkpoint = self._read_checkpoint()
+        if checkpoint['completed']:
+            # Rows past last_id are not the only changes: re-read the whole catalog
+            checkpoint = self._start_new_pass()
+        self._truncate_to(checkpoint)
+        if checkpoint['rows']:
+            print(f"Resuming after product {checkpoint['last_id']} ({checkpoint['rows']} rows written)")
+        previous = self._previous_pass()
+        
+        pool = None
+        if self.workers > 1:
+            pool = self.similarity.model.start_multi_process_pool(['cpu'] * self.workers)
+            self.similarity.encode_pool = pool
+        
+        started = time.time()
+        written_rows = 0
+        encoded_rows = 0
+        try:
+            for chunk in self._prefetched(checkpoint['last_id']):
+                texts = [self.similarity.prepare_product_text(p) for p in chunk]
+                text_hashes = [self.similarity._text_hash(product_text) for product_text in texts]
+                embeddings, encoded = self._embed(texts, text_hashes, previous)
+                
+                metadata_lines = ''.join(
+                    json.dumps({
+                        **{field: product.get(field) for field in METADATA_FIELDS},
+                        'text_hash': text_hash
+                    }) + '\n'
+                    for product, text_hash in zip(chunk, text_hashes)
+                ).encode('utf-8')
+                
+                with open(self._vectors_path, 'ab') as f:
+                    f.write(np.ascontiguousarray(embeddings, dtype='float32').tobytes())
+                with open(self._ids_path, 'ab') as f:
+                    f.write(np.array([p['id'] for p in chunk], dtype='int64').tobytes())
+                with open(self._metadata_path, 'ab') as f:
+                    f.write(metadata_lines)
+                
+                checkpoint['last_id'] = chunk[-1]['id']
+                checkpoint['rows'] += len(chunk)
+                checkpoint['metadata_bytes'] += len(metadata_lines)
+                self._write_checkpoint(checkpoint)
+                
+                written_rows += len(chunk)
+                encoded_rows += encoded
+                rate = written_rows / max(time.time() - started, 1e-9)
+                print(f"Embedded {checkpoint['rows']} products (last id {checkpoint['last_id']}, {rate:.0f}/s)")
+        finally:
+            if pool is not None:
+                self.similarity.model.stop_multi_process_pool(pool)
+                self.similarity.encode_pool = None
+        
+        checkpoint['completed'] = True
+        self._write_checkpoint(checkpoint)
+        self._drop_previous_pass()
+        return {
+            'rows': checkpoint['rows'],
+            'encoded_this_run': encoded_rows,
+            'reused_this_run': written_rows - encoded_rows,
+            'seconds': round(time.time() - started, 2)
+        }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Stream products from the database into an embedding store")
+    parser.add_argument('database_url', help='SQLAlchemy database URL')
+    parser.add_argument('output_dir', help='Directory for vectors, ids, metadata and checkpoint')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help='SentenceTransformer model name')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='Products read from the database per chunk')
+    parser.add_argument('--batch-size', type=int, default=64, help='Texts per forward pass')
+    parser.add_argument('--workers', type=int, default=1, help='Encoding processes')
+    parser.add_argument('--cache-dir', default=None, help='Embedding cache directory')
+    parser.add_argument('--restart', action='store_true', help='Ignore any checkpoint and previous pass and start over')
+    parser.add_argument('--exclude-duplicates', action='store_true', help='Skip products marked as near-duplicates')
+    args = parser.parse_args(argv)
+    
+    pipeline = EmbeddingPipeline(
+        args.database_url,
+        args.output_dir,
+        model_name=args.model,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        embedding_cache_dir=args.cache_dir,
+        exclude_duplicates=args.exclude_duplicates
+    )
+    print(pipeline.run(resume=not args.restart))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import math
+import re
+from typing import Dict, Optional, Tuple
+
+# Word -> polarity weight, tuned for cosmetic/fashion/healthcare product reviews
+POSITIVE_WORDS = {
+    'love': 3.0, 'loved': 3.0, 'loves': 3.0, 'amazing': 3.0, 'excellent': 3.0, 'perfect': 3.0,
+    'awesome': 3.0, 'fantastic': 3.0, 'wonderful': 3.0, 'best': 2.5, 'beautiful': 2.5, 'great': 2.5,
+    'gorgeous': 2.5, 'favorite': 2.5, 'favourite': 2.5, 'recommend': 2.0, 'recommended': 2.0,
+    'happy': 2.0, 'pleased': 2.0, 'glad': 1.5, 'good': 2.0, 'nice': 1.5, 'soft': 1.0, 'smooth': 1.0,
+    'works': 1.0, 'worth': 1.5, 'comfortable': 1.5, 'lovely': 2.5, 'impressed': 2.0, 'fast': 1.0,
+    'effective': 1.5, 'gentle': 1.0, 'fresh': 1.0, 'flawless': 2.5, 'satisfied': 2.0, 'liked': 2.0, 'likes': 2.0,
+}
+NEGATIVE_WORDS = {
+    'terrible': -3.0, 'awful': -3.0, 'horrible': -3.0, 'worst': -3.0, 'hate': -3.0, 'hated': -3.0,
+    'disgusting': -3.0, 'useless': -2.5, 'waste': -2.5, 'garbage': -3.0, 'junk': -2.5, 'scam': -3.0,
+    'fake': -2.5, 'broke': -2.5, 'broken': -2.5, 'disappointed': -2.5, 'disappointing': -2.5,
+    'poor': -2.0, 'bad': -2.5, 'cheap': -1.5, 'rash': -2.0, 'burn': -2.0, 'burned': -2.0,
+    'itchy': -2.0, 'irritation': -2.0, 'sticky': -1.0, 'greasy': -1.0, 'smells': -0.5,
+    'refund': -2.0, 'return': -1.0, 'returned': -1.5, 'damaged': -2.0, 'leaked': -2.0,
+    'defective': -2.5, 'unhappy': -2.0, 'wrong': -1.5, 'overpriced': -2.0,
+}
+LEXICON = {**POSITIVE_WORDS, **NEGATIVE_WORDS}
+
+NEGATIONS = {'not', 'no', 'never', 'none', 'nor', 'neither', 'without', 'hardly', 'barely', 'nothing'}
+INTENSIFIERS = {
+    'very': 1.3, 'really': 1.3, 'so': 1.2, 'extremely': 1.5, 'absolutely': 1.5, 'totally': 1.3,
+    'super': 1.3, 'incredibly': 1.5, 'highly': 1.3, 'slightly': 0.6, 'somewhat': 0.7, 'kinda': 0.7,
+}
+
+# Tokens after a negation whose polarity is flipped (and damped, as in VADER)
+NEGATION_SCOPE = 3
+NEGATION_SCALAR = -0.74
+
+# Normalization constant: score = total / sqrt(total^2 + ALPHA)
+ALPHA = 15.0
+
+# Longer reviews mix aspects and are left to the model
+MAX_TOKENS = 64
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|!")
+
+class LexiconScorer:
+    """Negation-aware lexicon sentiment scorer
+    
+    Microsecond-scale replacement for the transformer on short, clear-cut
+    reviews. score() returns a -1 to 1 score and whether the review is
+    decisive: at least one lexicon hit, no mixed polarity and short enough
+    to trust a word list.
+    """
+    
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None, max_tokens: int = MAX_TOKENS):
+        self.lexicon = lexicon or LEXICON
+        self.max_tokens = max_tokens
+    
+    def score(self, text: str) -> Tuple[float, bool]:
+        tokens = _TOKEN.findall(text.lower())
+        total = 0.0
+        positive_hits = negative_hits = exclamations = 0
+        negated = 0
+        boost = 1.0
+        clause_weight = 1.0
+        
+        for token in tokens:
+            if token == '!':
+                exclamations += 1
+                continue
+            if token == 'but':
+                # The clause after "but" carries the reviewer's verdict
+                total *= 0.5
+                clause_weight = 1.5
+                negated = 0
+                continue
+            
+            weight = self.lexicon.get(token)
+            if weight is not None:
+                value = weight * boost * clause_weight
+                if negated:
+                    value *= NEGATION_SCALAR
+                total += value
+                if value > 0:
+                    positive_hits += 1
+                elif value < 0:
+                    negative_hits += 1
+            
+            if token in NEGATIONS or token.endswith("n't"):
+                negated = NEGATION_SCOPE
+                boost = 1.0
+                continue
+            boost = INTENSIFIERS.get(token, 1.0)
+            if negated and token not in INTENSIFIERS:
+                negated -= 1
+        
+        if total and exclamations:
+            total += math.copysign(min(exclamations, 4) * 0.3, total)
+        
+        score = total / math.sqrt(total * total + ALPHA) if total else 0.0
+        decisive = (
+            (positive_hits or negative_hits)
+            and not (positive_hits and negative_hits)
+            and len(tokens) <= self.max_tokens
+        )
+        return score, bool(decisive)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Model Registry
+Process-wide store of heavy models (SentenceTransformer, sentiment pipelines).
+Components register a loader when they are constructed and the model is
+loaded on first use, once per process, then shared by every caller. Call
+registry.warm_up() at startup to pay the load cost before serving traffic.
+
+Usage:
+    python model_registry.py                      # warm up the default models and report cost
+    python model_registry.py --sentiment-backend int8 --embedding-model all-MiniLM-L6-v2
+"""
+
+import argparse
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+def resident_memory_bytes() -> Optional[int]:
+    """Current resident set size of this process (None if it cannot be read)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+class ModelRegistry:
+    """Lazily loaded, shared model instances keyed by name
+    
+    Loads are serialized so each model's resident-memory delta is measured
+    in isolation (loading two models at once mostly contends for the same
+    CPU and disk anyway).
+    """
+    
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._load_lock = threading.RLock()
+    
+    def register(self, key: str, loader: Callable[[], Any]):
+        """Declare how to load `key`; the first registration wins and nothing is loaded yet"""
+        self._loaders.setdefault(key, loader)
+    
+    def get(self, key: str, loader: Optional[Callable[[], Any]] = None) -> Any:
+        """The shared instance for `key`, loading it on first use"""
+        instance = self._instances.get(key)
+        if instance is not None:
+            return instance
+        if loader is not None:
+            self.register(key, loader)
+        
+        with self._load_lock:
+            if key in self._instances:
+                return self._instances[key]
+            if key not in self._loaders:
+                raise KeyError(f"No loader registered for model {key!r}")
+            
+            rss_before = resident_memory_bytes()
+            started = time.perf_counter()
+            instance = self._loaders[key]()
+            load_seconds = time.perf_counter() - started
+            rss_after = resident_memory_bytes()
+            
+            self._instances[key] = instance
+            self._stats[key] = {
+                'load_seconds': round(load_seconds, 3),
+                'rss_delta_mb': (
+                    round((rss_after - rss_before) / 2 ** 20, 1)
+                    if rss_before is not None and rss_after is not None else None
+                ),
+                'loaded_at': time.time()
+            }
+            print(f"Loaded model {key} in {load_seconds:.2f}s")
+            return instance
+    
+    def is_loaded(self, key: str) -> bool:
+        return key in self._instances
+    
+    def warm_up(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Load the given (default: all registered) models now; returns stats()"""
+        for key in list(keys) if keys is not None else list(self._loaders):
+            self.get(key)
+        return self.stats()
+    
+    def unload(self, key: str):
+        """Drop the shared instance; the next get() loads it again"""
+        with self._load_lock:
+            self._instances.pop(key, None)
+            self._stats.pop(key, None)
+    
+    def stats(self) -> Dict[str, Dict]:
+        """Per-model load time and resident-memory growth, plus the process total"""
+        rss = resident_memory_bytes()
+        models = {
+            key: {'loaded': key in self._instances, **self._stats.get(key, {})}
+            for key in self._loaders
+        }
+        return {
+            'models': models,
+            'process_rss_mb': round(rss / 2 ** 20, 1) if rss is not None else None
+        }
+
+# The process-wide registry
+registry = ModelRegistry()
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm up models and report their load cost")
+    parser.add_argument('--sentiment-model', default='cardiffnlp/twitter-roberta-base-sentiment-latest')
+    parser.add_argument('--sentiment-backend', default='pytorch')
+    parser.add_argument('--embedding-model', default='all-MiniLM-L6-v2')
+    args = parser.parse_args()
+    
+    # Components register with the importable module's registry, not __main__'s
+    import model_registry
+    from sentiment_model import SentimentAnalyzer
+    from similarity_model import ProductSimilarityModel
+    SentimentAnalyzer(args.sentiment_model, backend=args.sentiment_backend)
+    ProductSimilarityModel(args.embedding_model)
+    
+    stats = model_registry.registry.warm_up()
+    print()
+    for key, model_stats in stats['models'].items():
+        print(f"{key}: {model_stats['load_seconds']:.2f}s, +{model_stats['rss_delta_mb']} MB resident")
+    print(f"Process resident memory: {stats['process_rss_mb']} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Model Server
+One local process owns the SentenceTransformer, the sentiment pipeline and
+the FAISS index, and serves embed, similar-product and sentiment requests
+to every API worker over a Unix socket, so model memory does not grow with
+the number of workers. Concurrent embed and sentiment requests from all
+clients are micro-batched into shared forward passes.
+
+Workers use RemoteSimilarityModel and RemoteSentimentAnalyzer, which keep
+the ProductSimilarityModel / SentimentAnalyzer method signatures.
+
+Messages are length-prefixed pickles, so the socket is created owner-only
+(0600); only run clients as the same user as the server.
+
+Usage:
+    python model_server.py --socket /tmp/ai-search-models.sock --model-path models/similarity_model
+    python model_server.py --sentiment-backend int8 --max-batch-size 64 --max-wait-ms 5
+    python model_server.py --database-url sqlite:///../backend/ai_search.db --query-cache-path models/query_cache.npz
+"""
+
+import argparse
+import asyncio
+import os
+import pickle
+import signal
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from micro_batcher import MicroBatcher
+from model_registry import registry
+from query_cache import frequent_search_queries
+from sentiment_model import SentimentAnalyzer
+from similarity_model import ProductSimilarityModel, saved_model_exists
+
+DEFAULT_SOCKET_PATH = '/tmp/ai-search-models.sock'
+
+_HEADER = struct.Struct('!I')
+
+def _encode_message(message: Any) -> bytes:
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload)) + payload
+
+class ModelServer:
+    """Serves one similarity model and one sentiment analyzer to many clients"""
+    
+    def __init__(self, similarity: Optional[ProductSimilarityModel], sentiment: Optional[SentimentAnalyzer],
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.similarity = similarity
+        self.sentiment = sentiment
+        # One model call at a time; torch and FAISS already use every core per call
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix='model')
+        self.query_batcher = MicroBatcher(self._encode_queries, max_batch_size, max_wait_ms, self.executor)
+        self.embed_batcher = MicroBatcher(self._encode_texts, max_batch_size, max_wait_ms, self.executor)
+        self.sentiment_batcher = MicroBatcher(self._analyze_texts, max_batch_size, max_wait_ms, self.executor)
+        self.requests = 0
+        self._clients = set()
+    
+    def _encode_queries(self, queries: List[str]) -> List[np.ndarray]:
+        return list(self.similarity._encode_queries(queries))
+    
+    def _encode_texts(self, texts: List[str]) -> List[np.ndarray]:
+        return list(self.similarity._encode(texts, cache_write=False))
+    
+    def _analyze_texts(self, texts: List[str]) -> List[Dict]:
+        return self.sentiment.analyze_batch(texts)
+    
+    async def _run(self, function, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, lambda: function(*args, **kwargs))
+    
+    async def handle(self, request: Dict) -> Any:
+        op = request.get('op')
+        if op in ('embed', 'similar_text', 'similar_products') and self.similarity is None:
+            raise ValueError("This server has no similarity model")
+        if op == 'sentiment' and self.sentiment is None:
+            raise ValueError("This server has no sentiment model")
+        
+        if op == 'embed':
+            if not request['texts']:
+                return np.empty((0, self.similarity.model.get_sentence_embedding_dimension()), dtype='float32')
+            return np.vstack(await self.embed_batcher.submit_many(request['texts']))
+        if op == 'similar_text':
+            query_embedding = await self.query_batcher.submit(request['query_text'])
+            return await self._run(
+                self.similarity.find_similar_by_embedding, query_embedding[None, :], request['k'], **request['filters']
+            )
+        if op == 'similar_products':
+            return await self._run(
+                self.similarity.find_similar_products, request['target_product'], request['k'], **request['filters']
+            )
+        if op == 'sentiment':
+            return await self.sentiment_batcher.submit_many(request['texts'])
+        if op == 'stats':
+            return self.stats()
+        raise ValueError(f"Unknown operation: {op}")
+    
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                request = pickle.loads(await reader.readexactly(_HEADER.unpack(header)[0]))
+                self.requests += 1
+                try:
+                    response = {'ok': True, 'result': await self.handle(request)}
+                except Exception as e:
+                    response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                writer.write(_encode_message(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+    
+    def stats(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'query_cache': self.similarity.query_cache.stats() if self.similarity is not None else None,
+            'query_batches': self.query_batcher.stats(),
+            'embed_batches': self.embed_batcher.stats(),
+            'sentiment_batches': self.sentiment_batcher.stats(),
+            **registry.stats()
+        }
+    
+    async def serve(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        # Owner-only from the moment the socket exists
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self.serve_client, path=socket_path)
+        finally:
+            os.umask(old_umask)
+        print(f"Model server listening on {socket_path}")
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+                # Idle keep-alive connections would otherwise hold the shutdown open
+                for writer in list(self._clients):
+                    writer.close()
+        finally:
+            for batcher in (self.query_batcher, self.embed_batcher, self.sentiment_batcher):
+                await batcher.close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+class ModelServerClient:
+    """Blocking client; each thread keeps its own connection to the server"""
+    
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+    
+    def _connection(self) -> socket.socket:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            connection.connect(self.socket_path)
+            self._local.connection = connection
+        return connection
+    
+    def _reset(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+        self._local.connection = None
+    
+    def _receive(self, connection: socket.socket, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = connection.recv(min(size, 1 << 20))
+            if not chunk:
+                raise ConnectionError("Model server closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+    
+    def request(self, op: str, **payload) -> Any:
+        message = _encode_message({'op': op, **payload})
+        # One retry on a fresh connection (e.g. after a server restart)
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.sendall(message)
+                size = _HEADER.unpack(self._receive(connection, _HEADER.size))[0]
+                response = pickle.loads(self._receive(connection, size))
+                break
+            except (ConnectionError, socket.timeout, FileNotFoundError):
+                self._reset()
+                if attempt:
+                    raise
+        if not response['ok']:
+            raise RuntimeError(f"Model server error: {response['error']}")
+        return response['result']
+    
+    def stats(self) -> Dict:
+        return self.request('stats')
+
+class RemoteSimilarityModel:
+    """ProductSimilarityModel query interface backed by the model server"""
+    
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, client: Optional[ModelServerClient] = None):
+        self.client = client or ModelServerClient(socket_path)
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized embeddings of product/query texts"""
+        return self.client.request('embed', texts=list(texts))
+    
+    def find_similar_products(self, target_product: Dict, k: int = 10, category: Optional[str] = None,
+                              min_price: Optional[float] = None, max_price: Optional[float] = None,
+                              in_stock_only: bool = False) -> List[Tuple[Dict, float]]:
+        filters = {'category': category, 'min_price': min_price, 'max_price': max_price, 'in_stock_only': in_stock_only}
+        return self.client.request('similar_products', target_product=target_product, k=k, filters=filters)
+    
+    def find_similar_by_text(self, query_text: str, k: int = 10, category: Optional[str] = None,
+                             min_price: Optional[float] = None, max_price: Optional[float] = None,
+                             in_stock_only: bool = False) -> List[Tuple[Dict, float]]:
+        filters = {'category': category, 'min_price': min_price, 'max_price': max_price, 'in_stock_only': in_stock_only}
+        return self.client.request('similar_text', query_text=query_text, k=k, filters=filters)
+
+class RemoteSentimentAnalyzer(SentimentAnalyzer):
+    """SentimentAnalyzer whose model runs in the model server
+    
+    Stored scores, summaries and ReviewAnalyzer work unchanged; only the
+    model calls go over the socket. No model is loaded in this process.
+    """
+    
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, client: Optional[ModelServerClient] = None,
+                 batch_size: int = 32):
+        self.client = client or ModelServerClient(socket_path)
+        super().__init__('remote', batch_size=batch_size, backend='remote')
+    
+    def _register_pipeline(self):
+        # The server owns the pipeline; nothing is registered in this process
+        self.registry_key = None
+    
+    @property
+    def sentiment_pipeline(self):
+        raise RuntimeError("RemoteSentimentAnalyzer has no local pipeline")
+    
+    def load(self):
+        return None
+    
+    def analyze_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict]:
+        return self.client.request('sentiment', texts=list(texts))
+    
+    def _model_sentiment(self, text: str) -> Dict:
+        return self.analyze_batch([text])[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve embedding, similarity and sentiment models over a Unix socket")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help='Unix socket path')
+    parser.add_argument('--model-path', default='models/similarity_model', help='Saved similarity model snapshot')
+    parser.add_argument('--embedding-model', default='all-MiniLM-L6-v2', help='SentenceTransformer model name')
+    parser.add_argument('--sentiment-model', default='cardiffnlp/twitter-roberta-base-sentiment-latest')
+    parser.add_argument('--sentiment-backend', default='pytorch', help='pytorch, int8, onnx or onnx-int8')
+    parser.add_argument('--no-sentiment', action='store_true', help='Do not serve sentiment')
+    parser.add_argument('--max-batch-size', type=int, default=64, help='Largest micro-batch')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help='Longest wait for a micro-batch to fill')
+    parser.add_argument('--query-cache-size', type=int, default=1024, help='Query embeddings kept in memory')
+    parser.add_argument('--query-cache-path', default='models/query_cache.npz',
+                        help='Query cache file, loaded at start-up and saved on shutdown')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help='Database whose search_queries log prewarms the query cache (default: $DATABASE_URL)')
+    args = parser.parse_args()
+    
+    similarity = ProductSimilarityModel(args.embedding_model, query_cache_size=args.query_cache_size,
+                                        query_cache_path=args.query_cache_path or None)
+    if saved_model_exists(args.model_path):
+        # Read-only memory-mapped snapshot: the index is shared with the page cache
+        similarity.load_model(args.model_path, read_only=True)
+    else:
+        print(f"No similarity model at {args.model_path}; serving embeddings only")
+    sentiment = None if args.no_sentiment else SentimentAnalyzer(args.sentiment_model, backend=args.sentiment_backend)
+    
+    # Load everything before accepting connections
+    registry.warm_up()
+    if args.database_url:
+        try:
+            queries = frequent_search_queries(args.database_url, args.query_cache_size)
+            print(f"Query cache prewarmed: {similarity.prewarm_query_cache(queries)} queries")
+        except Exception as e:
+            print(f"Query cache prewarm skipped: {e}")
+    
+    server = ModelServer(similarity, sentiment, args.max_batch_size, args.max_wait_ms)
+    try:
+        asyncio.run(server.serve(args.socket))
+    finally:
+        # Keep this run's warm queries for the next start
+        similarity.query_cache.save()
+    print("Model server stopped")
+
+if __name__ == "__main__":
+    main()
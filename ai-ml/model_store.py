@@ -0,0 +1,273 @@
+import numpy as np
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+
+FORMAT_VERSION = 1
+
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+METADATA_DIR = 'metadata'
+
+class ColumnarMapping(MutableMapping):
+    """Read-mostly product id -> value mapping over memory-mapped columns
+    
+    Lookups binary-search the sorted id column and build the value on demand,
+    so a loaded model holds no per-product Python objects. Writes go to an
+    in-memory overlay and deletions to a tombstone set until the next save.
+    """
+    
+    def __init__(self, ids: np.ndarray, read: Callable[[int], object], present: Optional[np.ndarray] = None):
+        self._ids = ids
+        self._read = read
+        self._present = present
+        self._overlay: Dict[int, object] = {}
+        self._removed = set()
+    
+    def _position(self, key: int) -> Optional[int]:
+        position = int(np.searchsorted(self._ids, key))
+        if position < len(self._ids) and self._ids[position] == key:
+            if self._present is None or self._present[position]:
+                return position
+        return None
+    
+    def _in_base(self, key) -> bool:
+        return self._position(int(key)) is not None and int(key) not in self._removed
+    
+    def __getitem__(self, key):
+        if key in self._overlay:
+            return self._overlay[key]
+        position = self._position(int(key))
+        if position is None or int(key) in self._removed:
+            raise KeyError(key)
+        return self._read(position)
+    
+    def __setitem__(self, key, value):
+        self._overlay[int(key)] = value
+    
+    def __delitem__(self, key):
+        found = self._overlay.pop(int(key), None) is not None
+        if self._in_base(key):
+            self._removed.add(int(key))
+            found = True
+        if not found:
+            raise KeyError(key)
+    
+    def __contains__(self, key) -> bool:
+        return key in self._overlay or self._in_base(key)
+    
+    def __iter__(self) -> Iterator[int]:
+        for position, key in enumerate(self._ids.tolist()):
+            if self._present is not None and not self._present[position]:
+                continue
+            if key not in self._removed and key not in self._overlay:
+                yield key
+        yield from list(self._overlay)
+    
+    def __len__(self) -> int:
+        base = len(self._ids) if self._present is None else int(np.count_nonzero(self._present))
+        return base - len(self._removed) + sum(1 for key in self._overlay if not self._in_base(key))
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def new_version_dir(root: str) -> str:
+    """Create an empty directory for the next snapshot under `root`"""
+    version = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    path = os.path.join(root, version)
+    os.makedirs(os.path.join(path, METADATA_DIR))
+    return path
+
+def write_array(version_dir: str, name: str, array: np.ndarray, dtype: Optional[str] = None,
+                chunk_rows: int = 100_000):
+    """Write an array as .npy, converting to `dtype` in slices so memory-mapped input is never copied whole"""
+    out = np.lib.format.open_memmap(
+        os.path.join(version_dir, f'{name}.npy'), mode='w+', dtype=dtype or array.dtype, shape=array.shape
+    )
+    for start in range(0, len(array), chunk_rows):
+        out[start:start + chunk_rows] = array[start:start + chunk_rows]
+    out.flush()
+    del out
+
+def read_array(version_dir: str, name: str, mmap_mode: Optional[str] = 'r') -> np.ndarray:
+    return np.load(os.path.join(version_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+
+def write_metadata(version_dir: str, metadata: MutableMapping, hashes: MutableMapping,
+                   string_fields: Iterable[str], number_fields: Iterable[str], bool_fields: Iterable[str] = ()):
+    """Write product metadata and text hashes as columns sorted by product id
+    
+    Strings are stored as one UTF-8 blob per field plus row offsets, numbers
+    as float64 with NaN for missing values, booleans as int8 with -1 for
+    missing values, and text hashes as raw sha1 digests.
+    """
+    directory = os.path.join(version_dir, METADATA_DIR)
+    ids = np.array(sorted(set(metadata) | set(hashes)), dtype='int64')
+    rows = [metadata.get(product_id) or {} for product_id in ids.tolist()]
+    np.save(os.path.join(directory, 'ids.npy'), ids)
+    np.save(os.path.join(directory, 'has_metadata.npy'),
+            np.array([product_id in metadata for product_id in ids.tolist()], dtype=bool))
+    
+    for field in string_fields:
+        values = [row.get(field) for row in rows]
+        encoded = [(value if isinstance(value, str) else str(value)).encode('utf-8') if value is not None else b''
+                   for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype='int64')
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        with open(os.path.join(directory, f'{field}.bin'), 'wb') as f:
+            f.write(b''.join(encoded))
+        np.save(os.path.join(directory, f'{field}.offsets.npy'), offsets)
+        np.save(os.path.join(directory, f'{field}.null.npy'), np.array([v is None for v in values], dtype=bool))
+    
+    for field in number_fields:
+        np.save(os.path.join(directory, f'{field}.npy'),
+                np.array([row.get(field) if row.get(field) is not None else np.nan for row in rows], dtype='float64'))
+    
+    for field in bool_fields:
+        np.save(os.path.join(directory, f'{field}.npy'),
+                np.array([int(bool(row[field])) if row.get(field) is not None else -1 for row in rows], dtype='int8'))
+    
+    # uint8 rows rather than an 'S20' column, which would drop trailing zero bytes
+    digests = np.zeros((len(ids), 20), dtype='uint8')
+    has_hash = np.zeros(len(ids), dtype=bool)
+    for position, product_id in enumerate(ids.tolist()):
+        text_hash = hashes.get(product_id)
+        if text_hash:
+            digests[position] = np.frombuffer(bytes.fromhex(text_hash), dtype='uint8')
+            has_hash[position] = True
+    np.save(os.path.join(directory, 'text_hash.npy'), digests)
+    np.save(os.path.join(directory, 'has_text_hash.npy'), has_hash)
+
+def read_metadata(version_dir: str, string_fields: Iterable[str], number_fields: Iterable[str],
+                  bool_fields: Iterable[str] = ()) -> Tuple[ColumnarMapping, ColumnarMapping]:
+    """Memory-map the metadata columns; returns (metadata, text hashes) mappings"""
+    directory = os.path.join(version_dir, METADATA_DIR)
+    load = lambda name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+    ids = load('ids')
+    
+    strings = {}
+    for field in string_fields:
+        path = os.path.join(directory, f'{field}.bin')
+        blob = np.memmap(path, dtype='uint8', mode='r') if os.path.getsize(path) else np.zeros(0, dtype='uint8')
+        strings[field] = (blob, load(f'{field}.offsets'), load(f'{field}.null'))
+    numbers = {field: load(field) for field in number_fields}
+    # Snapshots written before a boolean field existed read it as missing
+    bools = {field: load(field) for field in bool_fields if os.path.exists(os.path.join(directory, f'{field}.npy'))}
+    
+    def read_row(position: int) -> Dict:
+        row = {'id': int(ids[position])}
+        for field, (blob, offsets, null) in strings.items():
+            row[field] = None if null[position] else bytes(blob[offsets[position]:offsets[position + 1]]).decode('utf-8')
+        for field, column in numbers.items():
+            value = float(column[position])
+            row[field] = None if np.isnan(value) else value
+        for field in bool_fields:
+            value = int(bools[field][position]) if field in bools else -1
+            row[field] = None if value < 0 else bool(value)
+        return row
+    
+    digests = load('text_hash')
+    metadata = ColumnarMapping(ids, read_row, load('has_metadata'))
+    hashes = ColumnarMapping(ids, lambda position: digests[position].tobytes().hex(), load('has_text_hash'))
+    return metadata, hashes
+
+def read_metadata_columns(version_dir: str, string_fields: Iterable[str], number_fields: Iterable[str],
+                          bool_fields: Iterable[str] = ()) -> Tuple[np.ndarray, Dict]:
+    """Whole metadata columns as arrays aligned with the sorted id column, without per-row decoding
+    
+    Returns (ids, columns). Numbers are float64 with NaN for missing values,
+    booleans int8 with -1, and strings (codes, values) with int32 codes into
+    the list of distinct values, -1 for missing. Rows without metadata read
+    as missing.
+    """
+    directory = os.path.join(version_dir, METADATA_DIR)
+    load = lambda name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+    ids = load('ids')
+    missing = ~load('has_metadata')
+    
+    columns = {}
+    for field in string_fields:
+        blob = np.fromfile(os.path.join(directory, f'{field}.bin'), dtype='uint8')
+        offsets = load(f'{field}.offsets')
+        lengths = np.diff(offsets)
+        width = max(int(lengths.max()) if len(lengths) else 0, 1)
+        # Pad each value to a fixed width so np.unique can dictionary-encode the column
+        padded = np.zeros((len(lengths), width), dtype='uint8')
+        inside = np.arange(width) < lengths[:, None]
+        padded[inside] = blob[(offsets[:-1, None] + np.arange(width))[inside]]
+        values, codes = np.unique(padded.view(f'S{width}').ravel(), return_inverse=True)
+        codes = codes.astype('int32')
+        codes[load(f'{field}.null') | missing] = -1
+        columns[field] = (codes, [value.decode('utf-8') for value in values])
+    for field in number_fields:
+        columns[field] = np.where(missing, np.nan, load(field))
+    for field in bool_fields:
+        path = os.path.join(directory, f'{field}.npy')
+        # Snapshots written before a boolean field existed read it as missing
+        column = np.array(load(field), dtype='int8') if os.path.exists(path) else np.full(len(ids), -1, dtype='int8')
+        column[missing] = -1
+        columns[field] = column
+    return ids, columns
+
+def commit_version(root: str, version_dir: str, manifest: Dict, keep: int = 2):
+    """Checksum the snapshot, write its manifest and make it current
+    
+    Readers follow the CURRENT pointer, which is replaced atomically, so a
+    half-written snapshot is never visible. Older snapshots beyond `keep` are
+    deleted; processes that still map their files keep reading them until they reload.
+    """
+    files = {}
+    for directory, _, names in os.walk(version_dir):
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            files[os.path.relpath(path, version_dir)] = {
+                'bytes': os.path.getsize(path),
+                'sha256': _file_sha256(path)
+            }
+    manifest = {**manifest, 'format_version': FORMAT_VERSION,
+                'created_at': datetime.utcnow().isoformat(), 'files': files}
+    with open(os.path.join(version_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    tmp_path = os.path.join(root, CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(os.path.basename(version_dir))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+    
+    versions = sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+    for name in versions[:-keep]:
+        if name != os.path.basename(version_dir):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+def has_version(root: str) -> bool:
+    return os.path.exists(os.path.join(root, CURRENT_FILE))
+
+def open_version(root: str, verify: bool = False) -> Tuple[str, Dict]:
+    """Locate the current snapshot; returns (directory, manifest)
+    
+    File sizes are always checked against the manifest. With verify=True the
+    sha256 checksums are too, which reads every file.
+    """
+    with open(os.path.join(root, CURRENT_FILE)) as f:
+        version_dir = os.path.join(root, f.read().strip())
+    with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model format {manifest.get('format_version')} in {version_dir}")
+    
+    for name, expected in manifest['files'].items():
+        path = os.path.join(version_dir, name)
+        if not os.path.exists(path) or os.path.getsize(path) != expected['bytes']:
+            raise ValueError(f"Model file {path} is missing or truncated")
+        if verify and _file_sha256(path) != expected['sha256']:
+            raise ValueError(f"Checksum mismatch for {path}")
+    return version_dir, manifest
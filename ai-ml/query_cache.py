@@ -0,0 +1,113 @@
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import os
+import re
+import threading
+import unicodedata
+
+from sqlalchemy import create_engine, text
+
+def normalize_query(query_text: str, lowercase: bool = False) -> str:
+    """Canonical form of a search query: NFKC, single-spaced
+    
+    Lowercase only for uncased models, where it does not change the embedding.
+    """
+    query_text = re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', query_text)).strip()
+    return query_text.lower() if lowercase else query_text
+
+class QueryEmbeddingCache:
+    """In-memory LRU of normalized query text -> L2-normalized embedding
+    
+    With `path` set, entries are loaded at start-up and written back by
+    save(), so a restarted process keeps its warm queries. Safe to share
+    between threads. Set `lowercase` only for uncased models.
+    """
+    
+    def __init__(self, model_name: str, max_size: int = 1024, path: Optional[str] = None,
+                 lowercase: bool = False):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.path = path
+        self.lowercase = lowercase
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self._load()
+    
+    def _load(self):
+        with np.load(self.path) as data:
+            if str(data['model_name']) != self.model_name:
+                print(f"Ignoring query cache {self.path} built with {data['model_name']}")
+                return
+            # Caches saved before the flag existed always lowercased
+            lowercase = bool(data['lowercase']) if 'lowercase' in data else True
+            if lowercase != self.lowercase:
+                print(f"Ignoring query cache {self.path} built with different query normalization")
+                return
+            # Least recently used first, so the most recent entries survive a smaller max_size
+            for query_text, vector in zip(data['queries'].tolist(), data['vectors']):
+                self._put(query_text, vector)
+    
+    def save(self):
+        """Write the cache to `path` (atomically replaces the previous file)"""
+        if not self.path:
+            return
+        with self._lock:
+            queries = list(self._entries)
+            vectors = np.array(list(self._entries.values()), dtype='float32')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp.npz'
+        np.savez(tmp_path, model_name=np.array(self.model_name), lowercase=np.array(self.lowercase),
+                 queries=np.array(queries, dtype=str), vectors=vectors)
+        os.replace(tmp_path, self.path)
+    
+    def _put(self, key: str, vector: np.ndarray):
+        self._entries[key] = np.asarray(vector, dtype='float32')
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def get_or_encode(self, queries: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Embeddings for `queries`; only normalized texts not in the cache are encoded"""
+        keys = [normalize_query(query, self.lowercase) for query in queries]
+        result = [None] * len(keys)
+        with self._lock:
+            for position, key in enumerate(keys):
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    result[position] = self._entries[key]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        
+        missing = list(dict.fromkeys(key for key, vector in zip(keys, result) if vector is None))
+        if missing:
+            encoded = dict(zip(missing, np.asarray(encode(missing), dtype='float32')))
+            with self._lock:
+                for key, vector in encoded.items():
+                    self._put(key, vector)
+            result = [vector if vector is not None else encoded[key] for key, vector in zip(keys, result)]
+        return np.vstack(result) if result else np.empty((0, 0), dtype='float32')
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'size': len(self._entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def frequent_search_queries(database_url: str, limit: int = 500) -> List[str]:
+    """Most frequent query texts from the search_queries log, most frequent first"""
+    engine = create_engine(database_url)
+    query = text(
+        "SELECT MIN(query_text) AS query_text, COUNT(*) AS uses FROM search_queries "
+        "GROUP BY LOWER(TRIM(query_text)) ORDER BY uses DESC LIMIT :limit"
+    )
+    try:
+        with engine.connect() as connection:
+            return [row.query_text for row in connection.execute(query, {'limit': limit})]
+    finally:
+        engine.dispose()
@@ -1,32 +1,199 @@
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
-from typing import List, Dict
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+import os
+import tempfile
+from typing import Any, List, Dict, Iterable, Iterator, Optional, Tuple
+import random
+
+from lexicon_sentiment import LexiconScorer
+from micro_batcher import MicroBatcher
+from model_registry import registry
+
+# Reviews scored per model call when summarizing; bounds memory for large review sets
+REVIEW_CHUNK_SIZE = 256
+
+# Common positive/negative words in cosmetic/fashion/healthcare reviews
+POSITIVE_THEMES = ['love', 'great', 'amazing', 'perfect', 'recommend', 'excellent', 'beautiful']
+NEGATIVE_THEMES = ['terrible', 'awful', 'waste', 'disappointed', 'broke', 'cheap', 'horrible']
+
+def _review_text(review: Dict) -> str:
+    return review.get('review_text', '') or review.get('text', '') or ''
+
+def _bucket(normalized_score: float) -> str:
+    if normalized_score > 0.1:
+        return 'positive'
+    if normalized_score < -0.1:
+        return 'negative'
+    return 'neutral'
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    """Consecutive lists of up to `size` items from any iterable"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class SentimentTally:
+    """Running sentiment average and distribution, without keeping the scores"""
+    
+    def __init__(self):
+        self.reviews_seen = 0
+        # Reviews with text but no stored score yet (not counted in the average)
+        self.unscored = 0
+        self.count = 0
+        self.total = 0.0
+        self.distribution = {'positive': 0, 'neutral': 0, 'negative': 0}
+    
+    def add(self, normalized_score: float):
+        self.count += 1
+        self.total += normalized_score
+        self.distribution[_bucket(normalized_score)] += 1
+    
+    def summary(self) -> Dict:
+        if not self.reviews_seen:
+            return {
+                'average_sentiment': 0.0,
+                'sentiment_distribution': {'positive': 0, 'neutral': 0, 'negative': 0},
+                'total_reviews': 0,
+                'unscored_reviews': 0
+            }
+        
+        return {
+            'average_sentiment': self.total / self.count if self.count else 0.0,
+            'sentiment_distribution': dict(self.distribution),
+            'total_reviews': self.count,
+            'unscored_reviews': self.unscored,
+            'sentiment_breakdown': {
+                'positive_percentage': self.distribution['positive'] / self.count * 100 if self.count else 0,
+                'neutral_percentage': self.distribution['neutral'] / self.count * 100 if self.count else 0,
+                'negative_percentage': self.distribution['negative'] / self.count * 100 if self.count else 0
+            }
+        }
+
+# Inference backends; the reference is 'pytorch', the others trade some agreement for CPU speed
+SENTIMENT_BACKENDS = ('pytorch', 'int8', 'onnx', 'onnx-int8')
+
+def load_sentiment_pipeline(model_name: str, backend: str = 'pytorch', onnx_dir: Optional[str] = None) -> Tuple[Any, str]:
+    """Load the pre-trained sentiment model; returns the pipeline and the backend actually used"""
+    from transformers import pipeline
+    import torch
+    
+    try:
+        if backend.startswith('onnx'):
+            sentiment_pipeline = _load_onnx_pipeline(model_name, backend, onnx_dir)
+        else:
+            sentiment_pipeline = pipeline(
+                "sentiment-analysis",
+                model=model_name,
+                tokenizer=model_name,
+                device=0 if torch.cuda.is_available() and backend == 'pytorch' else -1
+            )
+            if backend == 'int8':
+                # int8 weights for Linear layers, activations quantized on the fly (CPU only)
+                sentiment_pipeline.model = torch.quantization.quantize_dynamic(
+                    sentiment_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+        print(f"Loaded sentiment model: {model_name} ({backend})")
+        return sentiment_pipeline, backend
+    except ImportError as e:
+        print(f"Sentiment backend {backend} unavailable ({e}); using pytorch")
+        return load_sentiment_pipeline(model_name, 'pytorch')
+    except Exception as e:
+        print(f"Error loading model {model_name}: {e}")
+        # Fallback to basic model
+        return pipeline("sentiment-analysis"), 'pytorch'
+
+def _load_onnx_pipeline(model_name: str, backend: str, onnx_dir: Optional[str]):
+    """Text-classification pipeline over an exported (optionally quantized) ONNX graph"""
+    from transformers import pipeline, AutoTokenizer
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    
+    model_dir = os.path.join(onnx_dir, backend) if onnx_dir else None
+    file_name = 'model_quantized.onnx' if backend == 'onnx-int8' else 'model.onnx'
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if model_dir and os.path.exists(os.path.join(model_dir, file_name)):
+        model = ORTModelForSequenceClassification.from_pretrained(model_dir, file_name=file_name)
+    else:
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        if model_dir or backend == 'onnx-int8':
+            export_dir = model_dir or tempfile.mkdtemp(prefix='sentiment-onnx-')
+            model.save_pretrained(export_dir)
+        if backend == 'onnx-int8':
+            ORTQuantizer.from_pretrained(export_dir).quantize(
+                save_dir=export_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            )
+            model = ORTModelForSequenceClassification.from_pretrained(export_dir, file_name=file_name)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
 
 class SentimentAnalyzer:
-    def __init__(self, model_name: str = 'cardiffnlp/twitter-roberta-base-sentiment-latest'):
-        """Initialize sentiment analyzer with pre-trained model"""
+    def __init__(self, model_name: str = 'cardiffnlp/twitter-roberta-base-sentiment-latest', batch_size: int = 32,
+                 backend: str = 'pytorch', onnx_dir: Optional[str] = None, tiered: bool = False,
+                 uncertainty_band: float = 0.5, audit_rate: float = 0.0):
+        """Initialize sentiment analyzer with pre-trained model
+        
+        backend: 'pytorch' (full precision), 'int8' (dynamically quantized
+        Linear layers), 'onnx' (exported graph on ONNX Runtime) or 'onnx-int8'
+        (quantized ONNX graph). The ONNX backends need `optimum[onnxruntime]`;
+        exported graphs are cached in `onnx_dir` when given.
+        
+        tiered: decisive reviews whose lexicon score is at least
+        `uncertainty_band` in magnitude are scored by LexiconScorer; only the
+        rest reach the model. `audit_rate` of lexicon-scored reviews are also
+        run through the model to measure agreement (see tier_stats()).
+        """
         self.model_name = model_name
-        self.sentiment_pipeline = None
-        self._load_model()
+        self.batch_size = batch_size
+        self.backend = backend
+        self.onnx_dir = onnx_dir
+        self.lexicon = LexiconScorer() if tiered else None
+        self.uncertainty_band = uncertainty_band
+        self.audit_rate = audit_rate
+        self.tier_counts = {'lexicon': 0, 'model': 0, 'audited': 0, 'audit_agreed': 0, 'leaning': 0, 'leaning_agreed': 0}
+        # Concurrent analyze_sentiment_async calls share batches (tune before first use)
+        self.micro_batch_size = 64
+        self.micro_batch_wait_ms = 5.0
+        self._micro_batcher: Optional[MicroBatcher] = None
+        self._register_pipeline()
     
-    def _load_model(self):
-        """Load the pre-trained sentiment model"""
-        try:
-            self.sentiment_pipeline = pipeline(
-                "sentiment-analysis",
-                model=self.model_name,
-                tokenizer=self.model_name,
-                device=0 if torch.cuda.is_available() else -1
+    def _register_pipeline(self):
+        """Register the local pipeline; it is loaded on first use and shared by analyzers with the same model and backend"""
+        if self.backend not in SENTIMENT_BACKENDS:
+            raise ValueError(f"Unknown sentiment backend {self.backend!r}; expected one of {SENTIMENT_BACKENDS}")
+        self.registry_key = f"sentiment:{self.model_name}:{self.backend}"
+        registry.register(self.registry_key, partial(load_sentiment_pipeline, self.model_name, self.backend, self.onnx_dir))
+    
+    @property
+    def sentiment_pipeline(self):
+        pipe, self.backend = registry.get(self.registry_key)
+        return pipe
+    
+    def load(self):
+        """Load the model now rather than on the first analysis (see ModelRegistry.warm_up)"""
+        return self.sentiment_pipeline
+    
+    async def analyze_sentiment_async(self, text: str) -> Dict:
+        """analyze_sentiment for async callers; concurrent calls are micro-batched through analyze_batch"""
+        if self._micro_batcher is None:
+            self._micro_batcher = MicroBatcher(
+                self.analyze_batch,
+                self.micro_batch_size,
+                self.micro_batch_wait_ms,
+                ThreadPoolExecutor(1, thread_name_prefix='sentiment')
             )
-            print(f"Loaded sentiment model: {self.model_name}")
-        except Exception as e:
-            print(f"Error loading model {self.model_name}: {e}")
-            # Fallback to basic model
-            self.sentiment_pipeline = pipeline("sentiment-analysis")
+        return await self._micro_batcher.submit(text)
     
     def analyze_sentiment(self, text: str) -> Dict:
         """Analyze sentiment of a single text"""
+        if self.lexicon is not None:
+            return self.analyze_batch([text])[0]
+        return self._model_sentiment(text)
+    
+    def _model_sentiment(self, text: str) -> Dict:
         if not text or not text.strip():
             return {'label': 'NEUTRAL', 'score': 0.5, 'normalized_score': 0.0}
         
@@ -36,70 +203,165 @@ class SentimentAnalyzer:
             
             # Get sentiment prediction
             result = self.sentiment_pipeline(cleaned_text)[0]
-            
-            # Normalize score to -1 to 1 range
-            normalized_score = self._normalize_score(result)
-            
-            return {
-                'label': result['label'],
-                'confidence': result['score'],
-                'normalized_score': normalized_score,
-                'text_length': len(text)
-            }
-            
+            return self._format_result(result, text)
+        
         except Exception as e:
             print(f"Sentiment analysis error: {e}")
             return {'label': 'NEUTRAL', 'score': 0.5, 'normalized_score': 0.0}
     
-    def analyze_batch(self, texts: List[str]) -> List[Dict]:
-        """Analyze sentiment for multiple texts"""
-        results = []
-        for text in texts:
-            results.append(self.analyze_sentiment(text))
-        return results
-    
-    def analyze_product_reviews(self, reviews: List[Dict]) -> Dict:
-        """Analyze sentiment for product reviews and provide summary"""
-        if not reviews:
-            return {
-                'average_sentiment': 0.0,
-                'sentiment_distribution': {'positive': 0, 'neutral': 0, 'negative': 0},
-                'total_reviews': 0
-            }
+    def analyze_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict]:
+        """Analyze sentiment for multiple texts in batched forward passes
         
-        sentiments = []
-        sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
+        Texts are cleaned once and sorted by token length, so each batch pads
+        to a similar length; results are returned in input order.
+        """
+        batch_size = batch_size or self.batch_size
+        results: List[Optional[Dict]] = [None] * len(texts)
         
-        for review in reviews:
-            review_text = review.get('review_text', '') or review.get('text', '')
-            if not review_text:
-                continue
-                
-            sentiment_result = self.analyze_sentiment(review_text)
-            normalized_score = sentiment_result['normalized_score']
-            sentiments.append(normalized_score)
-            
-            # Count sentiment categories
-            if normalized_score > 0.1:
-                sentiment_counts['positive'] += 1
-            elif normalized_score < -0.1:
-                sentiment_counts['negative'] += 1
+        pending = []
+        for position, text in enumerate(texts):
+            if not text or not text.strip():
+                results[position] = {'label': 'NEUTRAL', 'score': 0.5, 'normalized_score': 0.0}
             else:
-                sentiment_counts['neutral'] += 1
+                pending.append((position, self._clean_text(text)))
+        leaning = {}
+        if self.lexicon is not None:
+            pending, leaning = self._lexicon_tier(pending, texts, results)
+        if not pending:
+            return results
         
-        average_sentiment = np.mean(sentiments) if sentiments else 0.0
+        lengths = self._token_lengths([cleaned for _, cleaned in pending])
+        order = sorted(range(len(pending)), key=lengths.__getitem__)
         
+        for start in range(0, len(order), batch_size):
+            batch = [pending[i] for i in order[start:start + batch_size]]
+            try:
+                predictions = self.sentiment_pipeline(
+                    [cleaned for _, cleaned in batch], batch_size=batch_size, truncation=True
+                )
+            except Exception as e:
+                print(f"Batch sentiment analysis error: {e}")
+                predictions = None
+            
+            for index, (position, _) in enumerate(batch):
+                if predictions is None:
+                    # Retry one at a time so a single bad text does not fail the whole batch
+                    model_result = self._model_sentiment(texts[position])
+                else:
+                    model_result = self._format_result(predictions[index], texts[position])
+                
+                if results[position] is None:
+                    results[position] = model_result
+                    if self.lexicon is not None:
+                        model_result['tier'] = 'model'
+                    if position in leaning:
+                        self.tier_counts['leaning'] += 1
+                        self.tier_counts['leaning_agreed'] += (
+                            _bucket(leaning[position]) == _bucket(model_result['normalized_score'])
+                        )
+                else:
+                    # Audit of a lexicon-scored review: keep the lexicon result, record agreement
+                    self.tier_counts['audit_agreed'] += (
+                        _bucket(results[position]['normalized_score']) == _bucket(model_result['normalized_score'])
+                    )
+        
+        return results
+    
+    def _lexicon_tier(self, pending: List, texts: List[str], results: List[Optional[Dict]]):
+        """Score clear-cut texts with the lexicon
+        
+        Returns the (position, cleaned) pairs that need the model (escalated
+        and audited) and the lexicon score of escalated texts that lean
+        positive or negative, to compare with the model's verdict.
+        """
+        escalated = []
+        audits = []
+        for position, cleaned in pending:
+            score, decisive = self.lexicon.score(cleaned)
+            if decisive and abs(score) >= self.uncertainty_band:
+                results[position] = {
+                    'label': 'positive' if score > 0 else 'negative',
+                    'confidence': abs(score),
+                    'normalized_score': score,
+                    'text_length': len(texts[position]),
+                    'tier': 'lexicon'
+                }
+                self.tier_counts['lexicon'] += 1
+                if self.audit_rate and random.random() < self.audit_rate:
+                    audits.append((position, cleaned))
+                    self.tier_counts['audited'] += 1
+            else:
+                escalated.append((position, cleaned, score))
+                self.tier_counts['model'] += 1
+        
+        leaning = {position: score for position, _, score in escalated if _bucket(score) != 'neutral'}
+        return [(position, cleaned) for position, cleaned, _ in escalated] + audits, leaning
+    
+    def tier_stats(self) -> Dict:
+        """Share of reviews each tier handled and how often the tiers agree"""
+        counts = self.tier_counts
+        total = counts['lexicon'] + counts['model']
         return {
-            'average_sentiment': float(average_sentiment),
-            'sentiment_distribution': sentiment_counts,
-            'total_reviews': len(sentiments),
-            'sentiment_breakdown': {
-                'positive_percentage': sentiment_counts['positive'] / len(sentiments) * 100 if sentiments else 0,
-                'neutral_percentage': sentiment_counts['neutral'] / len(sentiments) * 100 if sentiments else 0,
-                'negative_percentage': sentiment_counts['negative'] / len(sentiments) * 100 if sentiments else 0
-            }
+            'reviews': total,
+            'lexicon_share': counts['lexicon'] / total if total else 0.0,
+            'model_share': counts['model'] / total if total else 0.0,
+            'audited': counts['audited'],
+            'audit_agreement': counts['audit_agreed'] / counts['audited'] if counts['audited'] else None,
+            'escalated_leaning': counts['leaning'],
+            'escalated_agreement': counts['leaning_agreed'] / counts['leaning'] if counts['leaning'] else None
         }
     
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Token count per text (word count if the pipeline has no tokenizer)"""
+        tokenizer = getattr(self.sentiment_pipeline, 'tokenizer', None)
+        if tokenizer is None:
+            return [len(text.split()) for text in texts]
+        encoded = tokenizer(texts, add_special_tokens=False, truncation=True, max_length=512)
+        return [len(ids) for ids in encoded['input_ids']]
+    
+    def _format_result(self, result: Dict, text: str) -> Dict:
+        """Pipeline output for one text with the score normalized to -1 to 1"""
+        return {
+            'label': result['label'],
+            'confidence': result['score'],
+            'normalized_score': self._normalize_score(result),
+            'text_length': len(text)
+        }
+    
+    def stored_sentiment(self, review: Dict) -> Optional[Dict]:
+        """Result built from a review's persisted sentiment_score (see backfill_review_sentiment.py), if any"""
+        score = review.get('sentiment_score')
+        if score is None:
+            return None
+        label = _bucket(score)
+        review_text = review.get('review_text', '') or review.get('text', '')
+        return {
+            'label': label,
+            'confidence': abs(score),
+            'normalized_score': score,
+            'text_length': len(review_text)
+        }
+    
+    def review_sentiments(self, reviews: List[Dict]) -> List[Optional[Dict]]:
+        """Stored sentiment per review; None for reviews without text or not scored yet
+        
+        Read paths never run the model: reviews with a NULL sentiment_score
+        are left for backfill_review_sentiment.py to score.
+        """
+        return [self.stored_sentiment(review) if _review_text(review) else None for review in reviews]
+    
+    def analyze_product_reviews(self, reviews: Iterable[Dict]) -> Dict:
+        """Summarize the stored sentiment of product reviews (unscored reviews are counted, not averaged)"""
+        tally = SentimentTally()
+        for chunk in _chunks(reviews, REVIEW_CHUNK_SIZE):
+            tally.reviews_seen += len(chunk)
+            for review, sentiment in zip(chunk, self.review_sentiments(chunk)):
+                if sentiment is not None:
+                    tally.add(sentiment['normalized_score'])
+                elif _review_text(review):
+                    tally.unscored += 1
+        return tally.summary()
+    
     def _clean_text(self, text: str) -> str:
         """Clean text for sentiment analysis"""
         # Remove excessive whitespace
@@ -128,12 +390,16 @@ class SentimentAnalyzer:
 class ReviewAnalyzer:
     """Specialized analyzer for product reviews"""
     
-    def __init__(self):
-        self.sentiment_analyzer = SentimentAnalyzer()
+    def __init__(self, sentiment_analyzer: Optional[SentimentAnalyzer] = None):
+        self.sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
     
-    def analyze_review_quality(self, review: Dict) -> Dict:
-        """Analyze review quality and helpfulness"""
-        review_text = review.get('review_text', '') or review.get('text', '')
+    def analyze_review_quality(self, review: Dict, sentiment: Optional[Dict] = None) -> Dict:
+        """Analyze review quality and helpfulness (pass `sentiment` when it is already known)
+        
+        Sentiment comes from the stored score; it is None for reviews the
+        backfill has not scored yet.
+        """
+        review_text = _review_text(review)
         
         if not review_text:
             return {'quality_score': 0.0, 'is_helpful': False}
@@ -145,8 +411,9 @@ class ReviewAnalyzer:
             'delivery', 'shipping', 'recommend', 'worth', 'price'
         ])
         
-        # Sentiment analysis
-        sentiment = self.sentiment_analyzer.analyze_sentiment(review_text)
+        # Stored sentiment only; scoring is left to the backfill
+        if sentiment is None:
+            sentiment = self.sentiment_analyzer.stored_sentiment(review)
         
         # Quality score calculation
         quality_score = 0.0
@@ -180,41 +447,49 @@ class ReviewAnalyzer:
             'sentiment': sentiment
         }
     
-    def get_review_insights(self, reviews: List[Dict]) -> Dict:
-        """Get comprehensive insights from product reviews"""
-        if not reviews:
-            return {}
-        
-        # Analyze all reviews
-        review_analyses = []
-        for review in reviews:
-            analysis = self.analyze_review_quality(review)
-            review_analyses.append(analysis)
+    def get_review_insights(self, reviews: Iterable[Dict]) -> Dict:
+        """Get comprehensive insights from product reviews
         
-        # Get sentiment summary
-        sentiment_summary = self.sentiment_analyzer.analyze_product_reviews(reviews)
+        One pass over the reviews in chunks: each review's stored sentiment is
+        read once and shared by the quality, distribution and theme
+        statistics. Reviews not scored yet count towards quality and themes
+        but not the sentiment summary.
+        """
+        tally = SentimentTally()
+        quality_total = 0.0
+        helpful_count = 0
+        themes = set()
+        all_themes = POSITIVE_THEMES + NEGATIVE_THEMES
         
-        # Calculate quality metrics
-        quality_scores = [r['quality_score'] for r in review_analyses]
-        helpful_reviews = [r for r in review_analyses if r['is_helpful']]
-        
-        # Extract common themes (simplified)
-        all_review_text = ' '.join([
-            r.get('review_text', '') or r.get('text', '') 
-            for r in reviews if r.get('review_text') or r.get('text')
-        ])
+        for chunk in _chunks(reviews, REVIEW_CHUNK_SIZE):
+            tally.reviews_seen += len(chunk)
+            for review, sentiment in zip(chunk, self.sentiment_analyzer.review_sentiments(chunk)):
+                if not _review_text(review):
+                    continue  # No text: quality 0, not helpful, no sentiment
+                
+                analysis = self.analyze_review_quality(review, sentiment)
+                quality_total += analysis['quality_score']
+                helpful_count += analysis['is_helpful']
+                if sentiment is not None:
+                    tally.add(sentiment['normalized_score'])
+                else:
+                    tally.unscored += 1
+                if len(themes) < len(all_themes):
+                    themes.update(self._extract_common_themes(_review_text(review)))
         
-        common_words = self._extract_common_themes(all_review_text)
+        total_reviews = tally.reviews_seen
+        if not total_reviews:
+            return {}
         
         return {
-            'sentiment_summary': sentiment_summary,
+            'sentiment_summary': tally.summary(),
             'quality_metrics': {
-                'average_quality_score': np.mean(quality_scores) if quality_scores else 0.0,
-                'helpful_reviews_count': len(helpful_reviews),
-                'helpful_reviews_percentage': len(helpful_reviews) / len(reviews) * 100 if reviews else 0
+                'average_quality_score': quality_total / total_reviews,
+                'helpful_reviews_count': helpful_count,
+                'helpful_reviews_percentage': helpful_count / total_reviews * 100
             },
-            'common_themes': common_words,
-            'total_reviews_analyzed': len(reviews)
+            'common_themes': [theme for theme in all_themes if theme in themes][:10],
+            'total_reviews_analyzed': total_reviews
         }
     
     def _extract_common_themes(self, text: str) -> List[str]:
@@ -222,14 +497,10 @@ class ReviewAnalyzer:
         if not text:
             return []
         
-        # Common positive/negative words in cosmetic/fashion/healthcare reviews
-        positive_themes = ['love', 'great', 'amazing', 'perfect', 'recommend', 'excellent', 'beautiful']
-        negative_themes = ['terrible', 'awful', 'waste', 'disappointed', 'broke', 'cheap', 'horrible']
-        
         text_lower = text.lower()
         found_themes = []
         
-        for theme in positive_themes + negative_themes:
+        for theme in POSITIVE_THEMES + NEGATIVE_THEMES:
             if theme in text_lower:
                 found_themes.append(theme)
         
@@ -251,8 +522,10 @@ if __name__ == "__main__":
         print(f"Review: {review['review_text'][:50]}...")
         print(f"Sentiment: {sentiment}")
         print()
+        # Stored as Review.sentiment_score by backfill_review_sentiment.py
+        review['sentiment_score'] = sentiment['normalized_score']
     
-    # Analyze product reviews summary
-    review_analyzer = ReviewAnalyzer()
+    # Analyze product reviews summary (reads the stored scores)
+    review_analyzer = ReviewAnalyzer(analyzer)
     insights = review_analyzer.get_review_insights(sample_reviews)
     print("Review Insights:", insights)
\ No newline at end of file
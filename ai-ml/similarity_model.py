@@ -1,17 +1,210 @@
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import faiss
-from typing import List, Dict, Tuple
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Iterable, Optional
+from datetime import datetime
+from functools import partial
+import hashlib
+import json
 import pickle
 import os
 
+from embedding_cache import EmbeddingCache
+from micro_batcher import MicroBatcher
+from query_cache import QueryEmbeddingCache
+import model_store
+from model_registry import registry
+
+METADATA_FIELDS = ('id', 'name', 'category', 'brand', 'price', 'rating', 'in_stock')
+# Column types of METADATA_FIELDS in saved snapshots (id is the key column)
+METADATA_STRING_FIELDS = ('name', 'category', 'brand')
+METADATA_NUMBER_FIELDS = ('price', 'rating')
+METADATA_BOOL_FIELDS = ('in_stock',)
+
+# Filtered searches over at most this many allowed products are scored exactly
+FILTER_EXACT_LIMIT = 4096
+
+# Index backends: exact brute force, HNSW graph, or inverted file with tunable nprobe
+INDEX_TYPES = ('flat', 'hnsw', 'ivf')
+
+DEFAULT_INDEX_PARAMS = {
+    'flat': {},
+    'hnsw': {'M': 32, 'ef_construction': 200, 'ef_search': 64},
+    'ivf': {'nlist': None, 'nprobe': 8}  # nlist defaults to 4 * sqrt(n), at least 39 vectors per list
+}
+
+# Vector storage inside the index: full precision, half precision, 8-bit scalar
+# quantization, or product quantization (pq_m bytes per product)
+STORAGE_TYPES = ('float32', 'float16', 'int8', 'pq')
+
+# Models whose tokenizer lowercases its input, so query caching may fold case
+UNCASED_MODELS = ('all-MiniLM-L6-v2', 'all-MiniLM-L12-v2', 'paraphrase-MiniLM-L6-v2', 'multi-qa-MiniLM-L6-cos-v1')
+
+# Lossy storage modes re-score the top `rerank_factor * k` candidates with the stored
+# vectors, which are memory-mapped from the snapshot or embedding store rather than held in memory
+DEFAULT_RERANK_FACTOR = {'float32': 1, 'float16': 1, 'int8': 4, 'pq': 8}
+
+def _default_pq_m(dimension: int) -> int:
+    """Largest divisor of the dimension that is at most dimension / 8 (48 for MiniLM)"""
+    for m in range(max(1, dimension // 8), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+def build_faiss_index(index_type: str, dimension: int, params: Optional[Dict] = None,
+                      training_vectors: Optional[np.ndarray] = None, storage: str = 'float32'):
+    """Create an empty inner-product index addressed by product id
+    
+    IVF and quantized storage modes are trained on `training_vectors`; the
+    number of IVF lists and PQ centroids are capped by how many vectors are available.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}. Use one of: {', '.join(INDEX_TYPES)}")
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown storage: {storage}. Use one of: {', '.join(STORAGE_TYPES)}")
+    if index_type == 'hnsw' and storage == 'pq':
+        raise ValueError("HNSW does not support inner-product PQ storage; use flat or ivf with pq")
+    params = {**DEFAULT_INDEX_PARAMS[index_type], **(params or {})}
+    metric = faiss.METRIC_INNER_PRODUCT
+    
+    n = len(training_vectors) if training_vectors is not None else 0
+    if (index_type == 'ivf' or storage in ('int8', 'pq')) and n == 0:
+        raise ValueError(f"{index_type}/{storage} indexes need training vectors")
+    
+    sq_types = {'float16': faiss.ScalarQuantizer.QT_fp16, 'int8': faiss.ScalarQuantizer.QT_8bit}
+    pq_m = params.get('pq_m') or _default_pq_m(dimension)
+    # k-means wants ~39 training points per centroid; small catalogs get fewer PQ centroids
+    pq_bits = min(8, max(1, int(np.log2(max(n // 39, 2)))))
+    
+    if index_type == 'flat':
+        if storage == 'float32':
+            index = faiss.IndexFlatIP(dimension)
+        elif storage == 'pq':
+            index = faiss.IndexPQ(dimension, pq_m, pq_bits, metric)
+        else:
+            index = faiss.IndexScalarQuantizer(dimension, sq_types[storage], metric)
+    
+    elif index_type == 'hnsw':
+        if storage == 'float32':
+            index = faiss.IndexHNSWFlat(dimension, params['M'], metric)
+        else:
+            index = faiss.IndexHNSWSQ(dimension, sq_types[storage], params['M'], metric)
+        index.hnsw.efConstruction = params['ef_construction']
+        index.hnsw.efSearch = params['ef_search']
+    
+    else:
+        nlist = params['nlist'] or min(int(4 * np.sqrt(n)), n // 39)
+        nlist = max(1, min(nlist, n))
+        quantizer = faiss.IndexFlatIP(dimension)
+        if storage == 'float32':
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        elif storage == 'pq':
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_bits, metric)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, sq_types[storage], metric)
+        index.nprobe = min(params['nprobe'], nlist)
+    
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(training_vectors, dtype='float32'))
+    
+    # IVF indexes store ids natively; the others need an id map
+    return index if index_type == 'ivf' else faiss.IndexIDMap2(index)
+
+def rerank(queries: np.ndarray, candidate_ids: np.ndarray, vectors_for, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Re-score index candidates with exact inner products and keep the top k
+    
+    `vectors_for(ids)` returns the stored vectors of the given candidate ids.
+    Missing candidates (id -1) sort last.
+    """
+    scores = np.full(candidate_ids.shape, -np.inf, dtype='float32')
+    for row, ids in enumerate(candidate_ids):
+        valid = ids >= 0
+        if valid.any():
+            vectors = np.asarray(vectors_for(ids[valid]), dtype='float32')
+            scores[row, valid] = vectors @ queries[row]
+    order = np.argsort(-scores, axis=1)[:, :k]
+    top_ids = np.take_along_axis(candidate_ids, order, axis=1)
+    top_scores = np.take_along_axis(scores, order, axis=1)
+    top_ids[~np.isfinite(top_scores)] = -1
+    return top_scores, top_ids
+
+def set_search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """Tune query-time recall/latency on an index built by build_faiss_index"""
+    space = faiss.ParameterSpace()
+    if nprobe is not None:
+        space.set_index_parameter(index, 'nprobe', nprobe)
+    if ef_search is not None:
+        space.set_index_parameter(index, 'efSearch', ef_search)
+
+def load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
 class ProductSimilarityModel:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', index_type: str = 'flat',
+                 index_params: Optional[Dict] = None, embedding_cache_dir: Optional[str] = None,
+                 storage: str = 'float32', rerank_factor: Optional[int] = None,
+                 query_cache_size: int = 1024, query_cache_path: Optional[str] = None):
         """Initialize the product similarity model"""
-        self.model = SentenceTransformer(model_name)
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}. Use one of: {', '.join(INDEX_TYPES)}")
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown storage: {storage}. Use one of: {', '.join(STORAGE_TYPES)}")
+        self.model_name = model_name
+        # SentenceTransformer is loaded on first use and shared through the model registry
+        self._model_key = f"sentence-transformer:{model_name}"
+        registry.register(self._model_key, partial(load_sentence_transformer, model_name))
+        # Encoding settings; encode_pool is a SentenceTransformer multi-process pool
+        self.encode_batch_size = 32
+        self.encode_pool = None
+        # Optional on-disk cache so unchanged product texts are never re-encoded (opened on first use)
+        self.embedding_cache_dir = embedding_cache_dir
+        self._embedding_cache: Optional[EmbeddingCache] = None
+        # LRU of free-text query embeddings (optionally persisted across restarts)
+        self.query_cache = QueryEmbeddingCache(
+            model_name, query_cache_size, query_cache_path,
+            lowercase=model_name.split('/')[-1] in UNCASED_MODELS
+        )
+        self.index_type = index_type
+        self.index_params = index_params or {}
         self.index = None
+        # Quantized storage reranks with product_embeddings (memory-mapped once loaded)
+        self.storage = storage
+        self.rerank_factor = rerank_factor or DEFAULT_RERANK_FACTOR[storage]
+        # Row-aligned embedding matrix and product ids; the FAISS index is keyed by product id
         self.product_embeddings = None
-        self.product_metadata = []
+        self.product_ids = np.empty(0, dtype='int64')
+        # product_ids in sorted order for binary-search row lookups; _row_order maps
+        # sorted positions back to rows and is None while product_ids are already sorted
+        self._sorted_ids = self.product_ids
+        self._row_order: Optional[np.ndarray] = None
+        self.product_metadata: Dict[int, Dict] = {}
+        # Hash of each product's prepared text, used to skip re-encoding unchanged products
+        self.product_hashes: Dict[int, str] = {}
+        self.last_build_at: Optional[datetime] = None
+        # Set when the index is memory-mapped from a snapshot (load_model(read_only=True))
+        self._index_mapped = False
+        # Row-aligned category code/price/stock arrays for filtered search, built on first
+        # use (read from the snapshot columns by load_model) and patched on upsert
+        self._filter_columns: Optional[Dict[str, np.ndarray]] = None
+        self._category_codes: Dict[str, int] = {}
+        # Concurrent async query encodes share forward passes (tune before first use)
+        self.micro_batch_size = 64
+        self.micro_batch_wait_ms = 5.0
+        self._query_batcher: Optional[MicroBatcher] = None
+    
+    @property
+    def model(self):
+        return registry.get(self._model_key)
+    
+    @property
+    def embedding_cache(self) -> Optional[EmbeddingCache]:
+        if self._embedding_cache is None and self.embedding_cache_dir:
+            self._embedding_cache = EmbeddingCache(
+                self.embedding_cache_dir, self.model_name, self.model.get_sentence_embedding_dimension()
+            )
+        return self._embedding_cache
     
     def prepare_product_text(self, product: Dict) -> str:
         """Prepare product text for embedding"""
@@ -45,133 +238,689 @@ class ProductSimilarityModel:
         
         return ' '.join(text_parts)
     
+    def _text_hash(self, text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+    
+    def _new_index(self, dimension: int, training_vectors: Optional[np.ndarray] = None):
+        """Empty index addressed by product id"""
+        # Inner product on normalized vectors (cosine similarity)
+        return build_faiss_index(self.index_type, dimension, self.index_params, training_vectors, self.storage)
+    
+    @property
+    def _vector_dtype(self) -> str:
+        return 'float32' if self.storage == 'float32' else 'float16'
+    
+    def rebuild_index(self, index_type: Optional[str] = None, index_params: Optional[Dict] = None,
+                      storage: Optional[str] = None):
+        """Rebuild the index from stored embeddings, optionally switching backend or storage"""
+        if index_type is not None:
+            if index_type not in INDEX_TYPES:
+                raise ValueError(f"Unknown index type: {index_type}. Use one of: {', '.join(INDEX_TYPES)}")
+            self.index_type = index_type
+        if index_params is not None:
+            self.index_params = index_params
+        if storage is not None and storage != self.storage:
+            if storage not in STORAGE_TYPES:
+                raise ValueError(f"Unknown storage: {storage}. Use one of: {', '.join(STORAGE_TYPES)}")
+            self.storage = storage
+            self.rerank_factor = DEFAULT_RERANK_FACTOR[storage]
+            if self.product_embeddings is not None:
+                self.product_embeddings = np.asarray(self.product_embeddings, dtype=self._vector_dtype)
+        self._rebuild_index()
+    
+    def _rebuild_index(self, add_batch_size: int = 100_000):
+        """Rebuild the index from the stored embeddings"""
+        self.index = None
+        self._index_mapped = False
+        if self.product_embeddings is None or not len(self.product_ids):
+            return
+        training_vectors = None
+        if self.index_type == 'ivf' or self.storage in ('int8', 'pq'):
+            training_vectors = np.ascontiguousarray(self.product_embeddings, dtype='float32')
+        self.index = self._new_index(self.product_embeddings.shape[1], training_vectors)
+        # Add in slices so float16 storage is never widened to float32 all at once
+        for start in range(0, len(self.product_ids), add_batch_size):
+            self.index.add_with_ids(
+                np.ascontiguousarray(self.product_embeddings[start:start + add_batch_size], dtype='float32'),
+                self.product_ids[start:start + add_batch_size]
+            )
+    
+    def _supports_remove(self) -> bool:
+        # HNSW graphs cannot delete vectors; they are rebuilt on update/remove instead
+        return self.index_type != 'hnsw'
+    
+    def _index_rows(self):
+        """Refresh the row lookup after product_ids changed"""
+        ids = self.product_ids
+        if len(ids) < 2 or bool(np.all(ids[1:] > ids[:-1])):
+            self._sorted_ids, self._row_order = ids, None
+        else:
+            self._row_order = np.argsort(ids, kind='stable')
+            self._sorted_ids = ids[self._row_order]
+    
+    def _rows_of(self, product_ids) -> np.ndarray:
+        """Rows of the given product ids (-1 for ids not in the model)"""
+        product_ids = np.asarray(product_ids, dtype='int64')
+        if not len(self._sorted_ids):
+            return np.full(product_ids.shape, -1, dtype='int64')
+        positions = np.minimum(np.searchsorted(self._sorted_ids, product_ids), len(self._sorted_ids) - 1)
+        rows = positions if self._row_order is None else self._row_order[positions]
+        return np.where(self._sorted_ids[positions] == product_ids, rows, -1)
+    
+    def _vectors_for(self, product_ids: np.ndarray) -> np.ndarray:
+        return self.product_embeddings[self._rows_of(product_ids)]
+    
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, ids) per query, reranked with stored vectors for lossy storage"""
+        queries = np.ascontiguousarray(queries, dtype='float32')
+        if self.rerank_factor <= 1:
+            return self.index.search(queries, k)
+        
+        fetch_k = min(k * self.rerank_factor, self.index.ntotal)
+        _, candidate_ids = self.index.search(queries, fetch_k)
+        return rerank(queries, candidate_ids, self._vectors_for, k)
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """Trade recall for latency at query time (nprobe for IVF, ef_search for HNSW)"""
+        if nprobe is not None:
+            self.index_params['nprobe'] = nprobe
+        if ef_search is not None:
+            self.index_params['ef_search'] = ef_search
+        if self.index is not None:
+            set_search_params(self.index, nprobe, ef_search)
+    
+    def _encode(self, texts: List[str], cache_write: bool = True) -> np.ndarray:
+        """L2-normalized float32 embeddings, served from the embedding cache when possible"""
+        if self.embedding_cache is not None:
+            return self.embedding_cache.get_or_encode(texts, self._encode_uncached, write=cache_write)
+        return self._encode_uncached(texts)
+    
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalized float32 embeddings"""
+        if self.encode_pool is not None:
+            raw = self.model.encode_multi_process(texts, self.encode_pool, batch_size=self.encode_batch_size)
+        else:
+            raw = self.model.encode(texts, batch_size=self.encode_batch_size)
+        embeddings = np.ascontiguousarray(raw, dtype='float32')
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        return self.query_cache.get_or_encode(queries, lambda texts: self._encode(texts, cache_write=False))
+    
+    def prewarm_query_cache(self, queries: List[str], batch_size: int = 256) -> int:
+        """Encode frequent queries (most frequent first) ahead of traffic; returns the cache size"""
+        queries = queries[:self.query_cache.max_size]
+        # Least frequent first, so the most frequent queries are the most recently used
+        queries = queries[::-1]
+        for start in range(0, len(queries), batch_size):
+            self._encode_queries(queries[start:start + batch_size])
+        return len(self.query_cache)
+    
     def train_on_products(self, products: List[Dict]):
-        """Train the similarity model on a list of products"""
+        """Train the similarity model on a list of products (full rebuild)"""
         print(f"Training similarity model on {len(products)} products...")
         
-        # Prepare text data
-        product_texts = []
-        self.product_metadata = []
+        self.index = None
+        self.product_embeddings = None
+        self.product_ids = np.empty(0, dtype='int64')
+        self._index_rows()
+        self.product_metadata = {}
+        self.product_hashes = {}
+        self._filter_columns = None
+        
+        self.upsert_products(products)
+        print("Training completed!")
+    
+    def upsert_products(self, products: List[Dict]) -> Dict[str, int]:
+        """Add new products and re-embed changed ones, keyed by product id
+        
+        Products whose prepared text is unchanged only get their metadata
+        refreshed, so refreshing after a scrape encodes just the new and
+        edited items.
+        """
+        started_at = datetime.utcnow()
+        changed_ids = []
+        changed_texts = []
+        
+        # A batch may list a product more than once (e.g. edited twice between
+        # refreshes); the last occurrence wins, so each id is written once
+        latest = {int(product['id']): product for product in products}
         
-        for product in products:
+        for product_id, product in latest.items():
             text = self.prepare_product_text(product)
-            product_texts.append(text)
+            text_hash = self._text_hash(text)
             
             # Store metadata for retrieval
-            self.product_metadata.append({
-                'id': product.get('id'),
-                'name': product.get('name'),
-                'category': product.get('category'),
-                'brand': product.get('brand'),
-                'price': product.get('price'),
-                'rating': product.get('rating')
-            })
-        
-        # Generate embeddings
-        print("Generating embeddings...")
-        self.product_embeddings = self.model.encode(product_texts)
-        
-        # Build FAISS index for fast similarity search
-        print("Building FAISS index...")
-        dimension = self.product_embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product (cosine similarity)
-        
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(self.product_embeddings)
-        self.index.add(self.product_embeddings)
+            self.product_metadata[product_id] = {field: product.get(field) for field in METADATA_FIELDS}
+            
+            if self.product_hashes.get(product_id) == text_hash:
+                continue
+            changed_ids.append(product_id)
+            changed_texts.append(text)
+            self.product_hashes[product_id] = text_hash
         
-        print("Training completed!")
+        added = int(np.count_nonzero(self._rows_of(changed_ids) < 0))
+        if changed_ids:
+            print(f"Generating embeddings for {len(changed_ids)} products...")
+            embeddings = self._encode(changed_texts)
+            self._write_vectors(np.array(changed_ids, dtype='int64'), embeddings)
+        self._patch_catalog_columns(np.fromiter(latest, dtype='int64'))
+        
+        self.last_build_at = started_at
+        return {
+            'added': added,
+            'updated': len(changed_ids) - added,
+            'unchanged': len(latest) - len(changed_ids)
+        }
+    
+    def _write_vectors(self, ids: np.ndarray, embeddings: np.ndarray):
+        """Insert or overwrite vectors for the given product ids"""
+        self._ensure_writable_index()
+        if self.product_embeddings is None:
+            self.product_embeddings = np.empty((0, embeddings.shape[1]), dtype=self._vector_dtype)
+        
+        rows = self._rows_of(ids)
+        existing = rows >= 0
+        if existing.any():
+            self.product_embeddings[rows[existing]] = embeddings[existing]
+            if self.index is not None and self._supports_remove():
+                self.index.remove_ids(ids[existing])
+        
+        new_ids = ids[~existing]
+        if len(new_ids):
+            self.product_embeddings = np.vstack([
+                self.product_embeddings, embeddings[~existing].astype(self._vector_dtype)
+            ])
+            self.product_ids = np.concatenate([self.product_ids, new_ids])
+            self._index_rows()
+        
+        if self.index is None or (existing.any() and not self._supports_remove()):
+            # First build (IVF trains on everything we have), or an HNSW update
+            self._rebuild_index()
+        else:
+            self.index.add_with_ids(embeddings, ids)
+    
+    def load_embeddings(self, store_dir: str):
+        """Build the index from an embedding store written by EmbeddingPipeline
+        
+        Vectors are memory-mapped copy-on-write, so they are paged in from
+        disk rather than read into memory up front. They stay float32 until
+        saved, including for quantized storage modes, which rerank from them.
+        """
+        with open(os.path.join(store_dir, 'checkpoint.json')) as f:
+            checkpoint = json.load(f)
+        rows = checkpoint['rows']
+        
+        self.product_ids = np.fromfile(os.path.join(store_dir, 'ids.i64'), dtype='int64', count=rows)
+        self.product_embeddings = None
+        if rows:
+            self.product_embeddings = np.memmap(
+                os.path.join(store_dir, 'vectors.f32'), dtype='float32', mode='c',
+                shape=(rows, checkpoint['dimension'])
+            )
+        
+        self.product_metadata = {}
+        self.product_hashes = {}
+        self._filter_columns = None
+        with open(os.path.join(store_dir, 'metadata.jsonl'), encoding='utf-8') as f:
+            for _, line in zip(range(rows), f):
+                metadata = json.loads(line)
+                self.product_hashes[metadata['id']] = metadata.pop('text_hash')
+                self.product_metadata[metadata['id']] = metadata
+        
+        self._index_rows()
+        self.last_build_at = datetime.fromisoformat(checkpoint['started_at'])
+        self._rebuild_index()
+        print(f"Loaded {rows} embeddings from {store_dir}")
     
-    def find_similar_products(self, target_product: Dict, k: int = 10) -> List[Tuple[Dict, float]]:
-        """Find similar products to a target product"""
+    def remove_products(self, product_ids: Iterable[int]) -> int:
+        """Remove products from the index and embedding store"""
+        ids = np.unique(np.fromiter(product_ids, dtype='int64'))
+        rows = self._rows_of(ids)
+        ids, rows = ids[rows >= 0], rows[rows >= 0]
+        if not len(ids):
+            return 0
+        
+        self._ensure_writable_index()
+        if self._supports_remove():
+            self.index.remove_ids(ids)
+        
+        keep = np.ones(len(self.product_ids), dtype=bool)
+        keep[rows] = False
+        self.product_embeddings = self.product_embeddings[keep]
+        self.product_ids = self.product_ids[keep]
+        self._index_rows()
+        if self._filter_columns is not None:
+            self._filter_columns = {field: column[keep] for field, column in self._filter_columns.items()}
+        
+        if not self._supports_remove():
+            self._rebuild_index()
+        
+        for product_id in ids.tolist():
+            self.product_metadata.pop(product_id, None)
+            self.product_hashes.pop(product_id, None)
+        return len(ids)
+    
+    def sync_products(self, products: List[Dict], all_product_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+        """Bring the model in line with the catalog
+        
+        `products` are the products created or changed since the last build;
+        `all_product_ids` is every id still in the catalog, used to drop
+        deleted products. When omitted, `products` is taken to be the whole catalog.
+        """
+        stats = self.upsert_products(products)
+        
+        current = np.fromiter(
+            all_product_ids if all_product_ids is not None else (p['id'] for p in products), dtype='int64'
+        )
+        stats['removed'] = self.remove_products(self.product_ids[~np.isin(self.product_ids, current)])
+        return stats
+    
+    def _category_code(self, category: Optional[str]) -> int:
+        if category is None:
+            return -1
+        return self._category_codes.setdefault(category, len(self._category_codes))
+    
+    def _metadata_columns(self, product_ids: np.ndarray) -> Dict[str, np.ndarray]:
+        """Category code, price and stock of the given products, read from product_metadata"""
+        count = len(product_ids)
+        categories = np.full(count, -1, dtype='int32')
+        prices = np.full(count, np.nan)
+        in_stock = np.ones(count, dtype=bool)
+        for position, product_id in enumerate(product_ids.tolist()):
+            metadata = self.product_metadata.get(product_id) or {}
+            categories[position] = self._category_code(metadata.get('category'))
+            if metadata.get('price') is not None:
+                prices[position] = metadata['price']
+            # Models built before stock was tracked count everything as in stock
+            in_stock[position] = metadata.get('in_stock') is None or bool(metadata['in_stock'])
+        return {'category': categories, 'price': prices, 'in_stock': in_stock}
+    
+    def _snapshot_columns(self, version_dir: str) -> Dict[str, np.ndarray]:
+        """Filter columns read whole from a snapshot's metadata, aligned with product_ids"""
+        ids, columns = model_store.read_metadata_columns(version_dir, ('category',), ('price',), ('in_stock',))
+        codes, values = columns['category']
+        self._category_codes = {value: code for code, value in enumerate(values)}
+        if not len(ids):
+            return self._metadata_columns(self.product_ids)
+        
+        positions = np.minimum(np.searchsorted(ids, self.product_ids), len(ids) - 1)
+        found = ids[positions] == self.product_ids
+        return {
+            'category': np.where(found, codes[positions], -1).astype('int32'),
+            'price': np.where(found, columns['price'][positions], np.nan),
+            'in_stock': ~found | (columns['in_stock'][positions] != 0)
+        }
+    
+    def _catalog_columns(self) -> Dict[str, np.ndarray]:
+        """Category code, price and stock columns aligned with product_ids"""
+        if self._filter_columns is None:
+            self._category_codes = {}
+            self._filter_columns = self._metadata_columns(self.product_ids)
+        return self._filter_columns
+    
+    def _patch_catalog_columns(self, product_ids: np.ndarray):
+        """Refresh the filter columns of upserted products, extending them for new rows"""
+        if self._filter_columns is None:
+            return  # built from product_metadata on first use
+        columns = self._filter_columns
+        missing = len(self.product_ids) - len(columns['price'])
+        if missing:
+            added = self._metadata_columns(self.product_ids[-missing:])
+            columns = {field: np.concatenate([column, added[field]]) for field, column in columns.items()}
+        rows = self._rows_of(product_ids)
+        product_ids, rows = product_ids[rows >= 0], rows[rows >= 0]
+        for field, values in self._metadata_columns(product_ids).items():
+            columns[field][rows] = values
+        self._filter_columns = columns
+    
+    def _allowed_rows(self, category: Optional[str] = None, min_price: Optional[float] = None,
+                      max_price: Optional[float] = None, in_stock_only: bool = False) -> Optional[np.ndarray]:
+        """Boolean row mask for the filters, or None when nothing is filtered"""
+        if category is None and min_price is None and max_price is None and not in_stock_only:
+            return None
+        columns = self._catalog_columns()
+        mask = np.ones(len(self.product_ids), dtype=bool)
+        if category is not None:
+            mask &= columns['category'] == self._category_codes.get(category, -2)
+        if min_price is not None:
+            mask &= columns['price'] >= min_price
+        if max_price is not None:
+            mask &= columns['price'] <= max_price
+        if in_stock_only:
+            mask &= columns['in_stock']
+        return mask
+    
+    def _exact_search(self, query: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score the given rows exactly against one query"""
+        scores = np.asarray(self.product_embeddings[rows], dtype='float32') @ query[0]
+        top = np.argsort(-scores)[:k]
+        return scores[top][None, :], self.product_ids[rows][top][None, :]
+    
+    def _filter_search_params(self, selector, fetch_k: int, widen: int):
+        """Search parameters restricting the index to `selector`, widened for sparse filters"""
+        if self.index_type == 'ivf':
+            return faiss.SearchParametersIVF(sel=selector, nprobe=min(self.index.nprobe * widen, self.index.nlist))
+        if self.index_type == 'hnsw':
+            ef_search = faiss.downcast_index(self.index.index).hnsw.efSearch
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(ef_search, fetch_k) * widen)
+        return faiss.SearchParameters(sel=selector)
+    
+    def _filtered_search(self, query: np.ndarray, k: int, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k for one query among the rows allowed by `mask`
+        
+        Small candidate sets are scored exactly. Larger ones search the index
+        through an id bitmap; when IVF probes or the HNSW beam run out of
+        allowed products first, nprobe / efSearch are widened and the search
+        retried, and only as a last resort are all allowed rows scored.
+        """
+        query = np.ascontiguousarray(query, dtype='float32')
+        rows = np.flatnonzero(mask)
+        if len(rows) <= max(FILTER_EXACT_LIMIT, k):
+            return self._exact_search(query, rows, k)
+        if self.index_type == 'flat' and self.storage == 'pq':
+            # IndexPQ takes no id selector
+            return self._post_filtered_search(query, k, mask, rows)
+        
+        allowed_ids = self.product_ids[rows]
+        bitmap = np.zeros(int(allowed_ids.max()) // 8 + 1, dtype='uint8')
+        np.bitwise_or.at(bitmap, allowed_ids >> 3, (1 << (allowed_ids & 7)).astype('uint8'))
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        
+        fetch_k = min(k * self.rerank_factor, len(rows))
+        # Visit roughly as many allowed products as an unfiltered search would see
+        base = min(int(np.ceil(len(mask) / len(rows))), 16)
+        for widen in (base, base * 4, base * 16):
+            scores, ids = self.index.search(query, fetch_k, params=self._filter_search_params(selector, fetch_k, widen))
+            if (ids[0] >= 0).sum() >= fetch_k:
+                break
+        else:
+            return self._exact_search(query, rows, k)
+        
+        if self.rerank_factor > 1:
+            return rerank(query, ids, self._vectors_for, k)
+        return scores[:, :k], ids[:, :k]
+    
+    def _post_filtered_search(self, query: np.ndarray, k: int, mask: np.ndarray,
+                              rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Over-fetch from the unfiltered index, scaled by the filter's selectivity, and drop disallowed rows"""
+        wanted = min(k * self.rerank_factor, len(rows))
+        fetch_k = min(int(wanted * len(mask) / len(rows) * 2), self.index.ntotal)
+        while True:
+            _, ids = self.index.search(query, fetch_k)
+            found = ids[0][ids[0] >= 0]
+            allowed = found[mask[self._rows_of(found)]]
+            if len(allowed) >= wanted or fetch_k >= self.index.ntotal:
+                break
+            fetch_k = min(fetch_k * 4, self.index.ntotal)
+        
+        if len(allowed) < min(k, len(rows)):
+            return self._exact_search(query, rows, k)
+        return rerank(query, allowed[None, :wanted], self._vectors_for, k)
+    
+    def _query(self, query: np.ndarray, k: int, **filters) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, ids) for one query, optionally restricted by catalog filters"""
+        mask = self._allowed_rows(**filters)
+        if mask is None:
+            return self._search(query, k)
+        return self._filtered_search(query, k, mask)
+    
+    def find_similar_products(self, target_product: Dict, k: int = 10, category: Optional[str] = None,
+                              min_price: Optional[float] = None, max_price: Optional[float] = None,
+                              in_stock_only: bool = False) -> List[Tuple[Dict, float]]:
+        """Find similar products to a target product, optionally within category/price/stock filters"""
         if self.index is None:
             raise ValueError("Model not trained. Call train_on_products first.")
         
-        # Generate embedding for target product
-        target_text = self.prepare_product_text(target_product)
-        target_embedding = self.model.encode([target_text])
-        faiss.normalize_L2(target_embedding)
+        # Reuse the stored embedding when the target is indexed
+        target_id = target_product.get('id')
+        target_row = int(self._rows_of([target_id])[0]) if target_id is not None else -1
+        if target_row >= 0:
+            target_embedding = self.product_embeddings[target_row:target_row + 1]
+        else:
+            target_embedding = self._encode([self.prepare_product_text(target_product)])
         
         # Search for similar products
-        scores, indices = self.index.search(target_embedding, k + 1)  # +1 to exclude self
+        scores, ids = self._query(target_embedding, k + 1, category=category, min_price=min_price,
+                                  max_price=max_price, in_stock_only=in_stock_only)  # +1 to exclude self
         
         # Prepare results
         results = []
-        target_id = target_product.get('id')
-        
-        for score, idx in zip(scores[0], indices[0]):
-            # Skip if it's the same product
-            if self.product_metadata[idx].get('id') == target_id:
+        for score, product_id in zip(scores[0], ids[0]):
+            # Skip empty slots and the product itself
+            if product_id < 0 or product_id == target_id:
                 continue
             
-            similar_product = self.product_metadata[idx]
+            similar_product = self.product_metadata[int(product_id)]
             similarity_score = float(score)
             results.append((similar_product, similarity_score))
         
         return results[:k]
     
-    def find_similar_by_text(self, query_text: str, k: int = 10) -> List[Tuple[Dict, float]]:
-        """Find products similar to a text query"""
+    def find_similar_by_text(self, query_text: str, k: int = 10, category: Optional[str] = None,
+                             min_price: Optional[float] = None, max_price: Optional[float] = None,
+                             in_stock_only: bool = False) -> List[Tuple[Dict, float]]:
+        """Find products similar to a text query, optionally within category/price/stock filters"""
         if self.index is None:
             raise ValueError("Model not trained. Call train_on_products first.")
         
-        # Generate embedding for query
-        query_embedding = self.model.encode([query_text])
-        faiss.normalize_L2(query_embedding)
+        # Repeated queries skip the forward pass; free-text queries never enter the product embedding cache
+        query_embedding = self._encode_queries([query_text])
+        return self.find_similar_by_embedding(query_embedding, k, category=category, min_price=min_price,
+                                              max_price=max_price, in_stock_only=in_stock_only)
+    
+    def find_similar_by_embedding(self, query_embedding: np.ndarray, k: int = 10, category: Optional[str] = None,
+                                  min_price: Optional[float] = None, max_price: Optional[float] = None,
+                                  in_stock_only: bool = False) -> List[Tuple[Dict, float]]:
+        """Find products similar to an already encoded (1, dimension) query"""
+        if self.index is None:
+            raise ValueError("Model not trained. Call train_on_products first.")
         
         # Search for similar products
-        scores, indices = self.index.search(query_embedding, k)
+        scores, ids = self._query(query_embedding, k, category=category, min_price=min_price,
+                                  max_price=max_price, in_stock_only=in_stock_only)
         
         # Prepare results
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            similar_product = self.product_metadata[idx]
+        for score, product_id in zip(scores[0], ids[0]):
+            if product_id < 0:
+                continue
+            similar_product = self.product_metadata[int(product_id)]
             similarity_score = float(score)
             results.append((similar_product, similarity_score))
         
         return results
     
+    async def encode_query_async(self, query_text: str) -> np.ndarray:
+        """Embedding of one query; concurrent callers are micro-batched into one forward pass"""
+        if self._query_batcher is None:
+            self._query_batcher = MicroBatcher(
+                lambda queries: list(self._encode_queries(queries)),
+                self.micro_batch_size,
+                self.micro_batch_wait_ms,
+                ThreadPoolExecutor(1, thread_name_prefix='encode')
+            )
+        return await self._query_batcher.submit(query_text)
+    
+    async def find_similar_by_text_async(self, query_text: str, k: int = 10, category: Optional[str] = None,
+                                         min_price: Optional[float] = None, max_price: Optional[float] = None,
+                                         in_stock_only: bool = False) -> List[Tuple[Dict, float]]:
+        """find_similar_by_text for async callers: batched encoding, search off the event loop"""
+        query_embedding = await self.encode_query_async(query_text)
+        return await asyncio.get_running_loop().run_in_executor(None, partial(
+            self.find_similar_by_embedding, query_embedding[None, :], k, category=category,
+            min_price=min_price, max_price=max_price, in_stock_only=in_stock_only
+        ))
+    
+    def compute_neighbors(self, k: int = 20, batch_size: int = 1024) -> Dict[int, List[Tuple[int, float]]]:
+        """Compute the top-k neighbours of every indexed product, keyed by product id"""
+        if self.index is None:
+            raise ValueError("Model not trained. Call train_on_products first.")
+        
+        neighbors = {}
+        total = len(self.product_ids)
+        search_k = min(k + 1, total)  # +1 to exclude self
+        
+        for start in range(0, total, batch_size):
+            scores, ids = self._search(self.product_embeddings[start:start + batch_size], search_k)
+            
+            for product_id, row_scores, row_ids in zip(self.product_ids[start:start + batch_size].tolist(), scores, ids):
+                row = []
+                for score, neighbor_id in zip(row_scores, row_ids):
+                    if neighbor_id < 0 or neighbor_id == product_id:
+                        continue
+                    row.append((int(neighbor_id), float(score)))
+                neighbors[product_id] = row[:k]
+        
+        return neighbors
+    
     def save_model(self, model_path: str):
-        """Save the trained model"""
-        model_data = {
-            'product_embeddings': self.product_embeddings,
-            'product_metadata': self.product_metadata,
-            'model_name': self.model.get_sentence_embedding_dimension()
-        }
+        """Save the trained model as a new memory-mappable snapshot
         
-        with open(model_path, 'wb') as f:
-            pickle.dump(model_data, f)
+        `model_path` is a directory of versioned snapshots (a legacy `.pkl`
+        path maps to the same name without the extension).
+        """
+        root = snapshot_root(model_path)
+        os.makedirs(root, exist_ok=True)
+        version_dir = model_store.new_version_dir(root)
         
-        # Save FAISS index
-        faiss.write_index(self.index, model_path.replace('.pkl', '.faiss'))
-        print(f"Model saved to {model_path}")
+        model_store.write_array(version_dir, 'vectors', self.product_embeddings, dtype=self._vector_dtype)
+        model_store.write_array(version_dir, 'ids', self.product_ids)
+        model_store.write_metadata(version_dir, self.product_metadata, self.product_hashes,
+                                   METADATA_STRING_FIELDS, METADATA_NUMBER_FIELDS, METADATA_BOOL_FIELDS)
+        faiss.write_index(self.index, os.path.join(version_dir, 'index.faiss'))
+        
+        model_store.commit_version(root, version_dir, {
+            'model_name': self.model_name,
+            'dimension': int(self.product_embeddings.shape[1]),
+            'rows': len(self.product_ids),
+            'storage': self.storage,
+            'rerank_factor': self.rerank_factor,
+            'index_type': self.index_type,
+            'index_params': self.index_params,
+            'last_build_at': self.last_build_at.isoformat() if self.last_build_at else None
+        })
+        print(f"Model saved to {version_dir}")
     
-    def load_model(self, model_path: str):
-        """Load a trained model"""
+    def load_model(self, model_path: str, read_only: bool = False, verify: bool = False):
+        """Load a trained model
+        
+        Vectors, ids and metadata are memory-mapped, so loading is near-instant
+        and processes serving the same snapshot share pages through the OS
+        cache. With read_only=True the FAISS index is mapped as well; it is
+        copied into memory the first time the model is modified.
+        """
+        root = snapshot_root(model_path)
+        if not model_store.has_version(root) and os.path.isfile(model_path):
+            self._load_pickle(model_path)
+            return
+        
+        version_dir, manifest = model_store.open_version(root, verify=verify)
+        if manifest['model_name'] != self.model_name:
+            raise ValueError(f"{version_dir} was built with {manifest['model_name']}, not {self.model_name}")
+        
+        self.storage = manifest['storage']
+        self.rerank_factor = manifest['rerank_factor']
+        self.index_type = manifest['index_type']
+        self.index_params = manifest['index_params']
+        self.last_build_at = datetime.fromisoformat(manifest['last_build_at']) if manifest['last_build_at'] else None
+        
+        # Copy-on-write: in-place updates stay private to this process
+        self.product_embeddings = model_store.read_array(version_dir, 'vectors', mmap_mode='c')
+        self.product_ids = model_store.read_array(version_dir, 'ids', mmap_mode='c')
+        self._index_rows()
+        self.product_metadata, self.product_hashes = model_store.read_metadata(
+            version_dir, METADATA_STRING_FIELDS, METADATA_NUMBER_FIELDS, METADATA_BOOL_FIELDS
+        )
+        # Read now: the snapshot may be deleted by another process's save later on
+        self._filter_columns = self._snapshot_columns(version_dir)
+        
+        self._index_mapped = read_only
+        flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if read_only else 0
+        self.index = faiss.read_index(os.path.join(version_dir, 'index.faiss'), flags)
+        
+        print(f"Model loaded from {version_dir}")
+    
+    def _ensure_writable_index(self):
+        """Replace a memory-mapped (read-only) index with an in-memory copy before modifying it
+        
+        The copy comes from the open mapping rather than from disk: another
+        process may have saved since and deleted this snapshot. (clone_index
+        would keep viewing the mapped arrays, so round-trip through bytes.)
+        """
+        if self._index_mapped:
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            self._index_mapped = False
+    
+    def _load_pickle(self, model_path: str):
+        """Load a model saved by earlier versions as a pickle plus .faiss file"""
         with open(model_path, 'rb') as f:
             model_data = pickle.load(f)
         
         self.product_embeddings = model_data['product_embeddings']
         self.product_metadata = model_data['product_metadata']
+        self.product_hashes = model_data.get('product_hashes', {})
+        self.last_build_at = model_data.get('last_build_at')
+        self.index_type = model_data.get('index_type', 'flat')
+        self.index_params = model_data.get('index_params', {})
+        self.storage = model_data.get('storage', 'float32')
+        self.rerank_factor = model_data.get('rerank_factor', DEFAULT_RERANK_FACTOR[self.storage])
+        
+        if 'product_ids' in model_data:
+            self.product_ids = model_data['product_ids']
+        else:
+            # Older models stored metadata as a list aligned with the index positions
+            self.product_ids = np.array([m.get('id') for m in self.product_metadata], dtype='int64')
+            self.product_metadata = {int(m.get('id')): m for m in self.product_metadata}
+        self._index_rows()
+        self._filter_columns = None
         
         # Load FAISS index
         faiss_path = model_path.replace('.pkl', '.faiss')
-        if os.path.exists(faiss_path):
+        self.index = None
+        if os.path.exists(faiss_path) and 'product_ids' in model_data:
             self.index = faiss.read_index(faiss_path)
+        else:
+            # Rebuild positional indexes as id-mapped ones
+            self._rebuild_index()
         
         print(f"Model loaded from {model_path}")
 
-def train_similarity_model(products_data: List[Dict], save_path: str = 'models/similarity_model.pkl'):
+def snapshot_root(model_path: str) -> str:
+    """Snapshot directory for a model path (legacy `.pkl` paths drop the extension)"""
+    return model_path[:-len('.pkl')] if model_path.endswith('.pkl') else model_path
+
+def saved_model_exists(model_path: str) -> bool:
+    """Whether a snapshot (or a legacy pickle) exists at `model_path`"""
+    return model_store.has_version(snapshot_root(model_path)) or os.path.isfile(model_path)
+
+def train_similarity_model(products_data: List[Dict], save_path: str = 'models/similarity_model',
+                           embedding_cache_dir: Optional[str] = 'models/embedding_cache'):
     """Train and save a product similarity model"""
-    model = ProductSimilarityModel()
+    model = ProductSimilarityModel(embedding_cache_dir=embedding_cache_dir)
     model.train_on_products(products_data)
-    
-    # Create models directory if it doesn't exist
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
     model.save_model(save_path)
     
     return model
 
+def refresh_similarity_model(
+    changed_products: List[Dict],
+    all_product_ids: Iterable[int],
+    model_path: str = 'models/similarity_model',
+    embedding_cache_dir: Optional[str] = 'models/embedding_cache'
+):
+    """Incrementally update a saved model with changed products and save it back"""
+    model = ProductSimilarityModel(embedding_cache_dir=embedding_cache_dir)
+    if saved_model_exists(model_path):
+        model.load_model(model_path)
+    
+    stats = model.sync_products(changed_products, all_product_ids)
+    print(f"Similarity model refresh: {stats}")
+    
+    model.save_model(model_path)
+    return model
+
 if __name__ == "__main__":
     # Example usage
     sample_products = [
@@ -1,49 +1,122 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session, load_only
+from typing import Dict, List, Optional
+from app.core.cache import product_cache
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.models import Product, Review
+from app.models.models import Product
+from app.services.enrichment_service import get_summaries
+from app.services.review_aggregates import get_review_stats
+from app.services.review_service import ReviewService
 
 router = APIRouter()
 
+def _cache_entry(product: Product, review_stats: Dict, summary: Optional[str]) -> Dict:
+    """Serialize a product into the shape stored in the product cache"""
+    return {
+        "product": jsonable_encoder(product),
+        # Precomputed by the enrichment queue; None until the product is enriched
+        "summary": summary,
+        "review_count": review_stats["review_count"],
+        "review_stats": review_stats
+    }
+
+@router.get("/batch")
+async def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product ids"),
+    db: Session = Depends(get_db)
+):
+    """Get several products at once, in request order"""
+    try:
+        requested = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    
+    if not requested:
+        raise HTTPException(status_code=400, detail="At least one product id is required")
+    if len(requested) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX_IDS} ids per batch"
+        )
+    
+    # Serve hot products from the cache and fetch the rest with one IN query
+    unique_ids = list(dict.fromkeys(requested))
+    entries = product_cache.get_many(unique_ids)
+    missing_ids = [i for i in unique_ids if i not in entries]
+    
+    if missing_ids:
+        products = db.query(Product).filter(Product.id.in_(missing_ids)).all()
+        stats = get_review_stats(db, [p.id for p in products])
+        summaries = get_summaries(db, [p.id for p in products])
+        for product in products:
+            entry = _cache_entry(product, stats[product.id], summaries[product.id])
+            product_cache.set(product.id, entry)
+            entries[product.id] = entry
+    
+    results = []
+    for product_id in requested:
+        entry = entries.get(product_id)
+        if entry is None:
+            results.append({"id": product_id, "found": False})
+        else:
+            results.append({"id": product_id, "found": True, **entry})
+    
+    return {
+        "results": results,
+        "missing": [i for i in unique_ids if i not in entries]
+    }
+
 @router.get("/{product_id}")
 async def get_product(product_id: int, db: Session = Depends(get_db)):
     """Get detailed product information"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    entry = product_cache.get(product_id)
+    if entry is None:
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        
+        entry = _cache_entry(
+            product, get_review_stats(db, [product_id])[product_id], get_summaries(db, [product_id])[product_id]
+        )
+        product_cache.set(product_id, entry)
     
-    # Get reviews for this product
-    reviews = db.query(Review).filter(Review.product_id == product_id).limit(10).all()
+    # Get the latest reviews for this product
+    reviews = ReviewService(db).get_review_page(product_id, "newest", limit=10)["reviews"]
     
     return {
-        "product": product,
+        "product": entry["product"],
+        "summary": entry["summary"],
+        "review_stats": entry["review_stats"],
         "reviews": reviews
     }
 
 @router.get("/{product_id}/reviews")
 async def get_product_reviews(
     product_id: int, 
-    page: int = 1, 
-    limit: int = 20,
+    sort: str = Query("newest", description="Sort by: newest, helpful, rating_high, rating_low, sentiment"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    page: int = Query(1, ge=1, description="Page number (OFFSET paging, ignored when a cursor is given)"),
+    limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
     """Get reviews for a specific product"""
-    offset = (page - 1) * limit
-    reviews = (
-        db.query(Review)
-        .filter(Review.product_id == product_id)
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    review_service = ReviewService(db)
+    try:
+        result = review_service.get_review_page(product_id, sort, limit, cursor, page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    total_reviews = db.query(Review).filter(Review.product_id == product_id).count()
+    # Precomputed total instead of a COUNT(*) per page
+    total_reviews = get_review_stats(db, [product_id])[product_id]["review_count"]
     
     return {
-        "reviews": reviews,
+        "reviews": result["reviews"],
         "total": total_reviews,
-        "page": page,
+        "sort": sort,
+        "next_cursor": result["next_cursor"],
+        "page": None if cursor else page,
         "limit": limit
     }
 
@@ -63,17 +136,45 @@ async def get_price_history(product_id: int, db: Session = Depends(get_db)):
     return {"price_history": price_history}
 
 @router.get("/{product_id}/similar")
-async def get_similar_products(product_id: int, limit: int = 10, db: Session = Depends(get_db)):
+async def get_similar_products(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    category: Optional[str] = Query(None, description="Only return products in this category"),
+    min_price: Optional[float] = Query(None, description="Minimum price filter"),
+    max_price: Optional[float] = Query(None, description="Maximum price filter"),
+    in_stock_only: bool = Query(True, description="Only return in-stock products"),
+    fields: Optional[str] = Query(None, description="Comma-separated product fields to return"),
+    db: Session = Depends(get_db)
+):
     """Get similar products using AI similarity matching"""
     from app.services.ai_service import AIService
+    from app.services.search_service import parse_fields, serialize_product_fields
+    
+    try:
+        field_list = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Get the target product
-    product = db.query(Product).filter(Product.id == product_id).first()
+    # Get the target product (only the columns used for matching)
+    product = (
+        db.query(Product)
+        .options(load_only(Product.id, Product.category, Product.price))
+        .filter(Product.id == product_id)
+        .first()
+    )
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Use AI service to find similar products
     ai_service = AIService()
-    similar_products = await ai_service.find_similar_products(product, limit, db)
+    similar_products = await ai_service.find_similar_products(
+        product, limit, db, field_list,
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock_only=in_stock_only
+    )
+    if field_list:
+        similar_products = [serialize_product_fields(p, field_list) for p in similar_products]
     
     return {"similar_products": similar_products}
\ No newline at end of file
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
-from app.services.search_service import SearchService
+from app.services.search_service import SearchService, parse_fields, serialize_product_fields
 from app.services.ai_service import AIService
 
 router = APIRouter()
@@ -17,9 +17,15 @@ async def search_products(
     sort_by: Optional[str] = Query("relevance", description="Sort by: relevance, price_low, price_high, rating"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    fields: Optional[str] = Query(None, description="Comma-separated product fields to return"),
     db: Session = Depends(get_db)
 ):
     """Search for products using AI-powered search"""
+    try:
+        field_list = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     search_service = SearchService(db)
     ai_service = AIService()
     
@@ -38,7 +44,8 @@ async def search_products(
         min_rating=min_rating,
         sort_by=sort_by,
         page=page,
-        limit=limit
+        limit=limit,
+        fields=field_list
     )
     
     return results
@@ -57,9 +64,17 @@ async def get_search_suggestions(
 async def get_trending_products(
     category: Optional[str] = Query(None, description="Product category"),
     limit: int = Query(10, ge=1, le=50, description="Number of trending products"),
+    fields: Optional[str] = Query(None, description="Comma-separated product fields to return"),
     db: Session = Depends(get_db)
 ):
     """Get trending products based on search patterns and ratings"""
+    try:
+        field_list = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     search_service = SearchService(db)
-    trending = await search_service.get_trending_products(category, limit)
+    trending = await search_service.get_trending_products(category, limit, field_list)
+    if field_list:
+        trending = [serialize_product_fields(p, field_list) for p in trending]
     return {"trending_products": trending}
\ No newline at end of file
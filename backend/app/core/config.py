@@ -15,10 +15,61 @@ class Settings(BaseSettings):
     
     # AI Services
     OPENAI_API_KEY: str = ""
+    OPENAI_API_BASE: str = ""  # OpenAI-compatible endpoint; empty for the OpenAI API
+    OPENAI_COMPLETION_MODEL: str = "gpt-3.5-turbo-instruct"
+    
+    # Batched LLM review sentiment (AIService.analyze_review_sentiments)
+    LLM_SENTIMENT_BATCH_SIZE: int = 20  # reviews per prompt
+    LLM_SENTIMENT_CONCURRENCY: int = 4  # prompts in flight
+    LLM_SENTIMENT_MAX_REVIEW_CHARS: int = 1000
+    LLM_SENTIMENT_CACHE_SIZE: int = 50000
+    LLM_SENTIMENT_CACHE_TTL: int = 7 * 24 * 3600  # seconds
+    
+    # Product similarity (precomputed neighbours)
+    SIMILARITY_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    SIMILARITY_MODEL_PATH: str = "models/similarity_model"  # snapshot directory; a legacy .pkl is still read
+    SIMILARITY_EMBEDDING_CACHE_DIR: str = "models/embedding_cache"
+    SIMILARITY_EMBEDDINGS_DIR: str = "models/embeddings"  # streaming pipeline output for full builds
+    SIMILARITY_CHUNK_SIZE: int = 2000
+    SIMILARITY_BATCH_SIZE: int = 64
+    SIMILARITY_WORKERS: int = 1
+    SIMILARITY_INDEX_TYPE: str = "flat"  # flat, hnsw or ivf (see ai-ml/benchmark_ann.py)
+    SIMILARITY_STORAGE: str = "float32"  # float32, float16, int8 or pq; lossy modes rerank with float16
+    SIMILAR_PRODUCTS_K: int = 50
+    
+    # Review sentiment backfill (local model, see backfill_review_sentiment.py)
+    SENTIMENT_MODEL_NAME: str = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+    SENTIMENT_BATCH_SIZE: int = 32
+    SENTIMENT_BACKEND: str = "pytorch"  # pytorch, int8, onnx or onnx-int8 (see ai-ml/benchmark_sentiment.py)
+    SENTIMENT_ONNX_DIR: str = "models/sentiment_onnx"
+    SENTIMENT_TIERED: bool = False  # lexicon scorer for clear-cut reviews, model for the rest
+    SENTIMENT_UNCERTAINTY_BAND: float = 0.5
+    SENTIMENT_WORKERS: int = 2
+    SENTIMENT_CHUNK_SIZE: int = 2000
+    SENTIMENT_CHECKPOINT_PATH: str = "models/sentiment_backfill.json"
+    
+    # Near-duplicate detection (MinHash/LSH over brand, name and key attributes)
+    DEDUP_SIMILARITY_THRESHOLD: float = 0.7
+    
+    # Background AI enrichment (features and summaries, see enrich_products.py)
+    ENRICHMENT_ON_INGEST: bool = True
+    ENRICHMENT_CONCURRENCY: int = 4
+    ENRICHMENT_REQUESTS_PER_MINUTE: int = 60  # LLM calls; each job makes two
+    ENRICHMENT_MAX_ATTEMPTS: int = 5
+    ENRICHMENT_RETRY_BASE_SECONDS: float = 30.0  # doubled after every failed attempt
+    ENRICHMENT_LEASE_SECONDS: int = 600  # running jobs older than this are requeued (crashed worker)
     
     # Redis (for caching and task queue)
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Product cache (in-process, per worker)
+    PRODUCT_CACHE_SIZE: int = 5000
+    PRODUCT_CACHE_TTL: int = 300  # seconds
+    PRODUCT_BATCH_MAX_IDS: int = 100
+    
+    # Health checks
+    HEALTH_STATS_REFRESH_SECONDS: int = 30
+    
     # Scraping
     USER_AGENT: str = "AI-Product-Search-Engine/1.0"
     SCRAPING_DELAY: int = 1  # seconds between requests
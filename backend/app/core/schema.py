@@ -0,0 +1,42 @@
+"""
+Schema Setup
+Create missing tables and indexes on existing databases and fill derived
+tables that are new, so tables added by later versions work on databases
+created before them. Safe to run on every start.
+"""
+
+from sqlalchemy import exists, inspect
+from typing import List
+from app.core.database import Base, SessionLocal, engine
+from app.models.models import Review, ReviewAggregate
+from app.services.review_aggregates import reconcile_review_aggregates
+
+def ensure_schema() -> List[str]:
+    """Create missing tables and indexes; returns the names of the tables created"""
+    existing = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    
+    # create_all skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    _backfill_review_aggregates()
+    return [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+
+def _backfill_review_aggregates():
+    """Count existing reviews into an empty review_aggregates table
+    
+    Review writes only apply deltas, so without this a product with N
+    reviews would start from a count of 1 on its next review.
+    """
+    db = SessionLocal()
+    try:
+        if db.query(exists().where(ReviewAggregate.product_id.isnot(None))).scalar():
+            return
+        if not db.query(exists().where(Review.id.isnot(None))).scalar():
+            return
+        result = reconcile_review_aggregates(db)
+        print(f"Backfilled review aggregates for {result['corrected']} products")
+    finally:
+        db.close()
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, JSON
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Float, Text, DateTime, Boolean, JSON, Index, LargeBinary, UniqueConstraint
+)
+from sqlalchemy.orm import column_property
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -28,16 +31,26 @@ class Review(Base):
     __tablename__ = "reviews"
     
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, nullable=False, index=True)
+    # active_history: load the previous value on change, even when expired, so the
+    # review_aggregates listener can take the review off its old product
+    product_id = column_property(Column(Integer, nullable=False, index=True), active_history=True)
     reviewer_name = Column(String(100))
-    rating = Column(Float, nullable=False)
+    rating = column_property(Column(Float, nullable=False), active_history=True)
     review_text = Column(Text)
-    sentiment_score = Column(Float)  # AI-analyzed sentiment
+    sentiment_score = column_property(Column(Float), active_history=True)  # AI-analyzed sentiment
     helpful_votes = Column(Integer, default=0)
     verified_purchase = Column(Boolean, default=False)
     review_date = Column(DateTime)
     source_website = Column(String(100), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Keyset paging indexes: (product_id, sort key, id) for each review sort mode
+    __table_args__ = (
+        Index("ix_reviews_product_date", "product_id", "review_date", "id"),
+        Index("ix_reviews_product_helpful", "product_id", "helpful_votes", "id"),
+        Index("ix_reviews_product_rating", "product_id", "rating", "id"),
+        Index("ix_reviews_product_sentiment", "product_id", "sentiment_score", "id"),
+    )
 
 class SearchQuery(Base):
     __tablename__ = "search_queries"
@@ -57,4 +70,83 @@ class PriceHistory(Base):
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, nullable=False, index=True)
     price = Column(Float, nullable=False)
-    recorded_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ReviewAggregate(Base):
+    __tablename__ = "review_aggregates"
+    
+    # Running totals per product, maintained on review writes (see app/services/review_aggregates.py)
+    product_id = Column(Integer, primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    sentiment_count = Column(Integer, nullable=False, default=0)
+    sentiment_sum = Column(Float, nullable=False, default=0.0)
+    positive_count = Column(Integer, nullable=False, default=0)
+    neutral_count = Column(Integer, nullable=False, default=0)
+    negative_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ProductNeighbor(Base):
+    __tablename__ = "product_neighbors"
+    
+    # Precomputed embedding neighbours, written by build_similar_products.py
+    product_id = Column(Integer, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    neighbor_id = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+    version = Column(Integer, nullable=False, index=True)
+
+class ReviewSentimentVersion(Base):
+    __tablename__ = "review_sentiment_versions"
+    
+    # Which model, backend and tiering produced each Review.sentiment_score
+    # (scorer_version in backfill_review_sentiment.py)
+    review_id = Column(Integer, primary_key=True)
+    model_name = Column(String(200), nullable=False, index=True)
+    scored_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ProductSignature(Base):
+    __tablename__ = "product_signatures"
+    
+    # MinHash signature and duplicate cluster of each product (see app/services/dedup_service.py)
+    product_id = Column(Integer, primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+    canonical_id = Column(Integer, nullable=False, index=True)  # equals product_id for canonical products
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ProductLSHBucket(Base):
+    __tablename__ = "product_lsh_buckets"
+    
+    # One row per (LSH band, bucket hash) of each signature; candidates share a bucket
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    product_id = Column(Integer, primary_key=True, index=True)
+
+class ProductEnrichment(Base):
+    __tablename__ = "product_enrichments"
+    
+    # LLM summary of each product and the content it was generated from (see app/services/enrichment_service.py);
+    # extracted features are written to Product.features
+    product_id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False)
+    summary = Column(Text)
+    enriched_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class EnrichmentJob(Base):
+    __tablename__ = "enrichment_jobs"
+    
+    # Persistent enrichment queue, processed by enrich_products.py; one job per (product, content hash)
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done or failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=False)  # retry backoff; naive UTC
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("product_id", "content_hash", name="uq_enrichment_jobs_product_hash"),
+        Index("ix_enrichment_jobs_status_run_after", "status", "run_after"),
+    )
@@ -1,16 +1,65 @@
 import openai
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy import exists, func
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.models.models import Product, Review
+from app.core.database import SessionLocal
+from app.models.models import Product, Review, ProductNeighbor
+from app.services.catalog_stats import catalog_stats
 import asyncio
+import hashlib
 import json
 
+def similarity_index_stats() -> Dict:
+    """Version and coverage of the precomputed neighbour table"""
+    db = SessionLocal()
+    try:
+        version, products = db.query(
+            func.max(ProductNeighbor.version),
+            func.count(func.distinct(ProductNeighbor.product_id))
+        ).one()
+        return {"version": version, "products_indexed": products}
+    finally:
+        db.close()
+
+catalog_stats.register_source("similarity_index", similarity_index_stats)
+
+_client: Optional[openai.AsyncOpenAI] = None
+
+def openai_client() -> openai.AsyncOpenAI:
+    """Shared async client, so every AIService instance reuses one connection pool"""
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_API_BASE or None)
+    return _client
+
+# LLM review sentiment keyed by a hash of model and review text; a text's score never changes
+review_sentiment_cache = TTLCache(settings.LLM_SENTIMENT_CACHE_SIZE, settings.LLM_SENTIMENT_CACHE_TTL)
+
+def review_sentiment_key(review_text: str) -> str:
+    return hashlib.sha256(f"{settings.OPENAI_COMPLETION_MODEL}\n{review_text.strip()}".encode("utf-8")).hexdigest()
+
+def review_prompt_text(review_text: str) -> str:
+    """Review as sent to the model; single and batched prompts see the same text"""
+    return review_text.strip()[:settings.LLM_SENTIMENT_MAX_REVIEW_CHARS]
+
+def parse_scores(completion: str, count: int) -> Optional[List[float]]:
+    """The JSON array of `count` scores in a batched completion, clamped to [-1, 1] (None if malformed)"""
+    start, end = completion.find("["), completion.rfind("]")
+    if start == -1 or end < start:
+        return None
+    try:
+        scores = json.loads(completion[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(scores, list) or len(scores) != count:
+        return None
+    if not all(isinstance(score, (int, float)) and not isinstance(score, bool) for score in scores):
+        return None
+    return [max(-1.0, min(1.0, float(score))) for score in scores]
+
 class AIService:
-    def __init__(self):
-        if settings.OPENAI_API_KEY:
-            openai.api_key = settings.OPENAI_API_KEY
-    
     async def enhance_search_query(self, query: str, category: Optional[str] = None) -> str:
         """Use AI to enhance and expand search queries"""
         try:
@@ -31,8 +80,8 @@ class AIService:
             Enhanced query:
             """
             
-            response = await openai.Completion.acreate(
-                engine="text-davinci-003",
+            response = await openai_client().completions.create(
+                model=settings.OPENAI_COMPLETION_MODEL,
                 prompt=prompt,
                 max_tokens=100,
                 temperature=0.3
@@ -52,63 +101,184 @@ class AIService:
             if not settings.OPENAI_API_KEY:
                 return 0.0
             
+            key = review_sentiment_key(review_text)
+            cached = review_sentiment_cache.get(key)
+            if cached is not None:
+                return cached
+            
             prompt = f"""
             Analyze the sentiment of this product review and return a score between -1 and 1.
             -1 = very negative, 0 = neutral, 1 = very positive
             
-            Review: "{review_text}"
+            Review: "{review_prompt_text(review_text)}"
             
             Return only the numerical score:
             """
             
-            response = await openai.Completion.acreate(
-                engine="text-davinci-003",
+            response = await openai_client().completions.create(
+                model=settings.OPENAI_COMPLETION_MODEL,
                 prompt=prompt,
                 max_tokens=10,
                 temperature=0.1
             )
             
             score = float(response.choices[0].text.strip())
-            return max(-1, min(1, score))  # Ensure score is within bounds
+            score = max(-1, min(1, score))  # Ensure score is within bounds
+            review_sentiment_cache.set(key, score)
+            return score
             
         except Exception as e:
             print(f"Sentiment analysis error: {e}")
             return 0.0
     
-    async def find_similar_products(self, product: Product, limit: int, db: Session) -> List[Product]:
+    async def analyze_review_sentiments(self, review_texts: List[str], batch_size: Optional[int] = None) -> List[float]:
+        """Sentiment scores for many reviews, packing up to `batch_size` into each prompt
+        
+        Cached and duplicate texts are not sent again. A batch whose reply is
+        not a JSON array of the right length is re-scored one review per call.
+        """
+        batch_size = batch_size or settings.LLM_SENTIMENT_BATCH_SIZE
+        scores = [0.0] * len(review_texts)
+        if not settings.OPENAI_API_KEY:
+            return scores
+        
+        pending = {}  # cache key -> (text, positions)
+        for i, text in enumerate(review_texts):
+            if not text or not text.strip():
+                continue
+            key = review_sentiment_key(text)
+            cached = review_sentiment_cache.get(key)
+            if cached is not None:
+                scores[i] = cached
+            else:
+                pending.setdefault(key, (text, []))[1].append(i)
+        
+        keys = list(pending)
+        semaphore = asyncio.Semaphore(settings.LLM_SENTIMENT_CONCURRENCY)
+        
+        async def score_one(key: str) -> float:
+            async with semaphore:
+                return await self.analyze_review_sentiment(pending[key][0])
+        
+        async def score_batch(batch_keys: List[str]):
+            async with semaphore:
+                batch_scores = await self._score_review_batch([pending[key][0] for key in batch_keys])
+            if batch_scores is None:
+                # Unparseable reply: score one by one, each request taking its own slot
+                batch_scores = await asyncio.gather(*(score_one(key) for key in batch_keys))
+            for key, score in zip(batch_keys, batch_scores):
+                for i in pending[key][1]:
+                    scores[i] = score
+        
+        await asyncio.gather(*(score_batch(keys[i:i + batch_size]) for i in range(0, len(keys), batch_size)))
+        return scores
+    
+    async def _score_review_batch(self, texts: List[str]) -> Optional[List[float]]:
+        """Score reviews with one request; None when the reply cannot be parsed"""
+        if len(texts) == 1:
+            return [await self.analyze_review_sentiment(texts[0])]
+        
+        prompt = f"""
+        Analyze the sentiment of each product review and give a score between -1 and 1.
+        -1 = very negative, 0 = neutral, 1 = very positive
+        
+        Reviews (JSON array):
+        {json.dumps([review_prompt_text(text) for text in texts])}
+        
+        Return only a JSON array of {len(texts)} numbers, one score per review in the same order:
+        """
+        try:
+            response = await openai_client().completions.create(
+                model=settings.OPENAI_COMPLETION_MODEL,
+                prompt=prompt,
+                max_tokens=6 * len(texts) + 10,  # ~6 tokens per score ("-0.75, ") plus the brackets
+                temperature=0.1
+            )
+        except Exception as e:
+            print(f"Batch sentiment analysis error: {e}")
+            return [0.0] * len(texts)
+        
+        batch_scores = parse_scores(response.choices[0].text.strip(), len(texts))
+        if batch_scores is None:
+            print(f"Batch sentiment reply could not be parsed; scoring {len(texts)} reviews one by one")
+            return None
+        
+        for text, score in zip(texts, batch_scores):
+            review_sentiment_cache.set(review_sentiment_key(text), score)
+        return batch_scores
+    
+    async def find_similar_products(
+        self,
+        product: Product,
+        limit: int,
+        db: Session,
+        fields: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock_only: bool = True
+    ) -> List[Product]:
         """Find similar products using AI similarity matching"""
+        from app.services.search_service import product_load_options
+        
         try:
-            # Simple similarity based on category, brand, and price range
-            similar_products = (
+            # Embedding neighbours precomputed by build_similar_products.py;
+            # a single primary-key range lookup with filters applied on the join
+            query = (
                 db.query(Product)
+                .options(*product_load_options(fields))
+                .join(ProductNeighbor, ProductNeighbor.neighbor_id == Product.id)
+                .filter(ProductNeighbor.product_id == product.id)
+            )
+            if in_stock_only:
+                query = query.filter(Product.in_stock == True)
+            if category:
+                query = query.filter(Product.category == category)
+            if min_price is not None:
+                query = query.filter(Product.price >= min_price)
+            if max_price is not None:
+                query = query.filter(Product.price <= max_price)
+            
+            similar_products = query.order_by(ProductNeighbor.rank).limit(limit).all()
+            if similar_products:
+                return similar_products
+            
+            # Neighbours exist but none pass the filters: that is the answer
+            indexed = db.query(exists().where(ProductNeighbor.product_id == product.id)).scalar()
+            if indexed:
+                return []
+            
+            # Product not in the neighbour table yet (e.g. ingested after the last
+            # build): fall back to same category and a similar price range
+            fallback = (
+                db.query(Product)
+                .options(*product_load_options(fields))
                 .filter(
                     Product.id != product.id,
-                    Product.category == product.category,
-                    Product.in_stock == True,
-                    Product.price >= product.price * 0.7,
-                    Product.price <= product.price * 1.3
+                    Product.category == (category or product.category),
+                    Product.price >= (min_price if min_price is not None else product.price * 0.7),
+                    Product.price <= (max_price if max_price is not None else product.price * 1.3)
                 )
-                .order_by(Product.rating.desc())
-                .limit(limit)
-                .all()
             )
+            if in_stock_only:
+                fallback = fallback.filter(Product.in_stock == True)
             
-            # TODO: Implement more sophisticated AI-based similarity
-            # This could include:
-            # - Text similarity using embeddings
-            # - Feature matching
-            # - User behavior analysis
-            
-            return similar_products
+            return fallback.order_by(Product.rating.desc()).limit(limit).all()
             
         except Exception as e:
             print(f"Similar products error: {e}")
-            return []
+            raise
     
-    async def extract_product_features(self, product_text: str) -> Dict:
-        """Extract key features from product description using AI"""
+    async def extract_product_features(self, product_text: str, strict: bool = False) -> Dict:
+        """Extract key features from product description using AI
+        
+        With strict=True errors are raised instead of returning {} (used by
+        the enrichment queue to retry).
+        """
         try:
             if not settings.OPENAI_API_KEY:
+                if strict:
+                    raise RuntimeError("OPENAI_API_KEY is not set")
                 return {}
             
             prompt = f"""
@@ -120,8 +290,8 @@ class AIService:
             Return JSON format:
             """
             
-            response = await openai.Completion.acreate(
-                engine="text-davinci-003",
+            response = await openai_client().completions.create(
+                model=settings.OPENAI_COMPLETION_MODEL,
                 prompt=prompt,
                 max_tokens=200,
                 temperature=0.2
@@ -131,13 +301,20 @@ class AIService:
             return json.loads(features_json)
             
         except Exception as e:
+            if strict:
+                raise
             print(f"Feature extraction error: {e}")
             return {}
     
-    async def generate_product_summary(self, product: Product, reviews: List[Review]) -> str:
-        """Generate AI-powered product summary based on product details and reviews"""
+    async def generate_product_summary(self, product: Product, reviews: List[Review], strict: bool = False) -> str:
+        """Generate AI-powered product summary based on product details and reviews
+        
+        With strict=True errors are raised instead of returning a fallback summary.
+        """
         try:
             if not settings.OPENAI_API_KEY:
+                if strict:
+                    raise RuntimeError("OPENAI_API_KEY is not set")
                 return f"{product.name} - {product.description[:200]}..."
             
             # Prepare review samples
@@ -158,8 +335,8 @@ class AIService:
             Generate a 2-3 sentence summary highlighting key benefits and customer sentiment:
             """
             
-            response = await openai.Completion.acreate(
-                engine="text-davinci-003",
+            response = await openai_client().completions.create(
+                model=settings.OPENAI_COMPLETION_MODEL,
                 prompt=prompt,
                 max_tokens=150,
                 temperature=0.4
@@ -168,5 +345,7 @@ class AIService:
             return response.choices[0].text.strip()
             
         except Exception as e:
+            if strict:
+                raise
             print(f"Summary generation error: {e}")
             return f"{product.name} - A {product.category} product from {product.brand}."
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Catalog Stats
+Cached catalog statistics for the health endpoints, refreshed in the background
+so probes never touch the database
+"""
+
+from sqlalchemy import func
+from typing import Callable, Dict, Optional
+from app.core.cache import product_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import Product
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class CatalogStats:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.snapshot: Optional[Dict] = None
+        self.last_refresh: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        # Extra named stats (e.g. index versions) contributed by other components
+        self._sources: Dict[str, Callable[[], object]] = {
+            "product_cache": product_cache.stats
+        }
+    
+    def register_source(self, name: str, source: Callable[[], object]):
+        """Include the result of `source()` in every snapshot under `name`"""
+        self._sources[name] = source
+    
+    def refresh(self):
+        """Recompute the snapshot (blocking; runs in a worker thread)"""
+        db = SessionLocal()
+        try:
+            product_count, last_created, last_updated = db.query(
+                func.count(Product.id),
+                func.max(Product.created_at),
+                func.max(Product.updated_at)
+            ).one()
+        finally:
+            db.close()
+        
+        last_ingest = max((t for t in (last_created, last_updated) if t is not None), default=None)
+        
+        extras = {}
+        for name, source in self._sources.items():
+            try:
+                extras[name] = source()
+            except Exception as e:
+                extras[name] = {"error": str(e)}
+        
+        self.snapshot = {
+            "products_count": product_count,
+            "last_ingest_at": last_ingest.isoformat() if last_ingest else None,
+            **extras
+        }
+        self.last_refresh = time.time()
+        self.last_error = None
+    
+    def is_ready(self) -> bool:
+        """Ready once a snapshot exists and the refresher has not stalled"""
+        if self.snapshot is None or self.last_refresh is None:
+            return False
+        return time.time() - self.last_refresh <= self.refresh_seconds * 3
+    
+    def status(self) -> Dict:
+        """Snapshot plus its age, for the readiness endpoint"""
+        return {
+            "stats": self.snapshot,
+            "stats_age_seconds": round(time.time() - self.last_refresh, 1) if self.last_refresh else None,
+            "last_error": self.last_error
+        }
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Catalog stats refresh error: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+    
+    def start(self):
+        """Start the background refresher on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self):
+        """Cancel the background refresher"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+catalog_stats = CatalogStats(settings.HEALTH_STATS_REFRESH_SECONDS)
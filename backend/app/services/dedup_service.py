@@ -0,0 +1,202 @@
+"""
+Near-Duplicate Detection
+MinHash signatures over normalized brand, name and key attributes, with LSH
+banding so duplicate candidates come from an index lookup instead of a scan
+of the catalog. Duplicates are clustered under the oldest product's id.
+"""
+
+from sqlalchemy import exists, tuple_
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.models.models import Product, ProductSignature, ProductLSHBucket
+import hashlib
+import numpy as np
+import re
+import unicodedata
+import zlib
+
+NUM_PERM = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS  # candidate threshold ~ (1 / BANDS) ** (1 / ROWS_PER_BAND) = 0.42
+
+SHINGLE_SIZE = 3
+
+# Feature keys that distinguish variants of the same product line
+KEY_ATTRIBUTES = ("size", "volume", "weight", "color", "shade", "model")
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1729)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_UNIT_PATTERNS = (
+    (re.compile(r"\bfl\.?\s*oz\b"), "oz"),
+    (re.compile(r"(\d)\s+(ml|oz|g|kg|mg|lb|l)\b"), r"\1\2"),
+)
+
+def normalize_product_text(name: Optional[str], brand: Optional[str], features: Optional[Dict] = None) -> str:
+    """Lowercase, accent-free, order-insensitive token string for brand, name and key attributes"""
+    parts = [brand or "", name or ""]
+    if isinstance(features, dict):
+        parts.extend(str(features[key]) for key in KEY_ATTRIBUTES if features.get(key) is not None)
+    text = unicodedata.normalize("NFKD", " ".join(parts))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    for pattern, replacement in _UNIT_PATTERNS:
+        text = pattern.sub(replacement, text)
+    tokens = re.sub(r"[^a-z0-9.]+", " ", text).replace(". ", " ").split()
+    # Sorted unique tokens: word order and a repeated brand do not matter
+    return " ".join(sorted(set(token.strip(".") for token in tokens if token.strip("."))))
+
+def shingles(text: str) -> Set[str]:
+    """Character n-grams of the normalized text (robust to typos and spacing)"""
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set: Iterable[str]) -> np.ndarray:
+    """NUM_PERM-value MinHash signature of a shingle set"""
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingle_set], dtype=np.uint64)
+    if not len(hashes):
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint32)
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+def band_buckets(signature: np.ndarray) -> List[Tuple[int, int]]:
+    """(band, bucket hash) pairs; similar signatures share at least one with high probability"""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        buckets.append((band, int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big", signed=True)))
+    return buckets
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """MinHash estimate of the Jaccard similarity of two shingle sets"""
+    return float(np.mean(a == b))
+
+def _numbers(text: str) -> Set[str]:
+    return set(re.findall(r"\d+(?:\.\d+)?[a-z]*", text))
+
+def _brands_match(a: Optional[str], b: Optional[str]) -> bool:
+    """Unknown brands match anything; otherwise one brand's tokens must contain the other's ("Maybelline" / "Maybelline New York")"""
+    a_tokens, b_tokens = set(normalize_product_text(None, a).split()), set(normalize_product_text(None, b).split())
+    return not a_tokens or not b_tokens or a_tokens <= b_tokens or b_tokens <= a_tokens
+
+def canonical_products_only():
+    """Filter clause excluding products merged into another product's cluster
+    
+    Products without a signature row (not clustered yet) count as canonical.
+    """
+    return ~exists().where(
+        ProductSignature.product_id == Product.id,
+        ProductSignature.canonical_id != Product.id
+    )
+
+class DedupService:
+    def __init__(self, db: Session, threshold: float = settings.DEDUP_SIMILARITY_THRESHOLD):
+        self.db = db
+        self.threshold = threshold
+    
+    def _is_duplicate(self, product: Product, text: str, signature: np.ndarray,
+                      candidate: Product, candidate_signature: np.ndarray) -> bool:
+        if estimated_similarity(signature, candidate_signature) < self.threshold:
+            return False
+        # Different brands or different sizes/model numbers are different products
+        if not _brands_match(product.brand, candidate.brand):
+            return False
+        numbers = _numbers(text)
+        candidate_numbers = _numbers(
+            normalize_product_text(candidate.name, candidate.brand, candidate.features)
+        )
+        return not (numbers and candidate_numbers and numbers != candidate_numbers)
+    
+    def find_duplicates(self, product: Product, text: str, signature: np.ndarray) -> List[ProductSignature]:
+        """Signatures of already indexed products that are near-duplicates of `product`"""
+        candidate_ids = {
+            product_id for (product_id,) in self.db.query(ProductLSHBucket.product_id).filter(
+                tuple_(ProductLSHBucket.band, ProductLSHBucket.bucket).in_(band_buckets(signature)),
+                ProductLSHBucket.product_id != product.id
+            ).distinct()
+        }
+        if not candidate_ids:
+            return []
+        
+        rows = self.db.query(Product, ProductSignature).join(
+            ProductSignature, ProductSignature.product_id == Product.id
+        ).filter(Product.id.in_(candidate_ids)).all()
+        return [
+            candidate_signature for candidate, candidate_signature in rows
+            if self._is_duplicate(
+                product, text, signature,
+                candidate, np.frombuffer(candidate_signature.signature, dtype=np.uint32)
+            )
+        ]
+    
+    def index_product(self, product: Product) -> int:
+        """Store the product's signature and buckets and assign its cluster; returns the canonical id
+        
+        The product must have an id (flush first). Matching clusters are merged
+        under the smallest canonical id. The caller commits.
+        """
+        text = normalize_product_text(product.name, product.brand, product.features)
+        signature = minhash(shingles(text))
+        duplicates = self.find_duplicates(product, text, signature)
+        
+        canonical_ids = {row.canonical_id for row in duplicates}
+        canonical_id = min(canonical_ids | {product.id})
+        merged = canonical_ids - {canonical_id}
+        if merged:
+            self.db.query(ProductSignature).filter(ProductSignature.canonical_id.in_(merged)).update(
+                {ProductSignature.canonical_id: canonical_id}, synchronize_session=False
+            )
+        
+        self.db.query(ProductLSHBucket).filter(ProductLSHBucket.product_id == product.id).delete(
+            synchronize_session=False
+        )
+        self.db.merge(ProductSignature(
+            product_id=product.id, signature=signature.tobytes(), canonical_id=canonical_id
+        ))
+        self.db.add_all(
+            ProductLSHBucket(band=band, bucket=bucket, product_id=product.id)
+            for band, bucket in band_buckets(signature)
+        )
+        self.db.flush()
+        return canonical_id
+    
+    def index_unprocessed(self, batch_size: int = 500, rebuild: bool = False) -> Dict[str, int]:
+        """Index products without a signature in id order (all products with rebuild=True)"""
+        if rebuild:
+            self.db.query(ProductLSHBucket).delete(synchronize_session=False)
+            self.db.query(ProductSignature).delete(synchronize_session=False)
+            self.db.commit()
+        
+        indexed = duplicates = 0
+        last_id = 0
+        while True:
+            batch = self.db.query(Product).filter(
+                Product.id > last_id,
+                ~exists().where(ProductSignature.product_id == Product.id)
+            ).order_by(Product.id).limit(batch_size).all()
+            if not batch:
+                break
+            for product in batch:
+                if self.index_product(product) != product.id:
+                    duplicates += 1
+                indexed += 1
+            last_id = batch[-1].id
+            self.db.commit()
+        
+        return {"indexed": indexed, "duplicates": duplicates}
+    
+    def cluster_of(self, product_id: int) -> List[int]:
+        """Ids in the product's duplicate cluster (canonical first), or [product_id] if it has none"""
+        canonical_id = self.db.query(ProductSignature.canonical_id).filter(
+            ProductSignature.product_id == product_id
+        ).scalar()
+        if canonical_id is None:
+            return [product_id]
+        members = [
+            member_id for (member_id,) in self.db.query(ProductSignature.product_id).filter(
+                ProductSignature.canonical_id == canonical_id
+            ).order_by(ProductSignature.product_id)
+        ]
+        return [canonical_id] + [m for m in members if m != canonical_id]
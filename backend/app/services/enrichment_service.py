@@ -0,0 +1,332 @@
+"""
+Background AI Enrichment
+Persistent queue of LLM enrichment jobs (extracted features and a summary per
+product), processed outside request paths by enrich_products.py with bounded
+concurrency, a request rate limit and retries with exponential backoff.
+
+Jobs are keyed by a hash of the content sent to the model, so a product whose
+text has not changed is never enriched twice. Product pages read the stored
+results (Product.features and product_enrichments.summary) without an LLM call.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+from app.core.cache import product_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import Product, Review, ProductEnrichment, EnrichmentJob
+from app.services.catalog_stats import catalog_stats
+from app.services.dedup_service import DedupService
+import asyncio
+import hashlib
+import json
+
+# Most helpful reviews passed to the summary prompt
+SUMMARY_REVIEW_SAMPLE = 5
+
+def product_text(product: Product) -> str:
+    """Text the feature extraction prompt sees"""
+    return "\n".join(part for part in (product.name, product.brand, product.description) if part)
+
+def enrichment_content(product: Product, reviews: List[Review]) -> Dict:
+    """Everything that shapes the enrichment output
+    
+    Price, rating and review count move constantly and are shown next to the
+    summary anyway, so they do not trigger a new enrichment.
+    """
+    return {
+        "name": product.name,
+        "brand": product.brand,
+        "category": product.category,
+        "description": product.description,
+        "reviews": [r.review_text for r in reviews]
+    }
+
+def content_hash(content: Dict) -> str:
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+def summary_reviews(db: Session, product_ids: Iterable[int]) -> Dict[int, List[Review]]:
+    """The SUMMARY_REVIEW_SAMPLE most helpful reviews with text for each product, in one query"""
+    product_ids = list(product_ids)
+    samples = {product_id: [] for product_id in product_ids}
+    if not product_ids:
+        return samples
+    
+    ranked = db.query(
+        Review.id.label("id"),
+        func.row_number().over(
+            partition_by=Review.product_id,
+            order_by=(Review.helpful_votes.desc(), Review.id)
+        ).label("rank")
+    ).filter(
+        Review.product_id.in_(product_ids),
+        Review.review_text.isnot(None),
+        Review.review_text != ""
+    ).subquery()
+    
+    reviews = (
+        db.query(Review)
+        .join(ranked, ranked.c.id == Review.id)
+        .filter(ranked.c.rank <= SUMMARY_REVIEW_SAMPLE)
+        .order_by(Review.product_id, ranked.c.rank)
+        .all()
+    )
+    for review in reviews:
+        samples[review.product_id].append(review)
+    return samples
+
+def get_summaries(db: Session, product_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+    """Stored summaries by product id (None for products not enriched yet)"""
+    product_ids = list(product_ids)
+    summaries = {product_id: None for product_id in product_ids}
+    if product_ids:
+        rows = db.query(ProductEnrichment.product_id, ProductEnrichment.summary).filter(
+            ProductEnrichment.product_id.in_(product_ids)
+        ).all()
+        summaries.update(rows)
+    return summaries
+
+class EnrichmentQueue:
+    """Enqueue, claim and settle enrichment jobs; the caller commits"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def enqueue(self, product: Product, reviews: Optional[List[Review]] = None,
+                current_hash: Optional[str] = None) -> Optional[EnrichmentJob]:
+        """Queue the product unless its current content is already enriched; returns the job
+        
+        The product must have an id (flush first). Pending jobs for older
+        content of the same product are superseded.
+        """
+        if reviews is None:
+            reviews = summary_reviews(self.db, [product.id])[product.id]
+        digest = content_hash(enrichment_content(product, reviews))
+        if current_hash is None:
+            enrichment = self.db.get(ProductEnrichment, product.id)
+            current_hash = enrichment.content_hash if enrichment is not None else None
+        if digest == current_hash:
+            return None
+        
+        self.db.query(EnrichmentJob).filter(
+            EnrichmentJob.product_id == product.id,
+            EnrichmentJob.content_hash != digest,
+            EnrichmentJob.status == "pending"
+        ).delete(synchronize_session=False)
+        job = self.db.query(EnrichmentJob).filter(
+            EnrichmentJob.product_id == product.id,
+            EnrichmentJob.content_hash == digest
+        ).first()
+        if job is not None:
+            # Content went back to an earlier version; a failed job stays failed until retry_failed()
+            if job.status == "done":
+                job.status, job.attempts, job.run_after = "pending", 0, datetime.utcnow()
+            return job
+        
+        job = EnrichmentJob(
+            product_id=product.id, content_hash=digest, status="pending", attempts=0, run_after=datetime.utcnow()
+        )
+        self.db.add(job)
+        self.db.flush()
+        return job
+    
+    def enqueue_stale(self, chunk_size: int = 500) -> Dict[str, int]:
+        """Queue every product whose content changed since it was last enriched, in id order"""
+        checked = enqueued = 0
+        last_id = 0
+        while True:
+            products = self.db.query(Product).filter(Product.id > last_id).order_by(Product.id).limit(chunk_size).all()
+            if not products:
+                break
+            ids = [p.id for p in products]
+            reviews = summary_reviews(self.db, ids)
+            hashes = dict(self.db.query(ProductEnrichment.product_id, ProductEnrichment.content_hash).filter(
+                ProductEnrichment.product_id.in_(ids)
+            ).all())
+            for product in products:
+                # "" (never a digest) marks products without an enrichment, skipping the lookup
+                job = self.enqueue(product, reviews[product.id], hashes.get(product.id, ""))
+                if job is not None and job.status != "failed":
+                    enqueued += 1
+            checked += len(products)
+            last_id = ids[-1]
+            self.db.commit()
+        
+        return {"checked": checked, "enqueued": enqueued}
+    
+    def claim(self, limit: int) -> List[int]:
+        """Lease up to `limit` due jobs to this worker; returns their ids
+        
+        Each claim counts as an attempt and sets run_after to the lease
+        expiry, so jobs of a crashed worker become due again.
+        """
+        now = datetime.utcnow()
+        due = and_(EnrichmentJob.status.in_(("pending", "running")), EnrichmentJob.run_after <= now)
+        candidates = [
+            job_id for (job_id,) in self.db.query(EnrichmentJob.id).filter(due)
+            .order_by(EnrichmentJob.run_after, EnrichmentJob.id).limit(limit)
+        ]
+        claimed = []
+        for job_id in candidates:
+            # Conditional update: another worker may have claimed it meanwhile
+            updated = self.db.query(EnrichmentJob).filter(EnrichmentJob.id == job_id, due).update({
+                EnrichmentJob.status: "running",
+                EnrichmentJob.attempts: EnrichmentJob.attempts + 1,
+                EnrichmentJob.run_after: now + timedelta(seconds=settings.ENRICHMENT_LEASE_SECONDS)
+            }, synchronize_session=False)
+            if updated:
+                claimed.append(job_id)
+        self.db.commit()
+        return claimed
+    
+    def complete(self, job: EnrichmentJob, product: Product, digest: str, features: Dict, summary: str):
+        """Store the results; extracted features are merged over the scraped ones"""
+        product.features = {**(product.features or {}), **features}
+        # Extracted size/colour feed the duplicate signature
+        DedupService(self.db).index_product(product)
+        self.db.merge(ProductEnrichment(product_id=product.id, content_hash=digest, summary=summary))
+        job.status, job.last_error = "done", None
+        product_cache.invalidate(product.id)
+    
+    def fail(self, job: EnrichmentJob, error: Exception) -> bool:
+        """Schedule a retry with exponential backoff; returns False once attempts are exhausted"""
+        job.last_error = f"{type(error).__name__}: {error}"[:2000]
+        if job.attempts >= settings.ENRICHMENT_MAX_ATTEMPTS:
+            job.status = "failed"
+            return False
+        job.status = "pending"
+        job.run_after = datetime.utcnow() + timedelta(
+            seconds=settings.ENRICHMENT_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+        )
+        return True
+    
+    def retry_failed(self) -> int:
+        """Give failed jobs a fresh set of attempts"""
+        return self.db.query(EnrichmentJob).filter(EnrichmentJob.status == "failed").update({
+            EnrichmentJob.status: "pending", EnrichmentJob.attempts: 0, EnrichmentJob.run_after: datetime.utcnow()
+        }, synchronize_session=False)
+    
+    def stats(self) -> Dict:
+        counts = dict(self.db.query(EnrichmentJob.status, func.count(EnrichmentJob.id)).group_by(EnrichmentJob.status).all())
+        return {
+            "jobs": {status: counts.get(status, 0) for status in ("pending", "running", "done", "failed")},
+            "products_enriched": self.db.query(func.count(ProductEnrichment.product_id)).scalar()
+        }
+
+def enrichment_queue_stats() -> Dict:
+    db = SessionLocal()
+    try:
+        return EnrichmentQueue(db).stats()
+    finally:
+        db.close()
+
+catalog_stats.register_source("enrichment_queue", enrichment_queue_stats)
+
+class RateLimiter:
+    """Spaces calls at least 60 / requests_per_minute seconds apart"""
+    
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+    
+    async def acquire(self):
+        now = asyncio.get_running_loop().time()
+        # Reserve the slot before sleeping so concurrent callers queue up behind it
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class EnrichmentWorker:
+    """Processes due jobs with at most `concurrency` in flight"""
+    
+    def __init__(self, ai_service, concurrency: int = settings.ENRICHMENT_CONCURRENCY,
+                 requests_per_minute: float = settings.ENRICHMENT_REQUESTS_PER_MINUTE):
+        self.ai_service = ai_service
+        self.concurrency = concurrency
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.counts = {"enriched": 0, "unchanged": 0, "retried": 0, "failed": 0}
+    
+    async def process(self, job_id: int) -> str:
+        """Enrich one claimed job's product; returns the outcome"""
+        db = SessionLocal()
+        try:
+            queue = EnrichmentQueue(db)
+            job = db.get(EnrichmentJob, job_id)
+            product = db.get(Product, job.product_id)
+            if product is None:
+                job.status, job.last_error = "done", "Product no longer exists"
+                db.commit()
+                return "unchanged"
+            
+            # Enrich the content as it is now; it may have changed since the job was queued
+            reviews = summary_reviews(db, [product.id])[product.id]
+            digest = content_hash(enrichment_content(product, reviews))
+            enrichment = db.get(ProductEnrichment, product.id)
+            if enrichment is not None and enrichment.content_hash == digest:
+                job.status = "done"
+                db.commit()
+                return "unchanged"
+            db.commit()  # release the read transaction while waiting on the model
+            
+            try:
+                await self.rate_limiter.acquire()
+                features = await self.ai_service.extract_product_features(product_text(product), strict=True)
+                if not isinstance(features, dict):
+                    raise ValueError(f"Expected a JSON object of features, got {type(features).__name__}")
+                await self.rate_limiter.acquire()
+                summary = await self.ai_service.generate_product_summary(product, reviews, strict=True)
+            except Exception as e:
+                retrying = queue.fail(job, e)
+                db.commit()
+                print(f"Enrichment error for product {product.id} (attempt {job.attempts}): {e}")
+                return "retried" if retrying else "failed"
+            
+            queue.complete(job, product, digest, features, summary)
+            db.commit()
+            return "enriched"
+        finally:
+            db.close()
+    
+    async def run(self, drain: bool = False, poll_seconds: float = 5.0, stop: Optional[asyncio.Event] = None) -> Dict:
+        """Claim and process jobs until `stop` is set (or, with drain=True, until none are due)"""
+        stop = stop or asyncio.Event()
+        in_flight = set()
+        while not stop.is_set():
+            claimed = []
+            if len(in_flight) < self.concurrency:
+                db = SessionLocal()
+                try:
+                    claimed = EnrichmentQueue(db).claim(self.concurrency - len(in_flight))
+                finally:
+                    db.close()
+                in_flight.update(asyncio.create_task(self.process(job_id)) for job_id in claimed)
+            
+            if not in_flight:
+                if drain:
+                    break
+                try:
+                    await asyncio.wait_for(stop.wait(), poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            done, in_flight = await asyncio.wait(in_flight, timeout=poll_seconds, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                self._record(task)
+        
+        # Let in-flight jobs finish
+        if in_flight:
+            for task in (await asyncio.wait(in_flight))[0]:
+                self._record(task)
+        return dict(self.counts)
+    
+    def _record(self, task: asyncio.Task):
+        try:
+            self.counts[task.result()] += 1
+        except Exception as e:
+            # Database errors leave the job leased; it becomes due again when the lease expires
+            print(f"Enrichment worker error: {e}")
+            self.counts["retried"] += 1
@@ -0,0 +1,232 @@
+"""
+Review Aggregates
+Maintain per-product review totals incrementally on every review write
+"""
+
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.orm import Session, object_session
+from typing import Dict, Iterable, List, Optional
+from app.core.cache import product_cache
+from app.models.models import Review, ReviewAggregate
+
+# Same thresholds as SentimentAnalyzer.analyze_product_reviews
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+AGGREGATE_COLUMNS = (
+    "review_count", "rating_sum", "sentiment_count", "sentiment_sum",
+    "positive_count", "neutral_count", "negative_count"
+)
+
+# Session.info key collecting products whose aggregates must be recounted after a flush
+STALE_PRODUCTS_KEY = "review_aggregates_stale"
+
+aggregates_table = ReviewAggregate.__table__
+reviews_table = Review.__table__
+
+def sentiment_bucket(score: Optional[float]) -> Optional[str]:
+    """Classify a normalized sentiment score as positive, neutral or negative"""
+    if score is None:
+        return None
+    if score > POSITIVE_THRESHOLD:
+        return "positive"
+    if score < NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+def _review_delta(rating: Optional[float], sentiment: Optional[float], sign: int) -> Dict[str, float]:
+    """Contribution of a single review to the aggregate columns"""
+    delta = {"review_count": sign, "rating_sum": sign * (rating or 0.0)}
+    bucket = sentiment_bucket(sentiment)
+    if bucket:
+        delta["sentiment_count"] = sign
+        delta["sentiment_sum"] = sign * sentiment
+        delta[f"{bucket}_count"] = sign
+    return delta
+
+def _totals_query(product_ids: Optional[Iterable[int]] = None):
+    """Grouped query computing the true aggregate columns from the reviews table"""
+    sentiment = reviews_table.c.sentiment_score
+    query = (
+        select(
+            reviews_table.c.product_id,
+            func.count(reviews_table.c.id).label("review_count"),
+            func.coalesce(func.sum(reviews_table.c.rating), 0.0).label("rating_sum"),
+            func.count(sentiment).label("sentiment_count"),
+            func.coalesce(func.sum(sentiment), 0.0).label("sentiment_sum"),
+            func.coalesce(func.sum(case((sentiment > POSITIVE_THRESHOLD, 1), else_=0)), 0).label("positive_count"),
+            func.coalesce(func.sum(case((sentiment.between(NEGATIVE_THRESHOLD, POSITIVE_THRESHOLD), 1), else_=0)), 0).label("neutral_count"),
+            func.coalesce(func.sum(case((sentiment < NEGATIVE_THRESHOLD, 1), else_=0)), 0).label("negative_count")
+        )
+        .group_by(reviews_table.c.product_id)
+    )
+    if product_ids is not None:
+        query = query.where(reviews_table.c.product_id.in_(list(product_ids)))
+    return query
+
+def _recompute(connection, product_id: int):
+    """Rebuild one product's aggregate row from its reviews"""
+    row = connection.execute(_totals_query([product_id])).mappings().first()
+    connection.execute(aggregates_table.delete().where(aggregates_table.c.product_id == product_id))
+    if row:
+        connection.execute(aggregates_table.insert().values(**row))
+
+def _apply_delta(connection, product_id: Optional[int], delta: Dict[str, float]):
+    """Add a delta to a product's aggregate row, creating the row when needed"""
+    if product_id is None:
+        return
+    
+    result = connection.execute(
+        aggregates_table.update()
+        .where(aggregates_table.c.product_id == product_id)
+        .values({column: aggregates_table.c[column] + value for column, value in delta.items()})
+    )
+    if result.rowcount == 0 and delta["review_count"] > 0:
+        # First review for this product. Seed the row from the delta rather than
+        # recounting, since sibling rows from the same flush fire their own events.
+        row = {column: 0 for column in AGGREGATE_COLUMNS}
+        row.update(delta)
+        connection.execute(aggregates_table.insert().values(product_id=product_id, **row))
+    
+    product_cache.invalidate(product_id)
+
+def _review_inserted(mapper, connection, target):
+    _apply_delta(connection, target.product_id, _review_delta(target.rating, target.sentiment_score, 1))
+
+def _review_deleted(mapper, connection, target):
+    _apply_delta(connection, target.product_id, _review_delta(target.rating, target.sentiment_score, -1))
+
+def _review_updated(mapper, connection, target):
+    state = inspect(target)
+    histories = {name: state.attrs[name].history for name in ("product_id", "rating", "sentiment_score")}
+    if not any(history.has_changes() for history in histories.values()):
+        return
+    
+    old_values = {}
+    for name, history in histories.items():
+        if not history.has_changes():
+            old_values[name] = getattr(target, name)
+        elif history.deleted:
+            old_values[name] = history.deleted[0]
+        else:
+            # Previous value was never loaded, so the delta is unknown;
+            # recount the affected products once the whole flush has been written
+            stale = object_session(target).info.setdefault(STALE_PRODUCTS_KEY, set())
+            stale.add(target.product_id)
+            stale.update(histories["product_id"].deleted)
+            return
+    
+    _apply_delta(
+        connection,
+        old_values["product_id"],
+        _review_delta(old_values["rating"], old_values["sentiment_score"], -1)
+    )
+    _apply_delta(connection, target.product_id, _review_delta(target.rating, target.sentiment_score, 1))
+
+def _recompute_stale_products(session, flush_context):
+    stale = session.info.pop(STALE_PRODUCTS_KEY, None)
+    if not stale:
+        return
+    connection = session.connection()
+    for product_id in stale:
+        _recompute(connection, product_id)
+        product_cache.invalidate(product_id)
+
+_LISTENERS = (
+    (Review, "after_insert", _review_inserted),
+    (Review, "after_delete", _review_deleted),
+    (Review, "after_update", _review_updated),
+    (Session, "after_flush", _recompute_stale_products),
+)
+
+def register_review_aggregate_listeners():
+    """Keep review_aggregates in sync with ORM review writes in this process (idempotent)
+
+    Call once at startup in every process that writes reviews through the ORM.
+    """
+    for target, identifier, listener in _LISTENERS:
+        if not event.contains(target, identifier, listener):
+            event.listen(target, identifier, listener)
+
+def format_review_stats(aggregate: Optional[ReviewAggregate]) -> Dict:
+    """Turn an aggregate row into the review stats returned by the API"""
+    if aggregate is None or not aggregate.review_count:
+        return {
+            "review_count": 0,
+            "average_rating": None,
+            "average_sentiment": None,
+            "sentiment_distribution": {"positive": 0, "neutral": 0, "negative": 0}
+        }
+    
+    return {
+        "review_count": aggregate.review_count,
+        "average_rating": round(aggregate.rating_sum / aggregate.review_count, 2),
+        "average_sentiment": (
+            round(aggregate.sentiment_sum / aggregate.sentiment_count, 4)
+            if aggregate.sentiment_count else None
+        ),
+        "sentiment_distribution": {
+            "positive": aggregate.positive_count,
+            "neutral": aggregate.neutral_count,
+            "negative": aggregate.negative_count
+        }
+    }
+
+def get_review_stats(db: Session, product_ids: List[int]) -> Dict[int, Dict]:
+    """Read precomputed review stats for several products in one query"""
+    if not product_ids:
+        return {}
+    rows = db.query(ReviewAggregate).filter(ReviewAggregate.product_id.in_(product_ids)).all()
+    by_id = {row.product_id: row for row in rows}
+    return {product_id: format_review_stats(by_id.get(product_id)) for product_id in product_ids}
+
+def reconcile_review_aggregates(db: Session, product_ids: Optional[List[int]] = None) -> Dict:
+    """Recompute aggregates from the reviews table and repair any drift
+    
+    Drift comes from writes that bypass the ORM (bulk inserts, raw SQL,
+    other services writing to the same database).
+    """
+    expected = {
+        row["product_id"]: row
+        for row in db.execute(_totals_query(product_ids)).mappings()
+    }
+    
+    stored_query = db.query(ReviewAggregate)
+    if product_ids is not None:
+        stored_query = stored_query.filter(ReviewAggregate.product_id.in_(product_ids))
+    stored = {row.product_id: row for row in stored_query.all()}
+    
+    corrected = 0
+    removed = 0
+    for product_id, totals in expected.items():
+        row = stored.get(product_id)
+        if row is None:
+            db.add(ReviewAggregate(**totals))
+            corrected += 1
+            continue
+        
+        drifted = False
+        for column in AGGREGATE_COLUMNS:
+            if abs((getattr(row, column) or 0) - (totals[column] or 0)) > 1e-6:
+                setattr(row, column, totals[column])
+                drifted = True
+        if drifted:
+            corrected += 1
+    
+    # Rows for products whose reviews are all gone
+    for product_id, row in stored.items():
+        if product_id not in expected:
+            db.delete(row)
+            removed += 1
+    
+    db.commit()
+    
+    if corrected or removed:
+        for product_id in set(expected) | set(stored):
+            product_cache.invalidate(product_id)
+    
+    return {
+        "products_checked": len(set(expected) | set(stored)),
+        "corrected": corrected,
+        "removed": removed
+    }
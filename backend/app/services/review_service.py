@@ -0,0 +1,101 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, and_, or_, tuple_
+from typing import Dict, Optional
+from app.models.models import Review
+from datetime import datetime
+import base64
+import json
+
+# Sort modes for product reviews: sort column and whether it is descending.
+# Each is backed by an index on (product_id, column, id); ties break on id.
+# Reviews without a value for the sort column (no date, no votes) come last.
+REVIEW_SORTS = {
+    "newest": (Review.review_date, True),
+    "helpful": (Review.helpful_votes, True),
+    "rating_high": (Review.rating, True),
+    "rating_low": (Review.rating, False),
+    "sentiment": (Review.sentiment_score, True)
+}
+
+def encode_cursor(sort: str, key, review_id: int) -> str:
+    """Encode the position after a review as an opaque cursor"""
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = json.dumps([sort, key, review_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str):
+    """Decode a cursor into (sort key, review id), validating the sort mode"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, key, review_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    return key, int(review_id)
+
+class ReviewService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_review_page(
+        self,
+        product_id: int,
+        sort: str = "newest",
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        page: Optional[int] = None
+    ) -> Dict:
+        """Get one page of a product's reviews in a deterministic order
+        
+        With a cursor, the page starts right after the cursor position so every
+        page is an index range scan. Without one, `page` falls back to OFFSET
+        paging for older clients.
+        """
+        if sort not in REVIEW_SORTS:
+            raise ValueError(f"Unknown sort: {sort}. Use one of: {', '.join(REVIEW_SORTS)}")
+        
+        column, descending = REVIEW_SORTS[sort]
+        query = self.db.query(Review).filter(Review.product_id == product_id)
+        
+        # Unscored reviews have no place in a sentiment ordering
+        if sort == "sentiment":
+            query = query.filter(Review.sentiment_score.isnot(None))
+        
+        if cursor:
+            key, last_id = decode_cursor(cursor, sort)
+            if key is None:
+                # Already among the trailing NULLs: page on id alone
+                query = query.filter(
+                    and_(column.is_(None), Review.id < last_id if descending else Review.id > last_id)
+                )
+            else:
+                if isinstance(column.type, DateTime):
+                    try:
+                        key = datetime.fromisoformat(key)
+                    except (TypeError, ValueError):
+                        raise ValueError("Invalid cursor")
+                position, after = tuple_(column, Review.id), tuple_(key, last_id)
+                query = query.filter(or_(position < after if descending else position > after, column.is_(None)))
+        
+        direction = (lambda c: c.desc()) if descending else (lambda c: c.asc())
+        query = query.order_by(direction(column).nulls_last(), direction(Review.id))
+        
+        if page and page > 1 and not cursor:
+            query = query.offset((page - 1) * limit)
+        
+        # Fetch one extra row to know whether another page exists
+        rows = query.limit(limit + 1).all()
+        reviews = rows[:limit]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = reviews[-1]
+            next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+        
+        return {
+            "reviews": reviews,
+            "next_cursor": next_cursor
+        }
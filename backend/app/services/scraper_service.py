@@ -6,8 +6,11 @@ from selenium.webdriver.chrome.options import Options
 from typing import List, Dict
 import time
 import asyncio
+from app.core.cache import product_cache
 from app.core.config import settings
 from app.models.models import Product, Review
+from app.services.dedup_service import DedupService
+from app.services.enrichment_service import EnrichmentQueue
 from sqlalchemy.orm import Session
 
 class ScraperService:
@@ -143,6 +146,8 @@ class ScraperService:
                 existing.rating = product_data['rating']
                 existing.review_count = product_data['review_count']
                 existing.in_stock = product_data['in_stock']
+                product_cache.invalidate(existing.id)
+                product = existing
             else:
                 # Create new product
                 new_product = Product(
@@ -159,6 +164,14 @@ class ScraperService:
                     in_stock=product_data['in_stock']
                 )
                 db.add(new_product)
+                db.flush()
+                # Cluster with near-duplicates already scraped from other sources
+                DedupService(db).index_product(new_product)
+                product = new_product
+            
+            if settings.ENRICHMENT_ON_INGEST:
+                # Features and summary are generated in the background (enrich_products.py)
+                EnrichmentQueue(db).enqueue(product)
             
             db.commit()
             
@@ -1,9 +1,53 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, defer
 from sqlalchemy import text, or_, and_
 from typing import List, Optional
 from app.models.models import Product, SearchQuery
+from app.services.dedup_service import canonical_products_only
 import re
 
+# Product columns that clients may select through the `fields` query parameter
+PRODUCT_FIELDS = (
+    "id", "name", "description", "category", "subcategory", "brand", "price",
+    "original_price", "discount_percentage", "rating", "review_count", "image_url",
+    "product_url", "source_website", "in_stock", "features", "created_at", "updated_at"
+)
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated `fields` parameter into product column names"""
+    if not fields or not fields.strip():
+        return None
+    
+    requested = []
+    for field in fields.split(","):
+        field = field.strip()
+        if field and field not in requested:
+            requested.append(field)
+    
+    unknown = [f for f in requested if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown product fields: {', '.join(unknown)}")
+    
+    # The id is always returned so clients can link to the detail page
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return requested
+
+def product_load_options(fields: Optional[List[str]], default_deferred: tuple = ()) -> list:
+    """Map selected fields onto loader options so other columns are never read"""
+    if fields is None:
+        return [defer(getattr(Product, column)) for column in default_deferred]
+    return [load_only(*[getattr(Product, f) for f in fields])]
+
+def serialize_product_fields(product: Product, fields: List[str]) -> dict:
+    """Serialize only the selected columns of a product"""
+    data = {}
+    for field in fields:
+        value = getattr(product, field)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        data[field] = value
+    return data
+
 class SearchService:
     def __init__(self, db: Session):
         self.db = db
@@ -17,7 +61,8 @@ class SearchService:
         min_rating: Optional[float] = None,
         sort_by: str = "relevance",
         page: int = 1,
-        limit: int = 20
+        limit: int = 20,
+        fields: Optional[List[str]] = None
     ):
         """Search products with filters and sorting"""
         
@@ -30,8 +75,10 @@ class SearchService:
         )
         self.db.add(search_log)
         
-        # Build base query
-        base_query = self.db.query(Product)
+        # Build base query; features are never part of the search card so skip them by default
+        base_query = self.db.query(Product).options(
+            *product_load_options(fields, default_deferred=("features",))
+        )
         
         # Apply filters
         filters = []
@@ -63,6 +110,9 @@ class SearchService:
         # Only show in-stock products
         filters.append(Product.in_stock == True)
         
+        # One result per duplicate cluster (the same item scraped from several sources)
+        filters.append(canonical_products_only())
+        
         if filters:
             base_query = base_query.filter(and_(*filters))
         
@@ -90,7 +140,7 @@ class SearchService:
         self.db.commit()
         
         return {
-            "products": [self._format_product(p) for p in products],
+            "products": [self._format_product(p, fields) for p in products],
             "total": total,
             "page": page,
             "limit": limit,
@@ -127,9 +177,18 @@ class SearchService:
         
         return list(set(suggestions))[:10]  # Remove duplicates and limit
     
-    async def get_trending_products(self, category: Optional[str], limit: int) -> List[Product]:
+    async def get_trending_products(
+        self,
+        category: Optional[str],
+        limit: int,
+        fields: Optional[List[str]] = None
+    ) -> List[Product]:
         """Get trending products based on search patterns and ratings"""
-        query = self.db.query(Product).filter(Product.in_stock == True)
+        query = (
+            self.db.query(Product)
+            .options(*product_load_options(fields))
+            .filter(Product.in_stock == True, canonical_products_only())
+        )
         
         if category:
             query = query.filter(Product.category == category)
@@ -147,8 +206,11 @@ class SearchService:
         
         return trending
     
-    def _format_product(self, product: Product) -> dict:
+    def _format_product(self, product: Product, fields: Optional[List[str]] = None) -> dict:
         """Format product for API response"""
+        if fields is not None:
+            return serialize_product_fields(product, fields)
+        
         return {
             "id": product.id,
             "name": product.name,
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Review Sentiment Backfill
+Score reviews whose sentiment_score is missing or was produced by another
+model, backend or tiering setting with the local SentimentAnalyzer and store
+the results, so read paths only ever use stored scores. Reviews are processed in id-ordered chunks,
+scored in batches across a process pool and bulk-updated; an interrupted
+run resumes from its checkpoint.
+
+Usage:
+    python backfill_review_sentiment.py                 # missing or stale scores
+    python backfill_review_sentiment.py --missing-only  # only reviews without a score
+    python backfill_review_sentiment.py --restart       # ignore the checkpoint
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai-ml"))
+
+from sqlalchemy import or_, update
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.schema import ensure_schema
+from app.models.models import Review, ReviewSentimentVersion
+from app.services.review_aggregates import reconcile_review_aggregates
+
+# Per-process analyzer, loaded once by the pool initializer
+_analyzer = None
+
+def _init_worker(model_name: str, batch_size: int):
+    global _analyzer
+    from sentiment_model import SentimentAnalyzer
+    _analyzer = SentimentAnalyzer(
+        model_name,
+        batch_size=batch_size,
+        backend=settings.SENTIMENT_BACKEND,
+        onnx_dir=settings.SENTIMENT_ONNX_DIR,
+        tiered=settings.SENTIMENT_TIERED,
+        uncertainty_band=settings.SENTIMENT_UNCERTAINTY_BAND
+    )
+    # Load now so the analyzer reports the backend it actually got
+    _analyzer.load()
+
+def scorer_version(analyzer) -> str:
+    """Version key stored per review, e.g. "<model>:int8:tiered:0.5"
+    
+    The backend and the lexicon tier change scores as much as the model
+    does, so a change to any of them marks earlier scores as stale. The
+    backend is the one the loaded analyzer resolved, which falls back to
+    pytorch when the configured one is unavailable.
+    """
+    version = f"{analyzer.model_name}:{analyzer.backend}"
+    if analyzer.lexicon is not None:
+        version += f":tiered:{analyzer.uncertainty_band:g}"
+    return version
+
+def _worker_version() -> str:
+    return scorer_version(_analyzer)
+
+def _score_texts(texts: List[Optional[str]]) -> List[Optional[float]]:
+    """Normalized sentiment per text; None for reviews without text"""
+    results = _analyzer.analyze_batch([text or "" for text in texts])
+    return [
+        result["normalized_score"] if text and text.strip() else None
+        for text, result in zip(texts, results)
+    ]
+
+def _read_checkpoint(path: str, version: str) -> Dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("version") == version and not checkpoint.get("completed"):
+            return checkpoint
+    return {"version": version, "last_id": 0, "scored": 0, "completed": False}
+
+def _write_checkpoint(path: str, checkpoint: Dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def backfill(
+    model_name: str = settings.SENTIMENT_MODEL_NAME,
+    chunk_size: int = settings.SENTIMENT_CHUNK_SIZE,
+    batch_size: int = settings.SENTIMENT_BATCH_SIZE,
+    workers: int = settings.SENTIMENT_WORKERS,
+    checkpoint_path: str = settings.SENTIMENT_CHECKPOINT_PATH,
+    missing_only: bool = False,
+    restart: bool = False
+) -> Dict:
+    """Score every review needing a (re)score; returns run statistics"""
+    ensure_schema()
+    
+    # One process scores in-line; more spread each chunk over a pool
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_name, batch_size))
+    else:
+        _init_worker(model_name, batch_size)
+    
+    db = SessionLocal()
+    started = time.time()
+    scored_this_run = 0
+    try:
+        version = pool.submit(_worker_version).result() if pool is not None else _worker_version()
+        checkpoint = {"version": version, "last_id": 0, "scored": 0, "completed": False}
+        if not restart:
+            checkpoint = _read_checkpoint(checkpoint_path, version)
+        if checkpoint["last_id"]:
+            print(f"Resuming after review {checkpoint['last_id']} ({checkpoint['scored']} scored)")
+        
+        while True:
+            query = db.query(Review.id, Review.product_id, Review.review_text).outerjoin(
+                ReviewSentimentVersion, ReviewSentimentVersion.review_id == Review.id
+            ).filter(Review.id > checkpoint["last_id"])
+            if missing_only:
+                query = query.filter(Review.sentiment_score.is_(None), ReviewSentimentVersion.review_id.is_(None))
+            else:
+                query = query.filter(or_(
+                    ReviewSentimentVersion.review_id.is_(None),
+                    ReviewSentimentVersion.model_name != version
+                ))
+            chunk = query.order_by(Review.id).limit(chunk_size).all()
+            if not chunk:
+                break
+            
+            texts = [row.review_text for row in chunk]
+            if pool is not None:
+                size = max(batch_size, -(-len(texts) // workers))
+                scores = [
+                    score
+                    for part in pool.map(_score_texts, [texts[i:i + size] for i in range(0, len(texts), size)])
+                    for score in part
+                ]
+            else:
+                scores = _score_texts(texts)
+            
+            review_ids = [row.id for row in chunk]
+            db.execute(update(Review), [
+                {"id": review_id, "sentiment_score": score} for review_id, score in zip(review_ids, scores)
+            ])
+            db.query(ReviewSentimentVersion).filter(
+                ReviewSentimentVersion.review_id.in_(review_ids)
+            ).delete(synchronize_session=False)
+            db.execute(ReviewSentimentVersion.__table__.insert(), [
+                {"review_id": review_id, "model_name": version} for review_id in review_ids
+            ])
+            # Bulk updates bypass the ORM listeners, so recount the affected products (commits)
+            reconcile_review_aggregates(db, list({row.product_id for row in chunk}))
+            
+            checkpoint["last_id"] = review_ids[-1]
+            checkpoint["scored"] += len(chunk)
+            _write_checkpoint(checkpoint_path, checkpoint)
+            
+            scored_this_run += len(chunk)
+            rate = scored_this_run / max(time.time() - started, 1e-9)
+            print(f"Scored {checkpoint['scored']} reviews (last id {checkpoint['last_id']}, {rate:.0f}/s)")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        if pool is not None:
+            pool.shutdown()
+    
+    checkpoint["completed"] = True
+    _write_checkpoint(checkpoint_path, checkpoint)
+    return {
+        "scored": checkpoint["scored"],
+        "scored_this_run": scored_this_run,
+        "seconds": round(time.time() - started, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill review sentiment scores")
+    parser.add_argument("--missing-only", action="store_true", help="Skip reviews that already have a score")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and rescan from the first review")
+    parser.add_argument("--workers", type=int, default=settings.SENTIMENT_WORKERS, help="Scoring processes")
+    parser.add_argument("--batch-size", type=int, default=settings.SENTIMENT_BATCH_SIZE, help="Reviews per forward pass")
+    args = parser.parse_args()
+    
+    print("💬 Backfilling review sentiment...")
+    print("=" * 50)
+    try:
+        result = backfill(
+            workers=args.workers,
+            batch_size=args.batch_size,
+            missing_only=args.missing_only,
+            restart=args.restart
+        )
+        print(f"✅ {result['scored_this_run']} reviews scored in {result['seconds']}s")
+        return True
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+LLM Sentiment Batching Benchmark
+Score the same reviews with AIService.analyze_review_sentiment (one completion
+per review) and with analyze_review_sentiments (many reviews per prompt)
+against the stub LLM server, and report round trips, tokens per scored review,
+wall time and score agreement. A second batched pass shows the cache.
+
+Usage:
+    python benchmark_llm_sentiment.py
+    python benchmark_llm_sentiment.py --reviews 1000 --batch-sizes 10,20,50 --latency-ms 300
+    python benchmark_llm_sentiment.py --malformed-rate 0.1 --database-url sqlite:///./ai_search.db
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, List
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai-ml"))
+
+from app.core.config import settings
+from app.services.ai_service import AIService, review_sentiment_cache
+from benchmark_sentiment import database_reviews, synthetic_reviews
+from llm_stub_server import StubLLMServer
+
+async def _measure(server: StubLLMServer, reviews: List[str], run) -> Dict:
+    server.llm.reset()
+    started = time.perf_counter()
+    scores = await run()
+    seconds = time.perf_counter() - started
+    stats = server.llm.stats()
+    return {
+        "scores": scores,
+        "round_trips": stats["requests"],
+        "malformed_replies": stats["malformed_replies"],
+        "prompt_tokens_per_review": round(stats["prompt_tokens"] / len(reviews), 1),
+        "completion_tokens_per_review": round(stats["completion_tokens"] / len(reviews), 1),
+        "seconds": round(seconds, 2)
+    }
+
+async def benchmark(reviews: List[str], batch_sizes: List[int], server: StubLLMServer) -> List[Dict]:
+    service = AIService()
+    
+    async def per_review():
+        # Same concurrency as the batched path, one review per prompt
+        semaphore = asyncio.Semaphore(settings.LLM_SENTIMENT_CONCURRENCY)
+        
+        async def score(text):
+            async with semaphore:
+                return await service.analyze_review_sentiment(text)
+        
+        return await asyncio.gather(*(score(text) for text in reviews))
+    
+    def batched(batch_size):
+        return lambda: service.analyze_review_sentiments(reviews, batch_size)
+    
+    review_sentiment_cache.clear()
+    baseline = await _measure(server, reviews, per_review)
+    results = [{"mode": "per_review", "batch_size": 1, **baseline}]
+    for batch_size in batch_sizes:
+        review_sentiment_cache.clear()
+        result = await _measure(server, reviews, batched(batch_size))
+        result["max_score_difference"] = round(max(abs(a - b) for a, b in zip(result["scores"], baseline["scores"])), 3)
+        results.append({"mode": "batched", "batch_size": batch_size, **result})
+    
+    # Everything is cached now: no round trips at all
+    results.append({"mode": "batched_cached", "batch_size": batch_sizes[-1], **await _measure(server, reviews, batched(batch_sizes[-1]))})
+    
+    for result in results:
+        scores = result.pop("scores")
+        print(f"{result['mode']:>15} x{result['batch_size']:<3} {result['round_trips']:>6} round trips, "
+              f"{result['prompt_tokens_per_review']:>7.1f} + {result['completion_tokens_per_review']:.1f} tokens/review, "
+              f"{result['seconds']:>6.2f}s ({len(scores)} scores)")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched LLM review sentiment against the stub LLM")
+    parser.add_argument("--reviews", type=int, default=500, help="Reviews to score")
+    parser.add_argument("--batch-sizes", default="5,20,50", help="Comma-separated reviews per prompt")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub latency per round trip")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of batched replies the stub breaks")
+    parser.add_argument("--database-url", help="Score reviews from this database instead of synthetic ones")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    
+    reviews = database_reviews(args.database_url, args.reviews) if args.database_url else synthetic_reviews(args.reviews)
+    server = StubLLMServer(latency_ms=args.latency_ms, malformed_rate=args.malformed_rate).start()
+    settings.OPENAI_API_BASE = server.base_url
+    settings.OPENAI_API_KEY = settings.OPENAI_API_KEY or "stub"
+    try:
+        results = asyncio.run(benchmark(reviews, [int(size) for size in args.batch_sizes.split(",")], server))
+    finally:
+        server.stop()
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Similar Products Builder
+Embed products with ProductSimilarityModel and store each product's
+top-K neighbours in the product_neighbors table.
+Run offline (e.g. nightly or after a large scrape). Only products created or
+changed since the last build are re-embedded; pass --full to rebuild from scratch.
+"""
+
+import sys
+import os
+import time
+from datetime import timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai-ml"))
+
+from sqlalchemy import func, or_
+from app.core.config import settings
+from app.core.database import SessionLocal, engine, Base
+from app.models.models import Product, ProductNeighbor, ProductSignature, ProductLSHBucket
+from app.services.dedup_service import canonical_products_only
+from similarity_model import ProductSimilarityModel, saved_model_exists
+from embedding_pipeline import EmbeddingPipeline
+
+INSERT_CHUNK_SIZE = 5000
+# Overlap with the previous build so products written during it are not missed
+CHANGE_WINDOW_MARGIN = timedelta(minutes=5)
+
+def product_to_dict(product: Product) -> dict:
+    """Fields used by ProductSimilarityModel.prepare_product_text and its metadata"""
+    return {
+        'id': product.id,
+        'name': product.name,
+        'brand': product.brand,
+        'category': product.category,
+        'subcategory': product.subcategory,
+        'description': product.description,
+        'features': product.features,
+        'price': product.price,
+        'rating': product.rating,
+        'in_stock': product.in_stock
+    }
+
+def build_neighbor_table(k: int = settings.SIMILAR_PRODUCTS_K, full: bool = False) -> int:
+    """Refresh the embedding model and rebuild product_neighbors; returns the new version"""
+    Base.metadata.create_all(bind=engine, tables=[
+        ProductNeighbor.__table__, ProductSignature.__table__, ProductLSHBucket.__table__
+    ])
+    db = SessionLocal()
+    try:
+        model = ProductSimilarityModel(
+            settings.SIMILARITY_MODEL_NAME,
+            settings.SIMILARITY_INDEX_TYPE,
+            embedding_cache_dir=settings.SIMILARITY_EMBEDDING_CACHE_DIR,
+            storage=settings.SIMILARITY_STORAGE
+        )
+        model_path = settings.SIMILARITY_MODEL_PATH
+        # Near-duplicates are left out; their cluster's canonical product represents them
+        all_ids = [product_id for (product_id,) in db.query(Product.id).filter(canonical_products_only())]
+        if len(all_ids) < 2:
+            print("⚠️ Need at least two products to compute neighbours")
+            return 0
+        
+        if not full and saved_model_exists(model_path):
+            model.load_model(model_path)
+            if model.index_type != settings.SIMILARITY_INDEX_TYPE:
+                print(f"Switching index from {model.index_type} to {settings.SIMILARITY_INDEX_TYPE}")
+                model.rebuild_index(settings.SIMILARITY_INDEX_TYPE, {})
+            if model.storage != settings.SIMILARITY_STORAGE:
+                print(f"Switching vector storage from {model.storage} to {settings.SIMILARITY_STORAGE}")
+                model.rebuild_index(storage=settings.SIMILARITY_STORAGE)
+            
+            # Only products created or changed since the last build
+            since = model.last_build_at - CHANGE_WINDOW_MARGIN if model.last_build_at else None
+            query = db.query(Product).filter(canonical_products_only())
+            if since is not None:
+                query = query.filter(or_(Product.created_at >= since, Product.updated_at >= since))
+            changed = [product_to_dict(p) for p in query.order_by(Product.id).all()]
+            
+            stats = model.sync_products(changed, all_ids)
+            print(f"Embeddings: {stats}")
+        else:
+            # Full build: stream the catalog through the chunked pipeline so memory
+            # stays bounded. Without --full an interrupted build resumes where it stopped.
+            pipeline = EmbeddingPipeline(
+                settings.DATABASE_URL,
+                settings.SIMILARITY_EMBEDDINGS_DIR,
+                chunk_size=settings.SIMILARITY_CHUNK_SIZE,
+                batch_size=settings.SIMILARITY_BATCH_SIZE,
+                workers=settings.SIMILARITY_WORKERS,
+                similarity_model=model,
+                exclude_duplicates=True
+            )
+            print(f"Embeddings: {pipeline.run(resume=not full)}")
+            model.load_embeddings(settings.SIMILARITY_EMBEDDINGS_DIR)
+            current_ids = set(all_ids)
+            model.remove_products([i for i in model.product_ids.tolist() if i not in current_ids])
+        model.save_model(model_path)
+        
+        print(f"Computing top-{k} neighbours...")
+        neighbors = model.compute_neighbors(k)
+        
+        version = (db.query(func.max(ProductNeighbor.version)).scalar() or 0) + 1
+        rows = [
+            {
+                'product_id': product_id,
+                'rank': rank,
+                'neighbor_id': neighbor_id,
+                'score': score,
+                'version': version
+            }
+            for product_id, product_neighbors in neighbors.items()
+            for rank, (neighbor_id, score) in enumerate(product_neighbors)
+        ]
+        
+        # Swap the whole table in one transaction so readers never see a partial build
+        table = ProductNeighbor.__table__
+        db.execute(table.delete())
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            db.execute(table.insert(), rows[start:start + INSERT_CHUNK_SIZE])
+        db.commit()
+        
+        print(f"✅ Stored {len(rows)} neighbours for {len(neighbors)} products (version {version})")
+        return version
+        
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("🔗 Building similar products table...")
+    print("=" * 50)
+    started = time.time()
+    try:
+        build_neighbor_table(full="--full" in sys.argv)
+    except Exception as e:
+        print(f"❌ Build failed: {e}")
+        sys.exit(1)
+    print(f"Done in {time.time() - started:.1f}s")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Clustering
+Compute MinHash signatures for products that do not have one yet and cluster
+near-duplicates from different sources under a canonical product id.
+Run after batch scrapers; use --rebuild to recluster the whole catalog
+(e.g. after changing DEDUP_SIMILARITY_THRESHOLD).
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from app.core.database import SessionLocal
+from app.core.schema import ensure_schema
+from app.models.models import ProductSignature
+from app.services.dedup_service import DedupService
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate products")
+    parser.add_argument("--rebuild", action="store_true", help="Discard existing signatures and recluster everything")
+    args = parser.parse_args()
+    
+    print("🧬 Clustering near-duplicate products...")
+    print("=" * 50)
+    
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        result = DedupService(db).index_unprocessed(rebuild=args.rebuild)
+        clusters = db.query(func.count(func.distinct(ProductSignature.canonical_id))).scalar()
+        duplicates = db.query(func.count(ProductSignature.product_id)).filter(
+            ProductSignature.canonical_id != ProductSignature.product_id
+        ).scalar()
+        print(f"✅ Indexed {result['indexed']} products ({result['duplicates']} new duplicates)")
+        print(f"• Canonical products: {clusters}")
+        print(f"• Duplicates hidden from search: {duplicates}")
+        return True
+    except Exception as e:
+        print(f"❌ Deduplication failed: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Product Enrichment Worker
+Process the AI enrichment queue: extract features and write a summary for
+each queued product with AIService, with bounded concurrency, a request rate
+limit and retries with backoff. Products are queued on ingest; --enqueue-stale
+also queues products whose text or top reviews changed since they were
+enriched. Unchanged products are never sent to the model again.
+
+Usage:
+    python enrich_products.py                   # run until interrupted
+    python enrich_products.py --enqueue-stale --drain
+    python enrich_products.py --retry-failed --drain
+    python enrich_products.py --stats
+"""
+
+import sys
+import os
+import time
+import asyncio
+import signal
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.schema import ensure_schema
+from app.services.ai_service import AIService
+from app.services.enrichment_service import EnrichmentQueue, EnrichmentWorker
+
+async def run_worker(worker: EnrichmentWorker, drain: bool):
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+    return await worker.run(drain=drain, stop=stop)
+
+def main():
+    parser = argparse.ArgumentParser(description="Enrich products with AI features and summaries")
+    parser.add_argument("--enqueue-stale", action="store_true", help="Queue products whose content changed first")
+    parser.add_argument("--retry-failed", action="store_true", help="Give failed jobs a fresh set of attempts")
+    parser.add_argument("--drain", action="store_true", help="Exit when no job is due instead of polling")
+    parser.add_argument("--stats", action="store_true", help="Print queue counts and exit")
+    parser.add_argument("--concurrency", type=int, default=settings.ENRICHMENT_CONCURRENCY, help="Jobs in flight")
+    parser.add_argument("--requests-per-minute", type=float, default=settings.ENRICHMENT_REQUESTS_PER_MINUTE,
+                        help="LLM request rate limit")
+    args = parser.parse_args()
+    
+    print("✨ Enriching products...")
+    print("=" * 50)
+    
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        queue = EnrichmentQueue(db)
+        if args.enqueue_stale:
+            result = queue.enqueue_stale()
+            print(f"• Checked {result['checked']} products, queued {result['enqueued']}")
+        if args.retry_failed:
+            print(f"• Requeued {queue.retry_failed()} failed jobs")
+            db.commit()
+        if args.stats:
+            stats = queue.stats()
+            print(f"• Jobs: {stats['jobs']}")
+            print(f"• Products enriched: {stats['products_enriched']}")
+            return True
+    except Exception as e:
+        print(f"❌ Enrichment queue error: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    if not settings.OPENAI_API_KEY:
+        print("❌ OPENAI_API_KEY is not set; jobs stay queued")
+        return False
+    
+    started = time.time()
+    worker = EnrichmentWorker(AIService(), args.concurrency, args.requests_per_minute)
+    counts = asyncio.run(run_worker(worker, args.drain))
+    print(f"✅ {counts['enriched']} products enriched in {time.time() - started:.1f}s")
+    print(f"• Unchanged: {counts['unchanged']}")
+    print(f"• Retrying: {counts['retried']}")
+    print(f"• Failed: {counts['failed']}")
+    return True
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
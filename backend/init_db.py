@@ -8,8 +8,11 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.database import engine, Base
-from app.models.models import Product, Review, SearchQuery, PriceHistory
+from app.core.schema import ensure_schema
+from app.models.models import (
+    Product, Review, SearchQuery, PriceHistory, ReviewAggregate, ProductNeighbor,
+    ProductSignature, ProductLSHBucket, ReviewSentimentVersion, ProductEnrichment, EnrichmentJob
+)
 
 def init_database():
     """Initialize the database with all tables"""
@@ -17,8 +20,8 @@ def init_database():
         print("🗄️ Initializing AI Product Search Engine Database...")
         print("=" * 50)
         
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
+        # Create missing tables and indexes, and count existing reviews into review_aggregates
+        ensure_schema()
         
         print("✅ Database tables created successfully!")
         print("\nCreated tables:")
@@ -26,6 +29,11 @@ def init_database():
         print("• reviews - Customer reviews and ratings") 
         print("• search_queries - Search analytics")
         print("• price_history - Price tracking over time")
+        print("• review_aggregates - Precomputed review totals per product")
+        print("• product_neighbors - Precomputed similar products")
+        print("• product_signatures / product_lsh_buckets - Near-duplicate clusters")
+        print("• review_sentiment_versions - Model behind each stored review sentiment")
+        print("• product_enrichments / enrichment_jobs - AI summaries and the enrichment queue")
         
         return True
         
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Stub LLM Server
+Local stand-in for the OpenAI completions endpoint (POST /v1/completions),
+so AIService can be tested and benchmarked without an API key or network.
+Review sentiment prompts, single or batched, are answered with the lexicon
+scorer; other prompts get a fixed reply. The server counts round trips and
+approximate tokens (GET /stats, POST /reset).
+
+Point the backend at it with OPENAI_API_BASE=http://127.0.0.1:8089/v1 and any
+non-empty OPENAI_API_KEY.
+
+Usage:
+    python llm_stub_server.py --port 8089
+    python llm_stub_server.py --latency-ms 300 --malformed-rate 0.1
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai-ml"))
+
+from lexicon_sentiment import LexiconScorer
+
+# Rough BPE-like count: words and punctuation marks
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+_BATCH_MARKER = "Reviews (JSON array):"
+_SINGLE_REVIEW = re.compile(r'Review: "(.*)"\s*Return only the numerical score', re.S)
+
+def count_tokens(text: str) -> int:
+    return len(_TOKEN.findall(text))
+
+class StubLLM:
+    """Completion logic and counters, shared by all request threads"""
+    
+    def __init__(self, latency_ms: float = 0.0, malformed_rate: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.malformed_rate = malformed_rate
+        self.scorer = LexiconScorer(max_tokens=10 ** 6)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.counts = {
+                "requests": 0, "batch_requests": 0, "reviews_scored": 0, "malformed_replies": 0,
+                "prompt_tokens": 0, "completion_tokens": 0
+            }
+    
+    def _score(self, text: str) -> float:
+        return round(self.scorer.score(text)[0], 2)
+    
+    def _batch_reply(self, reviews: List[str]) -> str:
+        with self._lock:
+            malformed = self._random.random() < self.malformed_rate
+        if malformed:
+            # Plausible model mistake: one score missing
+            return json.dumps([self._score(text) for text in reviews[:-1]])
+        return json.dumps([self._score(text) for text in reviews])
+    
+    def complete(self, prompt: str, max_tokens: int) -> Dict:
+        batch = single = None
+        if _BATCH_MARKER in prompt:
+            line = prompt.split(_BATCH_MARKER, 1)[1].strip().split("\n", 1)[0]
+            batch = json.loads(line)
+            text = self._batch_reply(batch)
+        else:
+            single = _SINGLE_REVIEW.search(prompt)
+            text = str(self._score(single.group(1))) if single else "Stub completion."
+        
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = min(count_tokens(text), max_tokens)
+        with self._lock:
+            self.counts["requests"] += 1
+            request_number = self.counts["requests"]
+            self.counts["prompt_tokens"] += prompt_tokens
+            self.counts["completion_tokens"] += completion_tokens
+            if batch is not None:
+                self.counts["batch_requests"] += 1
+                self.counts["reviews_scored"] += len(batch)
+                if parse_count(text) != len(batch):
+                    self.counts["malformed_replies"] += 1
+            elif single:
+                self.counts["reviews_scored"] += 1
+        
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            "id": f"cmpl-stub-{request_number}",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{"text": text, "index": 0, "logprobs": None, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counts)
+
+def parse_count(text: str) -> int:
+    try:
+        return len(json.loads(text))
+    except ValueError:
+        return -1
+
+def make_handler(llm: StubLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        
+        def _send(self, status: int, body: Dict):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send(200, llm.stats())
+            else:
+                self._send(404, {"error": {"message": "Not found"}})
+        
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path.rstrip("/") == "/reset":
+                llm.reset()
+                self._send(200, llm.stats())
+            elif self.path.rstrip("/").endswith("/completions"):
+                prompt = request.get("prompt", "")
+                self._send(200, llm.complete(prompt if isinstance(prompt, str) else prompt[0], request.get("max_tokens", 16)))
+            else:
+                self._send(404, {"error": {"message": "Not found"}})
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return Handler
+
+class StubLLMServer:
+    """Runs the stub on a background thread (port 0 picks a free port)"""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, malformed_rate: float = 0.0):
+        self.llm = StubLLM(latency_ms, malformed_rate)
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.llm))
+        self.httpd.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a stub OpenAI completions endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every response")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of batched replies with a score missing")
+    args = parser.parse_args()
+    
+    server = StubLLMServer(args.host, args.port, args.latency_ms, args.malformed_rate)
+    print(f"Stub LLM listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Stub LLM stopped: {server.llm.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from app.api.routes import products, search, auth, scraper, monetization, api_management
 from app.core.config import settings
+from app.core.schema import ensure_schema
+from app.services.catalog_stats import catalog_stats
+from app.services.review_aggregates import register_review_aggregate_listeners
 import os
 
 app = FastAPI(
@@ -33,21 +36,38 @@ app.include_router(api_management.router, prefix="/api/apis", tags=["api_managem
 async def root():
     return {"message": "AI Product Search Engine API", "version": "1.0.0"}
 
+@app.on_event("startup")
+async def start_background_tasks():
+    # Tables added since the database was created (aggregates, neighbours, dedup, enrichment)
+    ensure_schema()
+    register_review_aggregate_listeners()
+    catalog_stats.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await catalog_stats.stop()
+
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
-    from app.core.database import SessionLocal
-    from app.models.models import Product
-    
-    db = SessionLocal()
-    try:
-        product_count = db.query(Product).count()
-        return {
-            "status": "healthy", 
-            "products_count": product_count,
-            "message": "AI Product Search Engine is running"
-        }
-    finally:
-        db.close()
+    """Liveness probe: answers from memory, never touches the database"""
+    snapshot = catalog_stats.snapshot or {}
+    return {
+        "status": "healthy", 
+        "products_count": snapshot.get("products_count"),
+        "message": "AI Product Search Engine is running"
+    }
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """Readiness probe: cached catalog stats, refreshed in the background"""
+    ready = catalog_stats.is_ready()
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "not_ready",
+        **catalog_stats.status()
+    }
 
 @app.get("/demo")
 async def serve_demo():
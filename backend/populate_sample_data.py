@@ -9,7 +9,9 @@ import random
 from datetime import datetime, timedelta
 from sqlalchemy.orm import sessionmaker
 from app.core.database import engine
+from app.core.schema import ensure_schema
 from app.models.models import Product, Review, SearchQuery, PriceHistory
+from app.services.review_aggregates import register_review_aggregate_listeners
 
 # Sample data for product generation
 COSMETICS_DATA = {
@@ -244,6 +246,8 @@ async def main():
     print("🚀 AI Product Search Engine - Sample Data Generator")
     print("=" * 50)
     
+    ensure_schema()
+    register_review_aggregate_listeners()
     generator = SampleDataGenerator()
     
     # Generate 30 products per category (90 total)
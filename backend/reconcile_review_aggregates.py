@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Review Aggregate Reconciliation
+Recompute per-product review totals from the reviews table and repair drift.
+Run periodically (e.g. nightly) or after bulk review imports.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.core.schema import ensure_schema
+from app.services.review_aggregates import reconcile_review_aggregates
+
+def main():
+    """Reconcile review aggregates for every product"""
+    print("🔁 Reconciling review aggregates...")
+    print("=" * 50)
+    
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        result = reconcile_review_aggregates(db)
+        print(f"✅ Checked {result['products_checked']} products")
+        print(f"• Corrected: {result['corrected']}")
+        print(f"• Removed: {result['removed']}")
+        return True
+    except Exception as e:
+        print(f"❌ Reconciliation failed: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)